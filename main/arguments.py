@@ -40,10 +40,22 @@ FULL_CONFIG_DIR = str(Path(__file__).resolve().parent.parent.joinpath(CONFIG_DIR
 DEFAULT_URL_HOST_BASE = "192.168.10.1"
 DEFAULT_MIXER = "Speaker"  # default mixer name to be used for sound output
 DEFAULT_CHECKLIST = "checklist.xml"
+CO_HISTORY_FILE = "co-history.bin"
+FULL_CO_HISTORY_FILE = str(Path(FULL_CONFIG_DIR).joinpath(CO_HISTORY_FILE))
 LOG_DIR = "log"
 LOG_FILE = "radar-display.log"
 FULL_LOG_DIR = str(Path(__file__).resolve().parent.parent.joinpath(LOG_DIR))
 FULL_LOG_FILE = str(Path(FULL_LOG_DIR).joinpath(LOG_FILE))
+RECORD_DIR = "recordings"
+FULL_RECORD_DIR = str(Path(FULL_LOG_DIR).joinpath(RECORD_DIR))
+PROFILE_DIR = "profiles"
+FULL_PROFILE_DIR = str(Path(FULL_LOG_DIR).joinpath(PROFILE_DIR))
+MEMORY_DIR = "memory"
+FULL_MEMORY_DIR = str(Path(FULL_LOG_DIR).joinpath(MEMORY_DIR))
+BLACKBOX_DIR = "blackbox"
+FULL_BLACKBOX_DIR = str(Path(FULL_LOG_DIR).joinpath(BLACKBOX_DIR))
+FRAMES_DIR = "frames"
+FULL_FRAMES_DIR = str(Path(FULL_LOG_DIR).joinpath(FRAMES_DIR))
 
 
 def add(ap):
@@ -96,6 +108,51 @@ def add(ap):
     ap.add_argument("-modes", "--displaymodes", required=False,
                     help="Select display modes that you want to see ""R=radar T=timer A=ahrs D=display-status "
                          "G=g-meter K=compass V=vsi I=flighttime S=stratux-status C=co-sensor "
-                         "M=distance measurement L=checklist  Example: -modes RADCM", default="RTAGKVICMDSL")
+                         "M=distance measurement L=checklist P=performance  Example: -modes RADCM", default="RTAGKVICMDSL")
     ap.add_argument("-log", "--logfile", required=False, help=f"Output log to logfile {FULL_LOG_FILE}",
-                    action="store_true", default=False)
\ No newline at end of file
+                    action="store_true", default=False)
+    ap.add_argument("-vp", "--virtualpanel", required=False,
+                    help="Panel emulated by display device 'Virtual', e.g. Epaper_3in7 or ST7789", default="Epaper_3in7")
+    ap.add_argument("-vdump", "--virtualdump", required=False, help="Directory to dump frames of virtual display",
+                    default=None)
+    ap.add_argument("-vraw", "--virtualraw", required=False, help="Dump virtual display frames raw instead of png",
+                    action="store_true", default=False)
+    ap.add_argument("-vlat", "--virtuallatency", type=float, required=False,
+                    help="Refresh latency of virtual display in seconds (default: latency of panel)", default=None)
+    ap.add_argument("-rec", "--record", required=False, help=f"Record stratux messages to {FULL_RECORD_DIR}",
+                    action="store_true", default=False)
+    ap.add_argument("-replay", "--replay", required=False, help="Replay recorded stratux messages from file",
+                    default=None)
+    ap.add_argument("-rspeed", "--replayspeed", type=float, required=False,
+                    help="Replay speed factor, 0 for as fast as possible", default=1.0)
+    ap.add_argument("-roffset", "--replayoffset", type=float, required=False,
+                    help="Start replay at offset in seconds from begin of recording", default=0.0)
+    ap.add_argument("-latency", "--latency", required=False,
+                    help="Measure message and ground sensor sample to display and audio latency, "
+                         "summary is logged at termination",
+                    action="store_true", default=False)
+    ap.add_argument("-metrics", "--metrics", type=int, required=False,
+                    help="Port for local metrics endpoint /metrics (prometheus) and /metrics.json, 0 is off",
+                    default=0)
+    ap.add_argument("-stall", "--stallthreshold", type=float, required=False,
+                    help="Threshold in seconds to report a callback blocking the asyncio loop", default=0.25)
+    ap.add_argument("-profile", "--profile", type=float, required=False,
+                    help=f"Profile the first seconds after start, SIGUSR1 profiles at runtime, result in "
+                         f"{FULL_PROFILE_DIR}", default=0.0)
+    ap.add_argument("-profint", "--profileinterval", type=float, required=False,
+                    help="Sampling interval of the profiler in ms", default=10.0)
+    ap.add_argument("-memwatch", "--memwatch", type=float, required=False,
+                    help=f"Interval in seconds for tracemalloc memory reports to {FULL_MEMORY_DIR}, 0 is off",
+                    default=0.0)
+    ap.add_argument("-bbox", "--blackbox", type=int, required=False,
+                    help=f"Number of messages kept for black box dumps to {FULL_BLACKBOX_DIR} on crash or SIGUSR2",
+                    default=2000)
+    ap.add_argument("-frames", "--frames", type=int, required=False,
+                    help=f"Number of last display frames dumped with the black box to {FULL_FRAMES_DIR}, 0 is off",
+                    default=0)
+    ap.add_argument("-gdport", "--groundport", required=False, help="Serial port of ground distance sensor",
+                    default="/dev/ttyAMA0")
+    ap.add_argument("-gdrate", "--groundrate", type=float, required=False,
+                    help="Filtered ground distances published per second", default=10.0)
+    ap.add_argument("-simfile", "--simulationfile", required=False,
+                    help="Simulation data or timeline file for simulation mode", default="simulation_data.json")
\ No newline at end of file
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Black box: ring buffer of the last raw messages of /radar, /situation and /status and of user interface events.
+# Recording only stores references into preallocated lists, no formatting or copying of the messages.
+# Other dumps (e.g. the frame ring) can be added with add_dump().
+# Dumped on an uncaught exception, on SIGUSR2 or on request of the web app (which sends SIGUSR2)
+# in the recording format of recorder.py, so a dump can be replayed with radar.py -replay <file>.
+
+import re
+import sys
+import time
+import threading
+from pathlib import Path
+from globals import rlog
+import recorder
+
+# constants
+BLACKBOX_SIZE = 2000   # default number of entries, about 2 minutes of traffic and situation
+HANDLER_IDS = {handler: recorder.STREAMS.index(stream) for handler, stream in recorder.HANDLER_STREAMS.items()}
+UI_ID = recorder.STREAMS.index('ui')
+
+# globals
+size = BLACKBOX_SIZE
+times = [0.0] * size
+streams = [0] * size
+messages = [None] * size
+position = 0   # number of entries ever recorded, position % size is the next slot
+dump_dir = None
+dump_lock = threading.Lock()
+dump_functions = []   # further dumps done together with the black box, called with reason
+
+
+def init(directory, entries=BLACKBOX_SIZE):
+    global size
+    global times
+    global streams
+    global messages
+    global position
+    global dump_dir
+
+    dump_dir = Path(directory)
+    size = max(1, entries)
+    times = [0.0] * size
+    streams = [0] * size
+    messages = [None] * size
+    position = 0
+    previous_hook = threading.excepthook
+
+    def thread_excepthook(hook_args):   # uncaught exceptions in sound, sensor or flask threads
+        dump('crash-' + hook_args.thread.name if hook_args.thread else 'crash')
+        previous_hook(hook_args)
+
+    threading.excepthook = thread_excepthook
+    rlog.debug(f"BlackBox: Recording last {size} messages, dumps to {dump_dir}")
+
+
+def add_dump(fn):
+    if fn not in dump_functions:
+        dump_functions.append(fn)
+
+
+def record(handler_name, message):   # called for every message received in listen_forever
+    global position
+
+    i = position % size
+    times[i] = time.time()
+    streams[i] = HANDLER_IDS.get(handler_name, UI_ID)
+    messages[i] = message
+    position += 1
+
+
+def event(text):   # user interface events, e.g. button presses and mode changes
+    global position
+
+    i = position % size
+    times[i] = time.time()
+    streams[i] = UI_ID
+    messages[i] = text
+    position += 1
+
+
+def entries():   # recorded entries from oldest to newest as (timestamp, stream id, message)
+    end = position
+    start = max(0, end - size)
+    result = []
+    for n in range(start, end):
+        i = n % size
+        if messages[i] is not None:
+            result.append((times[i], streams[i], messages[i]))
+    return result
+
+
+def dump(reason):
+    if dump_dir is None:
+        return None
+    reason = re.sub(r'[^\w.-]', '_', reason, flags=re.ASCII)   # e.g. thread names, file names must survive the web app
+    for fn in dump_functions:
+        fn(reason)
+    with dump_lock:
+        records = entries()
+        if not records:
+            rlog.debug("BlackBox: Nothing recorded, no dump")
+            return None
+        filename = dump_dir.joinpath(time.strftime(f"blackbox-%Y%m%d-%H%M%S-{reason}.srec"))
+        try:
+            recorder.write_recording(filename, records)
+        except (OSError, IOError) as e:
+            rlog.debug(f"BlackBox: Error {e} writing dump {filename}")
+            return None
+    rlog.debug(f"BlackBox: {len(records)} entries dumped to {filename}")
+    return filename
+
+
+def trigger(*args):   # signal handler for SIGUSR2
+    dump('signal')
+
+
+if __name__ == "__main__":
+    # prints a dump, including user interface events
+    if len(sys.argv) < 2:
+        print("Usage: python3 blackbox.py <dump>")
+        sys.exit(1)
+    for r_ts, r_stream, r_message in recorder.read_records(sys.argv[1]):
+        print(f"{time.strftime('%H:%M:%S', time.gmtime(r_ts))}.{int(r_ts * 1000) % 1000:03d} {r_stream:<9} "
+              f"{r_message}")
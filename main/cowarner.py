@@ -36,12 +36,17 @@ import math
 import radarbuttons
 import ADS1x15       # https://github.com/chandrawi/ADS1x15-ADC
 import time
+import random
 import asyncio
+import threading
+from pathlib import Path
 import statusui
 import radarbluez
 from RPi import GPIO
 import numpy
 import radarmodes
+import metrics
+from timeseries import TimeSeries
 from globals import rlog, global_config, Modes
 
 
@@ -58,11 +63,19 @@ SENSOR_VOLTAGE = 5.0   # voltage for sensor board and divider
 CO_MEASUREMENT_WINDOW = 60 * 60   # one hour, sliding window that is stored for display of ppm values
 CALIBRATION_TIME = 15   # time for calibration of sensor
 MIN_SENSOR_READ_TIME = 3
-# minimal time in secs when sensor reading thread  is generally started
-MIN_SENSOR_WAIT_TIME = 0.01
-# minimal time in secs to wait when sensor is not yet ready
-MIN_SENSOR_CALIBRATION_WAIT_TIME = 0.5
-# minimal time in secs to wait during calibration and two sensor readings
+# time in secs between two reported values, each value is the filtered mean of OVERSAMPLES conversions
+OVERSAMPLES = 32   # conversions per reported value, read by acquisition thread with ADS in continuous mode
+QUEUED_VALUES = 10   # max reported values waiting for the event loop, oldest is dropped
+ACQUISITION_BACKOFF = 5   # secs to wait before acquisition restarts after an unexpected error
+SIM_PERIOD = 750 * MIN_SENSOR_READ_TIME   # simulation: secs for ppm sawtooth from 0 to SIM_MAX_PPM
+SIM_MAX_PPM = 150
+SIM_NOISE = 0.03   # simulation: relative gaussian noise of a conversion
+HISTORY_MAGIC = 0x31484F43   # "COH1", file with co history, see CoHistory
+HISTORY_HEADER = numpy.dtype([('magic', '<u4'), ('capacity', '<u4'), ('head', '<u4'), ('count', '<u4'),
+                              ('timestamp', '<f8'), ('r0', '<f8'), ('co_max', '<i4')])
+HISTORY_HEADER_SIZE = 64   # bytes reserved for header, values start here
+R0_TOLERANCE = 0.01   # relative difference of R0, above that stored history was calculated with another calibration
+SIM_SPIKE_RATE = 0.02   # simulation: probability of a spike (e.g. i2c or supply glitch) in a conversion
 IOPIN = 16   # GPIO16 for indication of co warning, high on alarm (physical #36, connect to ground #34)
 INDICATION_TEST_TIME = 1   # time during startup when indication will be switched on for test
 
@@ -76,6 +89,103 @@ WARNLEVEL = (   # ppmvalue, time after level is reached, alarmstring, time betwe
 )
 
 
+
+
+class CoHistory(TimeSeries):
+    # history of ppm values with running sums for the alarm windows, every level is checked in O(1)
+    # If a path is given, the ring is memory mapped to this file and survives restarts and reboots.
+    # Values are written in place, then header (write index, count, timestamp, R0, max) is updated and synced.
+    def __init__(self, capacity, windows, path=None):
+        capacity = max(capacity, max(windows))
+        self.mapped = None
+        self.header = None
+        buffer = None
+        if path is not None:
+            try:
+                self.mapped = self.map_file(path, capacity)
+                self.header = self.mapped[:HISTORY_HEADER.itemsize].view(HISTORY_HEADER)
+                buffer = self.mapped[HISTORY_HEADER_SIZE:].view('<i4')
+            except (OSError, IOError, ValueError) as e:
+                rlog.debug(f"CO-Warner: Error mapping history file {path}: {e}, history not persisted")
+                self.mapped = None
+                self.header = None
+        super().__init__(capacity, buffer=buffer)
+        self.windows = windows   # number of values for each alarm level
+        self.sums = [0] * len(windows)
+
+    @staticmethod
+    def map_file(path, capacity):
+        size = HISTORY_HEADER_SIZE + 2 * capacity * 4
+        path = Path(path)
+        if not path.exists() or path.stat().st_size != size:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(bytes(size))
+        return numpy.memmap(path, dtype=numpy.uint8, mode='r+', shape=(size,))
+
+    def restore(self, window_time, now, r0_value):   # restores values still inside window, returns stored co_max
+        if self.header is None:
+            return None
+        h = self.header[0]
+        elapsed = now - float(h['timestamp'])
+        if h['magic'] != HISTORY_MAGIC or h['capacity'] != self.capacity or h['count'] > self.capacity \
+                or h['head'] >= self.capacity or elapsed < 0 or elapsed >= window_time:
+            self.save(0, r0_value)   # initializes header
+            return None
+        if abs(float(h['r0']) - r0_value) > R0_TOLERANCE * r0_value:   # values were calculated with another R0
+            rlog.debug(f"CO-Warner: history was measured with R0 {float(h['r0']):.1f} Ohms, not restored")
+            self.save(0, r0_value)
+            return None
+        start = int(h['head']) - int(h['count']) + self.capacity
+        stored = numpy.array(self.buffer[start:start + int(h['count'])])   # copy, buffer is rewritten below
+        gap = min(self.capacity, round(elapsed / window_time * self.capacity))   # values missed while not running
+        keep = max(0, min(len(stored), self.capacity - gap))
+        co_max_stored = int(h['co_max'])
+        header = self.header
+        self.header = None   # no sync for every restored value
+        self.clear()
+        for value in stored[len(stored) - keep:]:
+            self.append(int(value))
+        for _ in range(gap):   # time without measurement counts as 0 ppm, old values keep their real age
+            self.append(0)
+        self.header = header
+        self.save(co_max_stored, r0_value)
+        rlog.debug(f"CO-Warner: restored {keep} values of history, last value {elapsed:.0f} secs ago")
+        return co_max_stored
+
+    def save(self, co_max_value, r0_value):   # header update in place, called after every value
+        if self.header is None:
+            return
+        self.header['magic'] = HISTORY_MAGIC
+        self.header['capacity'] = self.capacity
+        self.header['head'] = self.head
+        self.header['count'] = self.count
+        self.header['timestamp'] = time.time()
+        self.header['r0'] = r0_value
+        self.header['co_max'] = co_max_value
+        try:
+            self.mapped.flush()   # small file, synced once per value to survive power loss
+        except (OSError, ValueError) as e:
+            rlog.debug(f"CO-Warner: Error syncing history file: {e}")
+
+    def append(self, value):
+        for k, window in enumerate(self.windows):
+            if 0 < window <= self.count:   # remove value leaving the window
+                self.sums[k] -= int(self.buffer[self.head + self.capacity - window])
+            self.sums[k] += value
+        super().append(value)
+
+    def average(self, k):   # average of window k, None if less values available
+        window = self.windows[k]
+        if window == 0 or self.count < window:
+            return None
+        return self.sums[k] / window
+
+    def clear(self):
+        super().clear()
+        self.sums = [0] * len(self.windows)
+
+
 # globals
 alarmlevel = 0   # see above level for warnlevel 0-5
 # time when this alarmlevel was first reached or underrun
@@ -84,7 +194,8 @@ cowarner_active = False
 voltage_factor = 1.0
 ADS = None
 value_debug_level = 0   # debug level for printing ad-values
-co_values = []    # all values are here in ppm, maximum
+co_values = CoHistory(math.floor(CO_MEASUREMENT_WINDOW / MIN_SENSOR_READ_TIME),
+                      [math.floor(w[1] / MIN_SENSOR_READ_TIME) for w in WARNLEVEL])   # values in ppm
 co_max = 0      # max value read during this run or after reset
 co_warner_status = 0     # 0 - normal status  1 - calibration in progress  2 - calibration done
 calibration_end = 0.0     # timer for calibration
@@ -98,7 +209,7 @@ indicate_co_warning = False    # GPIO 16 indication
 last_warning = 0.0   # timestamp of last warning
 # simulation mode
 co_simulation = False
-simvalue = 0.0
+acquisition_stop = threading.Event()   # stops the acquisition thread
 
 
 def ppm(rsr0):
@@ -114,7 +225,56 @@ def ppm(rsr0):
     # based on own measurements compared with a CO warner
 
 
-def init(activate, config, debug_level, co_indication, simulation_mode=False, co_i2c_0=False):
+def rsr0_for_ppm(ppm_value):   # inverse of ppm(), used by the simulated AD converter
+    if ppm_value < 5:
+        return RSR0_CLEAN
+    return 10 ** (0.9 - 0.75 * math.log10(ppm_value))
+
+
+class SimulatedADS1115:
+    # same interface as ADS1x15.ADS1115, delivers conversions of a sensor with noise and spikes
+    MODE_CONTINUOUS = 0
+    MODE_SINGLE = 1
+    PGA_4_096V = 1
+    DR_ADS111X_128 = 4
+
+    def __init__(self, sensor_r0):
+        self.sensor_r0 = sensor_r0
+        self.start = time.monotonic()
+
+    def setMode(self, mode):   # noqa: N802
+        pass
+
+    def setGain(self, gain):   # noqa: N802
+        pass
+
+    def setDataRate(self, rate):   # noqa: N802
+        pass
+
+    @staticmethod
+    def toVoltage():   # noqa: N802
+        return 4.096 / 32767
+
+    def requestADC(self, pin):   # noqa: N802
+        pass
+
+    @staticmethod
+    def isReady():   # noqa: N802
+        return True
+
+    def ppm_at(self, t):   # sawtooth from 0 to SIM_MAX_PPM, to run through all alarm levels
+        return SIM_MAX_PPM * ((t / SIM_PERIOD) % 1.0)
+
+    def getValue(self):   # noqa: N802
+        rs_gas = rsr0_for_ppm(self.ppm_at(time.monotonic() - self.start)) * self.sensor_r0
+        sensor_volt = SENSOR_VOLTAGE * R_DIVIDER / (rs_gas + R_DIVIDER)
+        sensor_volt *= random.gauss(1.0, SIM_NOISE)
+        if random.random() < SIM_SPIKE_RATE:
+            sensor_volt *= random.choice((0.5, 2.0))
+        return max(1, min(32767, round(sensor_volt / self.toVoltage())))
+
+
+def init(activate, config, debug_level, co_indication, simulation_mode=False, co_i2c_0=False, history_file=None):
     global cowarner_active
     global voltage_factor
     global ADS
@@ -125,6 +285,8 @@ def init(activate, config, debug_level, co_indication, simulation_mode=False, co
     global indicate_co_warning
     global co_simulation
     global co_warner_activated
+    global co_values
+    global co_max
 
     if not activate and not simulation_mode:
         rlog.debug("CO-Warner - not activated")
@@ -153,14 +315,23 @@ def init(activate, config, debug_level, co_indication, simulation_mode=False, co
             return False
             
         # set gain to 4.096V max
-        ADS.setMode(ADS.MODE_SINGLE)  # Single shot mode
+        ADS.setMode(ADS.MODE_SINGLE)  # Single shot mode until acquisition thread starts continuous mode
         ADS.setGain(ADS.PGA_4_096V)
         voltage_factor = ADS.toVoltage()
         rlog.debug("CO-Warner: AD converter active.")
     else:
-        rlog.debug("CO-Warner: simulation mode active.")
+        ADS = SimulatedADS1115(r0)
+        voltage_factor = ADS.toVoltage()
+        rlog.debug("CO-Warner: simulation mode active, simulated AD converter.")
         co_simulation = True
         
+    if history_file is not None and simulation_mode:
+        history_file = str(history_file) + '.sim'   # keep simulated values apart from real measurements
+    co_values = CoHistory(co_max_values, [math.floor(w[1] / MIN_SENSOR_READ_TIME) for w in WARNLEVEL],
+                          history_file)
+    restored = co_values.restore(CO_MEASUREMENT_WINDOW, time.time(), r0)
+    if restored is not None:
+        co_max = max(co_max, restored)
     cowarner_active = True
     co_warner_activated = True
     
@@ -173,12 +344,45 @@ def init(activate, config, debug_level, co_indication, simulation_mode=False, co
     return cowarner_active
 
 
-def request_read():
-    return ADS.requestADC(0)  # analog 0 input
+def filtered_mean(samples):   # mean of the middle half of the samples, removes spikes
+    samples = sorted(samples)
+    quarter = len(samples) // 4
+    middle = samples[quarter:len(samples) - quarter]
+    return sum(middle) / len(middle)
+
+
+def publish(queue, value):   # called in event loop, drops oldest value if loop could not keep up
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(value)
 
 
-def ready():
-    return ADS.isReady()
+def acquire(loop, queue):   # acquisition thread, all i2c access is done here and not on the event loop
+    interval = MIN_SENSOR_READ_TIME / OVERSAMPLES
+    samples = []
+    converting = False
+    next_read = time.monotonic()
+    while not acquisition_stop.is_set():
+        try:
+            if not converting:
+                ADS.setMode(ADS.MODE_CONTINUOUS)
+                ADS.setDataRate(ADS.DR_ADS111X_128)
+                ADS.requestADC(0)  # analog 0 input, starts continuous conversion
+                converting = True
+            samples.append(ADS.getValue())
+            if len(samples) >= OVERSAMPLES:
+                loop.call_soon_threadsafe(publish, queue, filtered_mean(samples))
+                samples = []
+        except OSError as e:
+            rlog.debug(f"CO-Warner: Error reading AD converter: {e}")
+        except Exception as e:   # thread must not end, co values and alarm would stop without notice
+            rlog.debug(f"CO-Warner: Unexpected error in acquisition, restarting in {ACQUISITION_BACKOFF} secs: {e!r}")
+            samples = []
+            converting = False
+            next_read = time.monotonic() + ACQUISITION_BACKOFF
+        next_read += interval
+        acquisition_stop.wait(max(0.0, next_read - time.monotonic()))
+    rlog.debug("CO-Warner: acquisition thread terminating ...")
 
 
 def alarm_level():   # to be called from outside, returns 0 if no alarm, 1-5 depending on ALARMLEVEL and alarmstring
@@ -189,10 +393,9 @@ def check_alarm_level():   # check wether new alarm level should be reached, cal
     global alarmlevel
 
     for i in range(len(WARNLEVEL)-1, 0, -1):    # check all warnleves starting high e.g. (50, 3*30, "No CO alarm", None)
-        num_values = math.floor(WARNLEVEL[i][1] / MIN_SENSOR_READ_TIME)   # number of values to take into account
-        if len(co_values) >= num_values:   # if less values available, do not alarm
-            average = numpy.average(co_values[len(co_values)-num_values: len(co_values)])
-            # print("Average " + str(WARNLEVEL[i]) + ": " + str(num_values) + " values " + str(average) + " ppm")
+        average = co_values.average(i)   # running average over the window of this level
+        if average is not None:   # if less values available, do not alarm
+            # print("Average " + str(WARNLEVEL[i]) + ": " + str(average) + " ppm")
             if average >= WARNLEVEL[i][0]:
                 if alarmlevel != i:
                     alarmlevel = i
@@ -205,41 +408,25 @@ def check_alarm_level():   # check wether new alarm level should be reached, cal
     return False
 
 
-def read_co_value():     # called by sensor_read thread
+def read_co_value(value):     # called by sensor reader with filtered value of the AD converter
     global cowarner_changed
     global co_values
     global co_max
 
     cowarner_changed = True  # to display new value
-    value = ADS.getValue()
+    metrics.sensor_reads.inc('co')
     sensor_volt = value * voltage_factor
     rs_gas = ((SENSOR_VOLTAGE * R_DIVIDER) / sensor_volt) - R_DIVIDER  # calculate resistor of sensor
     ppm_value = round(ppm(rs_gas / r0))
     rlog.log(value_debug_level,
-             "C0-Warner: Analog0: {0:5d}  {1:.3f} V  RS_gas: {2:5.3f} kOhms   RS_gas/R0: {3:3.3f}    PPM value: {4:d}"
+             "C0-Warner: Analog0: {0:7.1f}  {1:.3f} V  RS_gas: {2:5.3f} kOhms   RS_gas/R0: {3:3.3f}    PPM value: {4:d}"
              .format(value, sensor_volt, rs_gas/1000, rs_gas/r0, ppm_value))
     # print("C0-Warner: Analog0: {0:5d}  {1:2.3f} V    RS_gas: {2:5.3f} kOhms
     # RS_gas/R0: {3:3.3f}  PPM value: {4:d}".format(value, sensor_volt, rs_gas/1000, rs_gas / r0, ppm_value))
     if ppm_value > co_max:
         co_max = ppm_value
-    co_values.append(ppm_value)
-    if len(co_values) > co_max_values:    # sliding window, remove the oldest values
-        co_values.pop(0)
-    return check_alarm_level()
-
-
-def read_co_value_simulated():
-    global simvalue
-    global cowarner_changed
-    global co_values
-    global co_max
-
-    cowarner_changed = True  # to display new value
-    simvalue = 0 if simvalue > 150.0 else simvalue + 0.2
-    co_max = round(max(co_max, simvalue))
-    co_values.append(round(simvalue))
-    if len(co_values) > co_max_values:
-        co_values.pop(0)
+    co_values.append(ppm_value)   # sliding window, oldest value is overwritten
+    co_values.save(co_max, r0)
     return check_alarm_level()
 
 
@@ -262,7 +449,7 @@ def draw_cowarner(display_control, changed):
         display_control.display()
 
 
-def calibration():   # called by co-reader thread, performs calibration and ends calibration mode
+def calibration(value):   # called by co-reader with filtered ad value, performs calibration and ends calibration mode
     global co_warner_status
     global sample_sum
     global no_samples
@@ -273,7 +460,6 @@ def calibration():   # called by co-reader thread, performs calibration and ends
     countdown = calibration_end - math.floor(time.time())
     if not co_simulation:
         if countdown > 0:   # continue sensor reading
-            value = ADS.getValue()
             sensor_volt = value * voltage_factor
             rs_air = ((SENSOR_VOLTAGE * R_DIVIDER) / sensor_volt) - R_DIVIDER  # calculate RS in fresh air
             r0_act = rs_air / RSR0_CLEAN  # r0, based on clean air measurement
@@ -325,6 +511,7 @@ def user_input():
     if button == 2 and btime == 1:  # right and short, reset max value
         co_max = 0
         co_values.clear()  # clear all history
+        co_values.save(co_max, r0)
     if button == 2 and btime == 2:  # right and long: refresh
         return Modes.REFRESH_CO_WARNER  # start next mode for display driver: refresh called
     return Modes.COWARNER  # no mode change
@@ -357,25 +544,21 @@ async def read_sensors():
                 GPIO.output(IOPIN, GPIO.HIGH)
                 await asyncio.sleep(INDICATION_TEST_TIME)
                 GPIO.output(IOPIN, GPIO.LOW)
+            values = asyncio.Queue(maxsize=QUEUED_VALUES)
+            acquisition_stop.clear()
+            acquisition_thread = threading.Thread(target=acquire, args=(asyncio.get_running_loop(), values),
+                                                  daemon=True)
+            acquisition_thread.start()
             while True:
+                value = await values.get()   # filtered value every MIN_SENSOR_READ_TIME, no i2c polling here
                 if co_warner_status == 0:   # normal read
-                    if not co_simulation:
-                        request_read()
-                        while not ready():
-                            await asyncio.sleep(MIN_SENSOR_WAIT_TIME)
-                        changed = read_co_value()
-                        speak_co_warning(changed)
-                        set_co_indication(changed)
-                        await asyncio.sleep(MIN_SENSOR_READ_TIME)
-                    else: # simulation mode
-                        changed = read_co_value_simulated()
-                        speak_co_warning(changed)
-                        set_co_indication(changed)
-                        await asyncio.sleep(MIN_SENSOR_READ_TIME)
+                    changed = read_co_value(value)
+                    speak_co_warning(changed)
+                    set_co_indication(changed)
                 else:  # calibration mode
-                    calibration()
-                    await asyncio.sleep(MIN_SENSOR_CALIBRATION_WAIT_TIME)
+                    calibration(value)
         except (asyncio.CancelledError, RuntimeError):
+            acquisition_stop.set()
             rlog.debug("CO sensor reader terminating ...")
     else:
         rlog.debug("No co-sensor active.")
@@ -101,8 +101,11 @@ class Epaper1in54(dcommon.GenericDisplay):
             self.AHRS_HORIZON_COLOR = "black"
             self.AHRS_MARKS_COLOR = "black"
 
+    def open_device(self):
+        return epd1in54_V2.EPD()
+
     def init(self, fullcircle=False, dark_mode=False):
-        self.device = epd1in54_V2.EPD()
+        self.device = self.open_device()
         self.device.init(0)
         self.device.Clear(0xFF)  # necessary to overwrite everything
         self.image = Image.new('1', (self.device.height, self.device.width), 0xFF)
@@ -290,6 +293,13 @@ class Epaper1in54(dcommon.GenericDisplay):
             self.round_text(3*self.VERYSMALL-4, self.sizey//4+4, "simulation mode", out_color=self.TEXT_COLOR)
         self.bottom_line("Cal", "Mode", "Reset")
 
+    def perf(self, display_lines, system_lines, side_offset=0):
+        # small screen, one list with the most important values instead of two dashboards side by side
+        self.centered_text(0, "Performance", self.SMALL)
+        lines = list(display_lines) + [line for line in system_lines if line[0] in ("Traffic", "CPU", "RSS")]
+        self.dashboard(0, self.SMALL, self.sizex, lines)
+        self.bottom_line("", "Mode", "Reset")
+
     def distance(self, now, gps_valid, gps_quality, gps_h_accuracy, distance_valid, gps_distance, gps_speed, baro_valid,
                          own_altitude, alt_diff, alt_diff_takeoff, vert_speed, ahrs_valid, ahrs_pitch, ahrs_roll,
                          ground_distance_valid, grounddistance, error_message):
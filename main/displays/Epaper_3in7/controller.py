@@ -106,8 +106,11 @@ class Epaper3in7(dcommon.GenericDisplay):
             self.AHRS_HORIZON_COLOR = "black"
             self.AHRS_MARKS_COLOR = "black"
 
+    def open_device(self):
+        return epd3in7.EPD()
+
     def init(self, fullcircle=False, dark_mode=False):
-        self.device = epd3in7.EPD()
+        self.device = self.open_device()
         self.device.init(0)
         self.device.Clear(0xFF, 0)  # necessary to overwrite everything
         self.image = Image.new('1', (self.device.height, self.device.width), 0xFF)
@@ -332,7 +335,7 @@ class Epaper3in7(dcommon.GenericDisplay):
         lines = [
             ("Warnlevel:", f"{alarmlevel:3d}"),
             ("",""),
-            ("CO act:", f"{co_values[-1]:3d}") if co_values else ("CO act:", "---"),
+            ("CO act:", f"{co_values[-1]:3d}") if len(co_values) > 0 else ("CO act:", "---"),
             ("CO max:", f"{co_max:3d}"),
             ("", ""),
             ("", ""),
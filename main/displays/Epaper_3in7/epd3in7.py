@@ -53,6 +53,8 @@ class EPD:
         self.GRAY3  = GRAY3 #gray
         self.GRAY4  = GRAY4 #Blackest
         self.image_0xff = Image.new('1', (self.height, self.width), 0xFF)
+        if hasattr(epdconfig, 'register_luts'):   # fake hardware, name waveforms by lut
+            epdconfig.register_luts(self)
 
     lut_4Gray_GC = [
         0x2A,0x06,0x15,0x00,0x00,0x00,0x00,0x00,0x00,0x00,
@@ -109,8 +109,11 @@ class Epaper3in7_Round(dcommon.GenericDisplay):
             self.AHRS_HORIZON_COLOR = "black"
             self.AHRS_MARKS_COLOR = "black"
 
+    def open_device(self):
+        return epd3in7.EPD()
+
     def init(self, fullcircle=False, dark_mode=False):
-        self.device = epd3in7.EPD()
+        self.device = self.open_device()
         self.device.init(0)
         self.device.Clear(0xFF, 0)  # necessary to overwrite everything
         # Initialize dark mode before creating the image
@@ -345,7 +348,7 @@ class Epaper3in7_Round(dcommon.GenericDisplay):
         lines = [
             ("Warnlevel:", f"{alarmlevel:3d}"),
             ("",""),
-            ("CO act:", f"{co_values[-1]:3d}") if co_values else ("CO act:", "---"),
+            ("CO act:", f"{co_values[-1]:3d}") if len(co_values) > 0 else ("CO act:", "---"),
             ("CO max:", f"{co_max:3d}"),
             ("", ""),
             ("", ""),
@@ -357,6 +360,10 @@ class Epaper3in7_Round(dcommon.GenericDisplay):
         if simulation_mode:
             self.round_text(self.sizex//4, self.sizey//3, "simulation mode", out_color=self.TEXT_COLOR)
         self.bottom_line("Calibrate", "Mode", "Reset")
+
+    def perf(self, display_lines, system_lines, side_offset=30):
+        super().perf(display_lines, system_lines, side_offset=side_offset)
+
     def distance(self, now, gps_valid, gps_quality, gps_h_accuracy, distance_valid, gps_distance, gps_speed, baro_valid,
                          own_altitude, alt_diff, alt_diff_takeoff, vert_speed, ahrs_valid, ahrs_pitch, ahrs_roll,
                          ground_distance_valid, grounddistance, error_message):
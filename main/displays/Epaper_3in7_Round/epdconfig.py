@@ -34,6 +34,7 @@ import time
 import subprocess
 
 from ctypes import *
+from .. import fakehw
 
 logger = logging.getLogger(__name__)
 
@@ -161,7 +162,10 @@ class RaspberryPi:
             self.GPIO_BUSY_PIN.close()
 
 
-implementation = RaspberryPi()
+if fakehw.FAKE_HARDWARE:
+    implementation = fakehw.FakeEpaperHardware()   # recording fake for development and benchmarks
+else:
+    implementation = RaspberryPi()
 
 for func in [x for x in dir(implementation) if not x.startswith('_')]:
     setattr(sys.modules[__name__], func, getattr(implementation, func))
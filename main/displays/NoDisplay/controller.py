@@ -78,5 +78,8 @@ class NoDisplay(dcommon.GenericDisplay):
     def text_screen(self, headline, subline, text, left_text, middle_text, r_text, offset=0):
         pass
 
+    def perf(self, display_lines, system_lines, side_offset=0):
+        pass
+
 # instantiate a single object in the file, needs to be done and inherited in every display module
 radar_display = NoDisplay()
@@ -65,9 +65,12 @@ class Oled1in5(dcommon.GenericDisplay):
         self.mask = None
         self.dark_mode = False
 
-    def init(self, fullcircle=False, dark_mode=False):   # dark mode without effect in Oled display
+    def open_device(self):
         config_path = str(Path(__file__).resolve().parent.joinpath('ssd1351.conf'))
-        self.device = radar_opts.get_device(['-f', config_path])
+        return radar_opts.get_device(['-f', config_path])
+
+    def init(self, fullcircle=False, dark_mode=False):   # dark mode without effect in Oled display
+        self.device = self.open_device()
         self.device.contrast(255)  # set full contrast
         self.image = Image.new(self.device.mode, self.device.size)
         self.draw = ImageDraw.Draw(self.image)
@@ -307,6 +310,13 @@ class Oled1in5(dcommon.GenericDisplay):
             self.round_text(3 * self.VERYSMALL - 4, self.sizey // 4 + 4, "simulation mode", out_color=self.TEXT_COLOR)
         self.bottom_line("Cal", "Mode", "Reset")
 
+    def perf(self, display_lines, system_lines, side_offset=0):
+        # small screen, one list with the most important values instead of two dashboards side by side
+        self.centered_text(0, "Performance", self.SMALL)
+        lines = list(display_lines) + [line for line in system_lines if line[0] in ("Traffic", "CPU", "RSS")]
+        self.dashboard(0, self.SMALL, self.sizex, lines)
+        self.bottom_line("", "Mode", "Reset")
+
     def distance(self, now, gps_valid, gps_quality, gps_h_accuracy, distance_valid, gps_distance, gps_speed, baro_valid,
                  own_altitude, alt_diff, alt_diff_takeoff, vert_speed, ahrs_valid, ahrs_pitch, ahrs_roll,
                  ground_distance_valid, grounddistance, error_message):
@@ -66,9 +66,12 @@ class ST7789(dcommon.GenericDisplay):
         self.mask = None
         self.dark_mode = False
 
-    def init(self, fullcircle=False, dark_mode=False):
+    def open_device(self):
         config_path = str(Path(__file__).resolve().parent.joinpath('st7789.conf'))
-        self.device = radar_opts.get_device(['-f', config_path])
+        return radar_opts.get_device(['-f', config_path])
+
+    def init(self, fullcircle=False, dark_mode=False):
+        self.device = self.open_device()
         self.device.contrast(255)  # set full contrast
         self.image = Image.new(self.device.mode, self.device.size)
         self.draw = ImageDraw.Draw(self.image)
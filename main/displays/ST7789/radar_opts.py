@@ -8,7 +8,9 @@
 import sys
 import logging
 
-from luma.core import cmdline, error
+from .. import fakehw
+if not fakehw.FAKE_HARDWARE:
+    from luma.core import cmdline, error
 
 
 # logging
@@ -51,6 +53,8 @@ def get_device(actual_args):
     """
     if actual_args is None:
         actual_args = sys.argv[1:]
+    if fakehw.FAKE_HARDWARE:
+        return fakehw.luma_device(actual_args)
     parser = cmdline.create_parser(description='luma.examples arguments')
     args = parser.parse_args(actual_args)
 
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Virtual display: runs the drawing code of a real display controller against an in-memory device.
+# Used for development and measurements without display hardware, e.g. "radar.py -d Virtual -vp Epaper_3in7"
+# The fake hardware layer (fakehw) is selected before the real controller is imported, so the drivers do not need
+# spidev, gpiozero or luma.
+
+import os
+import importlib
+import time
+import statistics
+from collections import deque
+from pathlib import Path
+from .. import fakehw
+
+FRAME_STATS = 1000  # number of frames kept for timing statistics
+
+# properties of the emulated panels: size as reported by the driver, image mode, refresh latency in secs,
+# async: panel refreshes in the background and is busy meanwhile (epaper), otherwise display blocks (spi transfer)
+PANELS = {
+    'Epaper_1in54': {'width': 200, 'height': 200, 'mode': '1', 'latency': 0.3, 'async': True},
+    'Epaper_3in7': {'width': 280, 'height': 480, 'mode': '1', 'latency': 0.4, 'async': True},
+    'Epaper_3in7_Round': {'width': 280, 'height': 480, 'mode': '1', 'latency': 0.4, 'async': True},
+    'ST7789': {'width': 320, 'height': 240, 'mode': 'RGB', 'latency': 0.06, 'async': False},
+    'Oled_1in5': {'width': 128, 'height': 128, 'mode': 'RGB', 'latency': 0.02, 'async': False},
+}
+
+
+class VirtualDevice:
+    # provides the device interface of the waveshare epaper drivers and of the luma devices
+    def __init__(self, panel, latency):
+        self.width = panel['width']
+        self.height = panel['height']
+        self.mode = panel['mode']
+        self.size = (self.width, self.height)
+        self.asynchronous = panel['async']
+        self.latency = latency
+        self.busy_until = 0.0
+        self.frame = None   # last buffer or image sent to the device
+
+    def refresh(self, frame, asynchronous):
+        self.frame = frame
+        if asynchronous:
+            self.busy_until = time.monotonic() + self.latency
+        else:
+            time.sleep(self.latency)
+
+    # epaper interface
+    def init(self, mode):
+        pass
+
+    def Clear(self, color, mode=0):
+        self.refresh(None, False)
+
+    @staticmethod
+    def getbuffer_optimized(image):
+        # same byte layout as numpy.packbits(numpy.rot90(image)) in the epaper drivers
+        return image.rotate(90, expand=True).tobytes()
+
+    def display_1Gray(self, buf):
+        self.refresh(buf, False)
+
+    def displayPart_mod(self, buf):
+        self.refresh(buf, False)
+
+    def async_display_1Gray(self, buf):
+        self.refresh(buf, True)
+
+    def async_displayPart(self, buf):
+        self.refresh(buf, True)
+
+    def async_is_busy(self):
+        return time.monotonic() < self.busy_until
+
+    def sleep(self):
+        pass
+
+    def sleep_nowait(self):
+        pass
+
+    def Dev_exit(self):
+        pass
+
+    # luma interface
+    def contrast(self, level):
+        pass
+
+    def display(self, image):
+        self.refresh(image.copy(), self.asynchronous)
+
+    def cleanup(self):
+        pass
+
+
+class VirtualDisplay:
+    # mixed into the class of the real controller, replaces the hardware device and measures every frame
+    def setup_virtual(self, panel_name, dump_dir=None, dump_raw=False, latency=None):
+        self.panel_name = panel_name
+        self.panel = PANELS[panel_name]
+        self.latency = self.panel['latency'] if latency is None else latency
+        self.dump_dir = Path(dump_dir) if dump_dir else None
+        self.dump_raw = dump_raw
+        self.frames = 0
+        self.busy_polls = 0
+        self.frame_start = None
+        self.draw_times = deque(maxlen=FRAME_STATS)
+        self.flush_times = deque(maxlen=FRAME_STATS)
+        if self.dump_dir:
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+
+    def open_device(self):
+        return VirtualDevice(self.panel, self.latency)
+
+    def clear(self):
+        self.frame_start = time.perf_counter()
+        super().clear()
+
+    def clear_region(self, box):
+        self.frame_start = time.perf_counter()
+        super().clear_region(box)
+
+    def display(self):
+        start = time.perf_counter()
+        super().display()
+        end = time.perf_counter()
+        if self.frame_start is not None:
+            self.draw_times.append(start - self.frame_start)
+            self.frame_start = None
+        self.flush_times.append(end - start)
+        self.frames += 1
+        if self.dump_dir:
+            self.dump_frame()
+
+    def is_busy(self):
+        busy = super().is_busy()
+        if busy:
+            self.busy_polls += 1
+        return busy
+
+    def dump_frame(self):
+        try:
+            if self.dump_raw:
+                self.dump_dir.joinpath(f'frame_{self.frames:06d}.raw').write_bytes(self.image.tobytes())
+            else:
+                self.image.save(self.dump_dir.joinpath(f'frame_{self.frames:06d}.png'))
+        except (OSError, IOError, ValueError) as e:
+            self.rlog.debug(f'Virtual display: error dumping frame {self.frames}: {e}')
+
+    def framebuffer(self):
+        return self.image.copy()
+
+    @staticmethod
+    def time_stats(values):
+        if not values:
+            return {'mean': 0.0, 'max': 0.0, 'last': 0.0}
+        return {'mean': statistics.fmean(values), 'max': max(values), 'last': values[-1]}
+
+    def frame_stats(self):
+        return {'panel': self.panel_name, 'frames': self.frames, 'busy_polls': self.busy_polls,
+                'draw': self.time_stats(self.draw_times), 'flush': self.time_stats(self.flush_times)}
+
+    def cleanup(self):
+        super().cleanup()
+        st = self.frame_stats()
+        self.rlog.info(f"Virtual display {st['panel']}: {st['frames']} frames, "
+                       f"draw mean {st['draw']['mean'] * 1000:.1f} ms max {st['draw']['max'] * 1000:.1f} ms, "
+                       f"flush mean {st['flush']['mean'] * 1000:.1f} ms max {st['flush']['max'] * 1000:.1f} ms, "
+                       f"busy polls {st['busy_polls']}")
+
+
+def virtual_display(panel_name, dump_dir=None, dump_raw=False, latency=None):
+    # returns an instance of the real controller for panel_name that draws into an in-memory device
+    if panel_name not in PANELS:
+        raise ValueError(f"Virtual display: unknown panel '{panel_name}', use one of {', '.join(PANELS)}")
+    fakehw.FAKE_HARDWARE = True   # read by epdconfig and radar_opts when they are imported
+    os.environ['RADAR_FAKE_HARDWARE'] = '1'   # same for child processes, e.g. of benchmarks
+    real_display = importlib.import_module('..' + panel_name + '.controller', __package__).radar_display
+    cls = type('Virtual' + type(real_display).__name__, (VirtualDisplay, type(real_display)), {})
+    display = cls()
+    display.setup_virtual(panel_name, dump_dir, dump_raw, latency)
+    return display
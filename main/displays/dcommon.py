@@ -36,7 +36,8 @@ import time
 import logging
 import datetime
 from pathlib import Path
-from PIL import ImageFont
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
 
 # helper functions
 def posn(angle, arm_length, angle_offset=0):
@@ -79,6 +80,8 @@ class GenericDisplay:
     ROLL_POSMARKS = (-90, -60, -30, -20, -10, 0, 10, 20, 30, 60, 90)
     PITCH_POSMARKS = (-30, -20, -10, 10, 20, 30)
     PITCH_SCALE = 3.0   # larger displays need larger scaling
+    AHRS_TEXTURE_MODES = ('1',)  # image modes where cropping a cached texture is faster than drawing (epaper)
+    AHRS_ROTATION_CACHE = 8 * 1024 * 1024  # max bytes of rotated textures (one per integer roll angle) kept in memory
     # CO warner specific constants
     GRAPH_SPACE = 3  # space between scale figures and zero line
     GRAPH_X_AXIS_LINE_LENGTH = 5  # line length for values in graph
@@ -128,6 +131,14 @@ class GenericDisplay:
         }
         self.awesomefont = self.make_font("fontawesome-webfont.ttf", self.AWESOME_FONTSIZE)
         self.top_index = 0   # checklist number
+        # ahrs caches, built on first use and rebuilt if size or colors change
+        self.ahrs_cache_key = None
+        self.ahrs_texture = None   # oversized horizon with pitch ladder for roll 0
+        self.ahrs_rotations = OrderedDict()  # rotated horizon textures, key is integer roll angle
+        self.ahrs_rollscale = None   # mask of the roll scale for roll 0
+        self.ahrs_rollscale_rotations = OrderedDict()  # rotated roll scale masks, key is integer roll angle
+        self.ahrs_pointer = None  # mask and position of fixed pointers
+        self.ahrs_max_shift = 0  # maximum pitch shift in pixel, beyond that only sky or earth is visible
 
     def set_dark_mode(self, dark_mode):
         self.dark_mode = dark_mode
@@ -154,6 +165,10 @@ class GenericDisplay:
             self.AHRS_HORIZON_COLOR = "black"
             self.AHRS_MARKS_COLOR = "black"
 
+    def open_device(self):
+        # returns the hardware device, overwritten by every display (and by virtual displays)
+        return None
+
     def init(self, fullcircle=False, dark_mode=False):
         self.set_dark_mode(dark_mode)
         # explicit init to be implemented for every device type
@@ -216,6 +231,10 @@ class GenericDisplay:
     def display(self):
         pass
 
+    def display_region(self, box):
+        # only box has changed, displays without partial update just show everything
+        self.display()
+
     def is_busy(self):
         pass
 
@@ -232,6 +251,9 @@ class GenericDisplay:
     def clear(self):
         self.draw.rectangle((0, 0, self.sizex - 1, self.sizey - 1), fill=self.BG_COLOR)  # clear everything in imagepass
 
+    def clear_region(self, box):
+        self.draw.rectangle(box, fill=self.BG_COLOR)
+
     def cleanup(self):
         pass
 
@@ -443,8 +465,7 @@ class GenericDisplay:
         # does not to be redefined if no filling is to be drawn
         pass
 
-    def ahrs(self, pitch, roll, heading, slipskid, error_message):
-        max_length = math.ceil(math.hypot(self.sizex, self.sizey))  # maximum line length for diagonal line
+    def ahrs_geometry(self):
         line_width = max(1, self.sizey//60)  # the width of all lines (horizon, posmarks, rollmarks)
         pitchmark_length = self.sizey//6
         pitchscale = self.sizey / 6 / 10  # scaling factor for pitchmarks, so that +-20 is displayed
@@ -452,8 +473,92 @@ class GenericDisplay:
         line_width_middle = self.sizey//32  # middle right and left of pointer
         center_pointer_x = self.sizex//8
         center_pointer_y = self.sizey//16
-        # this is the scaling factor for all drawings, 6 means: space for 6 pitch lines from -20, -10, 0, 10, 20
+        return line_width, pitchmark_length, pitchscale, rollmark_length, line_width_middle, center_pointer_x, \
+            center_pointer_y
+
+    def ahrs_prepare(self):
+        # renders horizon texture, roll scale and pointers once, every frame is then only cropped from these
+        line_width, pitchmark_length, pitchscale, rollmark_length, line_width_middle, center_pointer_x, \
+            center_pointer_y = self.ahrs_geometry()
+        mode = self.image.mode
+        # radius of the visible area around the ahrs center, texture must cover it for every roll angle
+        radius = math.ceil(max(math.hypot(x, y) for x in (self.ah_zerox, self.sizex - self.ah_zerox)
+                               for y in (self.ah_zeroy, self.sizey - self.ah_zeroy))) + 1
+        self.ahrs_max_shift = radius + math.ceil(max(abs(pm) for pm in self.PITCH_POSMARKS) * pitchscale) + line_width
+        tex_x = 2 * radius
+        tex_y = 2 * (radius + self.ahrs_max_shift)
+        texture = Image.new(mode, (tex_x, tex_y), self.AHRS_SKY_COLOR)
+        tdraw = ImageDraw.Draw(texture)
+        tdraw.rectangle((0, tex_y // 2, tex_x - 1, tex_y - 1), fill=self.AHRS_EARTH_COLOR)  # earth
+        # draw ladder into the texture with the standard line functions, so derived earthfills still work
+        saved = (self.draw, self.ah_zerox, self.ah_zeroy)
+        self.draw, self.ah_zerox, self.ah_zeroy = tdraw, tex_x // 2, tex_y // 2
+        try:
+            tdraw.line((self.linepoints(0, 0, 0, tex_x, pitchscale)), fill=self.AHRS_HORIZON_COLOR,
+                       width=line_width)  # horizon line
+            self.earthfill(0, 0, tex_x, pitchscale)  # draw some special fillings for the earth
+            for pm in self.PITCH_POSMARKS:  # pitchmarks
+                tdraw.line((self.linepoints(0, 0, pm, pitchmark_length, pitchscale)), fill=self.AHRS_MARKS_COLOR,
+                           width=line_width)
+        finally:
+            self.draw, self.ah_zerox, self.ah_zeroy = saved
+        self.ahrs_texture = texture
+        self.ahrs_rotations.clear()
+        # roll scale, drawn as mask around its center, rotated with roll
+        di = min(self.ah_zerox, self.ah_zeroy)
+        msize = 2 * (di + line_width)
+        rollscale = Image.new('L', (msize, msize), 0)
+        rdraw = ImageDraw.Draw(rollscale)
+        mc = msize // 2
+        for rm in self.ROLL_POSMARKS:
+            length = rollmark_length if rm % 30 == 0 else int(rollmark_length/2)
+            s = math.sin(math.radians(rm + 90))
+            c = math.cos(math.radians(rm + 90))
+            rdraw.line((mc - di * c, mc - di * s, mc - (di - length) * c, mc - (di - length) * s), fill=255,
+                       width=line_width)
+        self.ahrs_rollscale = rollscale
+        self.ahrs_rollscale_rotations.clear()
+        # fixed pointers: middle pointer and triangular pointer of the roll scale
+        pointer = Image.new('L', (self.sizex, self.sizey), 0)
+        pdraw = ImageDraw.Draw(pointer)
+        pdraw.line((self.ah_zerox - 90, self.ah_zeroy, self.ah_zerox - 30, self.ah_zeroy),
+                   width=line_width_middle, fill=255)
+        pdraw.line((self.ah_zerox + 90, self.ah_zeroy, self.ah_zerox + 30, self.ah_zeroy),
+                   width=line_width_middle, fill=255)
+        pdraw.polygon((self.ah_zerox, self.ah_zeroy,
+                       self.ah_zerox - center_pointer_x, self.ah_zeroy + center_pointer_y,
+                       self.ah_zerox + center_pointer_x, self.ah_zeroy + center_pointer_y), fill=255)
+        pdraw.polygon((self.ah_zerox, rollmark_length + 1,
+                       self.ah_zerox - int(rollmark_length/2), 1 + int(rollmark_length*3/2),
+                       self.ah_zerox + int(rollmark_length/2), 1 + int(rollmark_length*3/2)), fill=255)
+        bbox = pointer.getbbox()
+        if bbox:
+            self.ahrs_pointer = (pointer.crop(bbox), bbox[:2])
+        else:
+            self.ahrs_pointer = None
+        self.rlog.debug(f'AHRS textures prepared: texture {tex_x}x{tex_y}, roll scale {msize}x{msize}')
+
+    @staticmethod
+    def image_bytes(image):   # memory of the pixel data, pillow uses one byte per pixel for 1 and L, four for RGB
+        return image.width * image.height * (4 if len(image.getbands()) > 1 else 1)
 
+    @staticmethod
+    def cached_rotation(cache, image, angle, max_bytes, expand):
+        rotated = cache.get(angle)
+        if rotated is None:
+            rotated = image.rotate(angle, expand=expand)
+            cache[angle] = rotated
+            while len(cache) > 1 and sum(GenericDisplay.image_bytes(r) for r in cache.values()) > max_bytes:
+                cache.popitem(last=False)  # remove least recently used roll angle
+        else:
+            cache.move_to_end(angle)
+        return rotated
+
+    def ahrs_draw(self, pitch, roll):
+        # draws horizon, pitch ladder, pointers and roll scale, returns line width
+        line_width, pitchmark_length, pitchscale, rollmark_length, line_width_middle, center_pointer_x, \
+            center_pointer_y = self.ahrs_geometry()
+        max_length = math.ceil(math.hypot(self.sizex, self.sizey))  # maximum line length for diagonal line
         h1, h2 = self.linepoints(pitch, roll, 0, max_length, pitchscale)  # horizon points
         h3, h4 = self.linepoints(pitch, roll, -180, max_length, pitchscale)
         self.draw.polygon((h1, h2, h4, h3), fill=self.AHRS_EARTH_COLOR)  # earth
@@ -474,6 +579,43 @@ class GenericDisplay:
                            self.ah_zerox + center_pointer_x, self.ah_zeroy + center_pointer_y),
                           fill=self.AHRS_MARKS_COLOR)
         self.rollmarks(roll, line_width, rollmark_length)   # roll indicator
+        return line_width
+
+    def ahrs_from_texture(self, pitch, roll):
+        # crops horizon and pitch ladder from the cached rotated texture, returns line width
+        key = (self.image.mode, self.sizex, self.sizey, self.ah_zerox, self.ah_zeroy, self.AHRS_EARTH_COLOR,
+               self.AHRS_SKY_COLOR, self.AHRS_HORIZON_COLOR, self.AHRS_MARKS_COLOR, self.TEXT_COLOR)
+        if key != self.ahrs_cache_key:
+            self.ahrs_prepare()
+            self.ahrs_cache_key = key
+        line_width = self.ahrs_geometry()[0]
+        pitchscale = self.sizey / 6 / 10
+        iroll = round(roll) % 360
+        rotated = self.cached_rotation(self.ahrs_rotations, self.ahrs_texture, iroll, self.AHRS_ROTATION_CACHE, True)
+        # move the texture center along the rotated pitch axis, pitch beyond the texture shows only sky or earth
+        shift = max(min(pitch * pitchscale, self.ahrs_max_shift), -self.ahrs_max_shift)
+        s = math.sin(math.radians(iroll))
+        c = math.cos(math.radians(iroll))
+        cx = rotated.width / 2 - shift * s
+        cy = rotated.height / 2 - shift * c
+        left = round(cx) - self.ah_zerox
+        top = round(cy) - self.ah_zeroy
+        self.image.paste(rotated.crop((left, top, left + self.sizex, top + self.sizey)), (0, 0))
+        # roll indicator
+        rollscale = self.cached_rotation(self.ahrs_rollscale_rotations, self.ahrs_rollscale, iroll,
+                                         self.AHRS_ROTATION_CACHE, False)
+        self.image.paste(self.AHRS_MARKS_COLOR, (self.ah_zerox - rollscale.width // 2,
+                                                 self.ah_zeroy - rollscale.height // 2), rollscale)
+        if self.ahrs_pointer:
+            mask, pos = self.ahrs_pointer
+            self.image.paste(self.AHRS_MARKS_COLOR, pos, mask)
+        return line_width
+
+    def ahrs(self, pitch, roll, heading, slipskid, error_message):
+        if self.image.mode in self.AHRS_TEXTURE_MODES:
+            line_width = self.ahrs_from_texture(pitch, roll)
+        else:   # rgb panels draw polygons faster than they copy the large texture
+            line_width = self.ahrs_draw(pitch, roll)
         self.slip(slipskid, line_width)     # slip indicator
         if error_message:
             self.centered_text( int(self.sizey/4), error_message, self.SMALL)
@@ -616,25 +758,43 @@ class GenericDisplay:
     def countdown_distance(self, feet):
         # display countdown distance on a full screen, distance value is in feet
         self.centered_text(0, "Ground Distance", self.SMALL)
-        text = f"{int(feet)}"  # round down
+        self.countdown_value(feet)
         arcw = self.sizex//32  # width of the arc outline
         radx = self.EXTREMELARGE  # x size of ellipse
+        self.draw.text((self.sizex // 2 + radx + arcw, self.sizey // 2 - self.LARGE // 2), "ft",
+                       font=self.fonts[self.LARGE],
+                       fill=self.TEXT_COLOR)
+
+    def countdown_region(self):
+        # box of arc and value of the countdown screen, the only part changing with a new distance
+        radx = self.EXTREMELARGE  # x size of ellipse
         rady = self.EXTREMELARGE * 0.8  # y size of ellipse
+        return (self.sizex // 2 - radx, int(self.sizey // 2 - rady), self.sizex // 2 + radx,
+                int(self.sizey // 2 + rady))
+
+    def countdown_value(self, feet):
+        # arc and value of the countdown screen, drawn inside countdown_region
+        text = f"{int(feet)}"  # round down
+        arcw = self.sizex//32  # width of the arc outline
         if feet > 0:
             arc_angle = 360 if feet >= 10.0 else 360/10 * feet
         else:
             arc_angle = 0
-        self.draw.arc(
-            (self.sizex // 2 - radx, self.sizey // 2 - rady, self.sizex // 2 + radx, self.sizey // 2 + rady),
-            -90, arc_angle-90, fill=self.TEXT_COLOR, width=arcw)
+        self.draw.arc(self.countdown_region(), -90, arc_angle-90, fill=self.TEXT_COLOR, width=arcw)
         self.draw.text((self.sizex // 2, self.sizey // 2), text, font=self.fonts[self.EXTREMELARGE],
                        fill=self.TEXT_COLOR,
                        anchor='mm')  # anchor 'mm' sets the middle of the text to the middle of the position
-        self.draw.text((self.sizex // 2 + radx + arcw, self.sizey // 2 - self.LARGE // 2), "ft",
-                       font=self.fonts[self.LARGE],
-                       fill=self.TEXT_COLOR)
 
 
+    def perf(self, display_lines, system_lines, side_offset=0):
+        # performance overlay, two dashboards side by side, lines = ("text", "value"), ...
+        self.centered_text(0, "Performance", self.SMALL)
+        width = (self.sizex - 2 * side_offset) // 2
+        self.dashboard(side_offset, self.SMALL, width - 2, display_lines, headline="Display", rounding=True)
+        self.dashboard(side_offset + width + 2, self.SMALL, width - 2, system_lines, headline="System",
+                       rounding=True)
+        self.bottom_line("", "Mode", "Reset")
+
     def gmeter(self, current, maxg, ming, error_message):
         pass
 
@@ -833,17 +993,23 @@ class GenericDisplay:
             self.draw.text((x - tl // 2, ypos + ysize - 1 + y_offset), timestr, font=self.fonts[self.VERYSMALL], fill=textcolor)
             x += offset
 
-        # Draw graph lines
+        # Draw graph lines, one column per pixel with min and max of its values, so peaks remain visible
+        def value_y(value):
+            y = math.floor(ypos - 1 + ysize - ysize * (value - minvalue) / (maxvalue - minvalue))
+            return max(min(y, ypos + ysize - 1), ypos)
+
+        if hasattr(data, 'columns'):   # time series with cached columns, e.g. TimeSeries
+            columns = data.columns(int(xsize))
+        else:
+            columns = self.graph_columns(data, int(xsize))
         lastpoint = None
-        for i in range(0, len(data)):
-            y = math.floor(ypos - 1 + ysize - ysize * (data[i] - minvalue) / (maxvalue - minvalue))
-            y = max(min(y, ypos + ysize - 1), ypos)
-            if i >= 1:  # we need at least two points before we draw
-                x = math.floor(xpos + i * xsize / (len(data) - 1))
-                self.draw.line([lastpoint, (x, y)], fill=graphcolor, width=glinewidth)
-            else:
-                x = xpos
-            lastpoint = (x, y)
+        for offset, vmin, vmax, vfirst, vlast in columns:
+            x = math.floor(xpos + offset * xsize / (no_of_values - 1)) if no_of_values > 1 else xpos
+            if lastpoint is not None:  # we need at least two points before we draw
+                self.draw.line([lastpoint, (x, value_y(vfirst))], fill=graphcolor, width=glinewidth)
+            if vmin != vmax:
+                self.draw.line([(x, value_y(vmin)), (x, value_y(vmax))], fill=graphcolor, width=glinewidth)
+            lastpoint = (x, value_y(vlast))
 
         # Draw dashed value lines
         def draw_dashed_line(ly):
@@ -853,6 +1019,15 @@ class GenericDisplay:
         draw_dashed_line(vl1_y)
         draw_dashed_line(vl2_y)
 
+    @staticmethod
+    def graph_columns(data, width):   # min/max decimation of a sequence, as (offset, min, max, first, last)
+        bucket = max(1, math.ceil(len(data) / max(1, width)))
+        columns = []
+        for start in range(0, len(data), bucket):
+            chunk = data[start:start + bucket]
+            columns.append((start, min(chunk), max(chunk), chunk[0], chunk[-1]))
+        return columns
+
     def dashboard(self, x, y, dsizex, lines, color=None, bgcolor=None, rounding=False, headline=None,
                   headline_size=0):
         # dashboard, arguments are lines = ("text", "value"), ....
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Fake hardware for the display drivers, selected with environment variable RADAR_FAKE_HARDWARE=1.
+# Replaces the Raspberry Pi GPIO/SPI layer of the waveshare epaper drivers (epdconfig) and the luma devices.
+# Every GPIO toggle and SPI transfer is recorded with timestamp and size, the BUSY pin is modelled per waveform
+# and the written display RAM can be read back as an image, so drivers can be measured and verified without display.
+
+import os
+import time
+import zlib
+from collections import deque
+from PIL import Image
+
+FAKE_HARDWARE = os.environ.get('RADAR_FAKE_HARDWARE', '') not in ('', '0')
+# factor for delays, busy and transfer times, RADAR_FAKE_TIMESCALE=0 measures pure cpu time of the drivers
+FAKE_TIME_SCALE = float(os.environ.get('RADAR_FAKE_TIMESCALE', '1.0'))
+MAX_EVENTS = 100000   # maximum number of recorded events
+DEFAULT_BUSY_TIME = 0.3   # busy time in secs for unknown waveforms
+# busy time in secs after master activation (command 0x20). The waveform is named after the lut loaded with
+# command 0x32 (see register_luts) or after the data of display update control (command 0x22)
+WAVEFORM_BUSY_TIMES = {
+    'lut_1Gray_A2': 0.3,    # 3.7 epaper fast refresh
+    'lut_1Gray_DU': 0.6,
+    'lut_1Gray_GC': 1.5,
+    'lut_4Gray_GC': 3.0,
+    '0x22=C7': 2.0,   # full update
+    '0x22=CF': 0.3,   # partial update
+}
+CMD_MASTER_ACTIVATION = 0x20
+CMD_UPDATE_CONTROL = 0x22
+CMD_WRITE_LUT = 0x32
+RAM_COMMANDS = (0x24, 0x26)   # black/white ram and red (or previous) ram
+
+
+class FakeSpi:
+    def __init__(self, hw):
+        self.hw = hw
+        self.max_speed_hz = 0
+        self.mode = 0
+
+    def open(self, bus, device):
+        self.hw.record('spi_open', (bus, device), 0)
+
+    def close(self):
+        self.hw.record('spi_close', None, 0)
+
+    def writebytes(self, data):
+        self.hw.spi_write(data)
+
+    def writebytes2(self, data):
+        self.hw.spi_write(data)
+
+
+class FakeEpaperHardware:
+    # same interface and pins as epdconfig.RaspberryPi
+    RST_PIN = 17
+    DC_PIN = 25
+    CS_PIN = 8
+    BUSY_PIN = 24
+    PWR_PIN = 18
+    MOSI_PIN = 10
+    SCLK_PIN = 11
+
+    def __init__(self):
+        self.SPI = FakeSpi(self)
+        self.events = deque(maxlen=MAX_EVENTS)   # (timestamp, event, detail, size)
+        self.pins = {self.RST_PIN: 0, self.DC_PIN: 0, self.CS_PIN: 1, self.PWR_PIN: 0}
+        self.time_scale = FAKE_TIME_SCALE   # factor for delays and busy times, 0 for no waiting at all
+        self.busy_times = dict(WAVEFORM_BUSY_TIMES)
+        self.lut_names = {}   # lut bytes to name, see register_luts
+        self.command = None   # last command sent with DC low
+        self.ram = {}   # ram command to written bytes
+        self.lut = b''
+        self.update_control = None
+        self.busy_until = 0.0
+        self.activations = []   # (timestamp, waveform) of every master activation
+
+    def record(self, event, detail, size):
+        self.events.append((time.perf_counter(), event, detail, size))
+
+    def register_luts(self, source):
+        # register lut tables (attributes lut_*) of an epd driver class to name waveforms
+        for name in dir(source):
+            if name.startswith('lut_'):
+                self.lut_names[bytes(getattr(source, name))] = name
+
+    def waveform(self):
+        # a loaded lut with known busy time takes precedence over the update control setting
+        names = []
+        if self.lut:
+            names.append(self.lut_names.get(self.lut, f'lut_{zlib.crc32(self.lut):08x}'))
+        if self.update_control is not None:
+            names.append(f'0x22={self.update_control:02X}')
+        for name in names:
+            if name in self.busy_times:
+                return name
+        return names[0] if names else 'unknown'
+
+    def spi_write(self, data):
+        data = bytes(data)
+        self.record('spi', self.command if self.pins[self.DC_PIN] else 'cmd', len(data))
+        if not self.pins[self.DC_PIN]:   # command
+            for cmd in data:
+                self.start_command(cmd)
+            return
+        if self.command in RAM_COMMANDS:
+            self.ram[self.command] += data
+        elif self.command == CMD_WRITE_LUT:
+            self.lut += data
+        elif self.command == CMD_UPDATE_CONTROL and data:
+            self.update_control = data[-1]
+
+    def start_command(self, cmd):
+        self.command = cmd
+        if cmd in RAM_COMMANDS:
+            self.ram[cmd] = bytearray()   # drivers always write ram from the start
+        elif cmd == CMD_WRITE_LUT:
+            self.lut = b''
+        elif cmd == CMD_MASTER_ACTIVATION:
+            waveform = self.waveform()
+            self.activations.append((time.perf_counter(), waveform))
+            busy = self.busy_times.get(waveform, DEFAULT_BUSY_TIME)
+            self.busy_until = time.monotonic() + busy * self.time_scale
+
+    def digital_write(self, pin, value):
+        self.pins[pin] = 1 if value else 0
+        self.record('gpio', pin, self.pins[pin])
+
+    def digital_read(self, pin):
+        if pin == self.BUSY_PIN:
+            return 1 if time.monotonic() < self.busy_until else 0
+        return self.pins.get(pin, 0)
+
+    def delay_ms(self, delaytime):
+        if self.time_scale > 0:
+            time.sleep(delaytime / 1000.0 * self.time_scale)
+
+    def spi_writebyte(self, data):
+        self.SPI.writebytes(data)
+
+    def spi_writebyte2(self, data):
+        self.SPI.writebytes2(data)
+
+    def module_init(self, cleanup=False):
+        self.digital_write(self.PWR_PIN, 1)
+        self.SPI.open(0, 0)
+        self.SPI.max_speed_hz = 32000000
+        return 0
+
+    def module_exit(self, cleanup=False):
+        self.SPI.close()
+        self.digital_write(self.RST_PIN, 0)
+        self.digital_write(self.DC_PIN, 0)
+        self.digital_write(self.PWR_PIN, 0)
+
+    def spi_bytes(self):
+        return sum(size for _, event, _, size in self.events if event == 'spi')
+
+    def ram_image(self, width, height, command=0x24):
+        # contents of the display ram as image in panel orientation (width x height as defined in the driver)
+        # the controllers write their landscape image rotated, use image.rotate(270, expand=True) to get it back
+        data = bytes(self.ram.get(command, b''))
+        data = data[:width * height // 8].ljust(width * height // 8, b'\xff')
+        return Image.frombytes('1', (width, height), data)
+
+
+class FakeLumaDevice:
+    # replaces a luma device (st7789, ssd1351), models the spi transfer time of a frame
+    def __init__(self, width, height, mode='RGB', spi_speed=16000000, rotate=0):
+        self.width, self.height = (height, width) if rotate % 2 else (width, height)
+        self.mode = mode
+        self.size = (self.width, self.height)
+        self.bytes_per_frame = self.width * self.height * 2   # 16 bit colour on the wire
+        self.transfer_time = self.bytes_per_frame * 8 / spi_speed
+        self.time_scale = FAKE_TIME_SCALE
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.frame = None
+
+    def contrast(self, level):
+        self.events.append((time.perf_counter(), 'contrast', level, 0))
+
+    def display(self, image):
+        self.events.append((time.perf_counter(), 'spi', 'frame', self.bytes_per_frame))
+        self.frame = image.copy()
+        if self.time_scale > 0:
+            time.sleep(self.transfer_time * self.time_scale)
+
+    def cleanup(self):
+        self.events.append((time.perf_counter(), 'cleanup', None, 0))
+
+
+def luma_device(actual_args):
+    # creates a fake luma device from the arguments used for radar_opts.get_device, e.g. ['-f', 'st7789.conf']
+    options = list(actual_args)
+    if '-f' in options:
+        with open(options[options.index('-f') + 1]) as f:
+            options = [line.strip() for line in f if line.strip()] + options
+    settings = dict(o[2:].split('=', 1) for o in options if o.startswith('--') and '=' in o)
+    return FakeLumaDevice(int(settings.get('width', 128)), int(settings.get('height', 64)),
+                          spi_speed=int(settings.get('spi-bus-speed', 8000000)), rotate=int(settings.get('rotate', 0)))
@@ -51,10 +51,11 @@ gps_distance_zero = {'gps_active': False, 'longitude': 0.0, 'latitude': 0.0}
 start_distance = 0.0    # runway needed till airborne, starts when "start" button is pressed
 dist_user_mode = 0      # user input mode for distance display, 0 = normal, start   1=statistics display
 statistic_index = 0
-statistic_list = []
+statistic_count = 0   # number of saved statistics, records are read by index when displayed
 # gps-starting point in meters for situation and flight testing
 baro_diff_zero = {}
 # height starting point based on baro in feet for situation and flight testing
+countdown_valid = None   # validity of distance in last drawn countdown frame, None if not drawn yet
 
 
 def radians_rel(angle):
@@ -130,14 +131,15 @@ def draw_distance(display_control, was_changed, connected, situation, ahrs):
                                             grounddistance.dest_elevation != grounddistance.INVALID_DEST_ELEVATION,
                                             grounddistance.indicate_distance, current_stats=True)
     elif dist_user_mode == 2:  # show stored statistics
-        if len(statistic_list) > statistic_index:
-            display_control.distance_statistics(statistic_list[statistic_index],
+        stat = grounddistance.read_stat(statistic_index) if statistic_count > statistic_index else None
+        if stat is not None:
+            display_control.distance_statistics(stat,
                                                 situation['gps_active'],situation['gps_altitude'],
                                                 grounddistance.dest_elevation,
                                                 grounddistance.dest_elevation != grounddistance.INVALID_DEST_ELEVATION,
                                                 grounddistance.indicate_distance, current_stats=False,
                                                 prev_stat=statistic_index != 0,
-                                                next_stat=statistic_index != len(statistic_list) - 1,
+                                                next_stat=statistic_index != statistic_count - 1,
                                                 index=statistic_index)
         else: # no data available till now
             display_control.distance_statistics({}, situation['gps_active'], situation['gps_altitude'],
@@ -150,19 +152,29 @@ def draw_distance(display_control, was_changed, connected, situation, ahrs):
     display_control.display()
 
 
-def draw_countdown_distance(display_control, situation):
+def draw_countdown_distance(display_control, situation, refresh):
     # display in any case, even if there is no change, since values are constantly changing
-    display_control.clear()
-    if situation['g_distance_valid']:
-        feet = situation['g_distance'] * grounddistance.MM_TO_FEET   # round down
-        display_control.countdown_distance(feet)    # switch back is done by ground sensor reader
-    display_control.display()
+    global countdown_valid
+
+    valid = situation['g_distance_valid']
+    feet = situation['g_distance'] * grounddistance.MM_TO_FEET
+    if refresh or valid != countdown_valid or not valid:
+        display_control.clear()
+        if valid:
+            display_control.countdown_distance(feet)    # switch back is done by ground sensor reader
+        display_control.display()
+    else:   # only arc and value changed, redraw this region
+        box = display_control.countdown_region()
+        display_control.clear_region(box)
+        display_control.countdown_value(feet)
+        display_control.display_region(box)
+    countdown_valid = valid
 
 
 def user_input():
     global dist_user_mode
     global statistic_index
-    global statistic_list
+    global statistic_count
 
     btime, button = radarbuttons.check_buttons()
     # start of situation global behaviour, status is 21
@@ -173,9 +185,9 @@ def user_input():
             return radarmodes.next_mode_sequence(Modes.SITUATION), False  # next mode to be radar
         if button == 1 and btime == 1:  # middle and short, display history statistics
             dist_user_mode = 2
-            statistic_list = grounddistance.read_stats()  # returns empty list if nothing available
-            if len(statistic_list) > 0:
-                statistic_index = len(statistic_list) - 1
+            statistic_count = grounddistance.stats_count()  # 0 if nothing available
+            if statistic_count > 0:
+                statistic_index = statistic_count - 1
             else:
                 statistic_index = 0
             return Modes.SITUATION, False
@@ -211,16 +223,16 @@ def user_input():
             dist_user_mode = 0
             return Modes.SITUATION, False
         if button == 2 and btime == 1:  # right and short - next element
-            statistic_list = grounddistance.read_stats()  # read list again, it could have been updated
-            if len(statistic_list) > 0:
-                statistic_index = (statistic_index + 1) % len(statistic_list)
+            statistic_count = grounddistance.stats_count()  # count again, it could have been updated
+            if statistic_count > 0:
+                statistic_index = (statistic_index + 1) % statistic_count
             else:
                 statistic_index = 0
             return Modes.SITUATION, False
         if button == 0 and (btime == 1 or btime == 2):  # left - previous element
-            statistic_list = grounddistance.read_stats()  # read list again, it could have been updated
-            if len(statistic_list) > 0:
-                statistic_index = (statistic_index - 1) % len(statistic_list)
+            statistic_count = grounddistance.stats_count()  # count again, it could have been updated
+            if statistic_count > 0:
+                statistic_index = (statistic_index - 1) % statistic_count
             else:
                 statistic_index = 0
             return Modes.SITUATION, False
@@ -231,7 +243,7 @@ def user_input():
         if button == 0 and (btime == 1 or btime == 2):  # left, means yes
             grounddistance.delete_stats()
             statistic_index = 0
-            statistic_list = []
+            statistic_count = 0
             dist_user_mode = 2   # back to history values
             return Modes.SITUATION, False  # no mode change for any other interaction
         if (button == 1 or button == 2) and (btime == 1 or btime == 2):  # middle or right, short and long, cancel
@@ -56,6 +56,7 @@ import datetime
 import json
 import radarbuttons
 import radarmodes
+import persist
 from globals import rlog, Modes
 
 
@@ -135,14 +136,13 @@ def read_flights():
     return config
 
 
-def write_flights():
+def write_flights():   # written by persistence worker
     try:
-        with open(g_saved_flights, 'wt') as out:
-            json.dump(g_config, out, sort_keys=True, indent=4, default=default)
+        text = persist.write_json(g_saved_flights, g_config, default=default)
     except (OSError, IOError, ValueError) as e:
         rlog.debug("FlighttimeUI: Error " + str(e) + " writing " + g_saved_flights)
-    rlog.debug("FlighttimeUI: Configuration saved to " + g_saved_flights + ": " +
-               json.dumps(g_config, sort_keys=True, indent=4, default=default))
+        return
+    rlog.debug("FlighttimeUI: Configuration saved to " + g_saved_flights + ": " + text)
 
 
 def current_starttime():
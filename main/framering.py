@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Frame ring: the last rendered frames exactly as sent to the panel, for analysis of display glitches.
+# For epaper this is the packed 1-bit buffer of getbuffer_optimized, for oled/tft the raw image bytes.
+# Recording only keeps a reference (epaper) or the raw bytes (oled/tft), no image encoding during flight.
+# Dumped together with the black box, export of a dump:
+#   python3 framering.py <dump> -gif <file.gif>   animated image with original timing
+#   python3 framering.py <dump> -png <directory>  png sequence
+# Dump format: header (magic, version, width, height, image mode, packed flag, number of frames),
+# then per frame timestamp, display mode, length and frame bytes.
+
+import os
+import time
+import struct
+import argparse
+from pathlib import Path
+from globals import rlog, Globals, Modes
+import blackbox
+
+# constants
+FRAME_MAGIC = b'SRFR'
+FRAME_VERSION = 1
+DUMP_HEADER = struct.Struct('<4sBHH4sBI')   # magic, version, width, height, image mode, packed, frames
+FRAME_HEADER = struct.Struct('<dHI')   # timestamp, display mode, frame length
+PACKED_METHODS = ('display_1Gray', 'async_display_1Gray', 'displayPart_mod', 'async_displayPart')   # epaper
+IMAGE_METHODS = ('display',)   # luma devices, oled and tft
+MIN_GIF_DURATION = 20   # ms, browsers ignore shorter frame durations
+
+# globals
+size = 0   # 0 is off
+times = []
+modes = []
+frames = []
+position = 0   # number of frames ever recorded, position % size is the next slot
+dump_dir = None
+geometry = None   # (width, height, image mode, packed)
+
+
+def init(directory, entries):
+    global size
+    global times
+    global modes
+    global frames
+    global position
+    global dump_dir
+
+    size = max(0, entries)
+    times = [0.0] * size
+    modes = [0] * size
+    frames = [None] * size
+    position = 0
+    dump_dir = Path(directory)
+    if size > 0:
+        blackbox.add_dump(dump)
+        rlog.debug(f"FrameRing: Keeping last {size} frames, dumps to {dump_dir}")
+
+
+def store(frame):
+    global position
+
+    i = position % size
+    times[i] = time.time()
+    modes[i] = Globals.mode.value
+    frames[i] = frame
+    position += 1
+
+
+def instrument(display_control):
+    # wraps the methods of the display device that send a frame to the panel
+    global geometry
+
+    device = getattr(display_control, 'device', None)
+    image = getattr(display_control, 'image', None)
+    if size == 0 or device is None or image is None:
+        return
+    packed = hasattr(device, 'getbuffer_optimized')
+    geometry = (image.size[0], image.size[1], image.mode, packed)
+
+    def packed_sender(send):
+        def send_and_store(buf, *args, **kwargs):
+            store(buf)   # new buffer for every frame, reference only
+            return send(buf, *args, **kwargs)
+        return send_and_store
+
+    def image_sender(send):
+        def send_and_store(img, *args, **kwargs):
+            store(img.tobytes())   # image is redrawn in place, so raw bytes are needed
+            return send(img, *args, **kwargs)
+        return send_and_store
+
+    for name in (PACKED_METHODS if packed else IMAGE_METHODS):
+        if hasattr(device, name):
+            setattr(device, name, (packed_sender if packed else image_sender)(getattr(device, name)))
+
+
+def dump(reason):
+    if size == 0 or geometry is None:
+        return None
+    end = position
+    recorded = [(times[n % size], modes[n % size], frames[n % size]) for n in range(max(0, end - size), end)]
+    if not recorded:
+        return None
+    width, height, image_mode, packed = geometry
+    data = bytearray(DUMP_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, width, height, image_mode.encode(), packed,
+                                      len(recorded)))
+    for ts, mode, frame in recorded:
+        frame = bytes(frame)
+        data += FRAME_HEADER.pack(ts, mode, len(frame))
+        data += frame
+    filename = dump_dir.joinpath(time.strftime(f"frames-%Y%m%d-%H%M%S-{reason}.srfr"))
+    tmp = filename.with_name(filename.name + '.tmp')
+    try:
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except (OSError, IOError) as e:
+        rlog.debug(f"FrameRing: Error {e} writing dump {filename}")
+        return None
+    rlog.debug(f"FrameRing: {len(recorded)} frames dumped to {filename}")
+    return filename
+
+
+def read_dump(path):   # returns geometry and list of (timestamp, mode, frame bytes)
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, width, height, image_mode, packed, count = DUMP_HEADER.unpack_from(data, 0)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError(f"{path} is not a frame dump")
+    offset = DUMP_HEADER.size
+    result = []
+    for _ in range(count):
+        ts, mode, length = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size
+        result.append((ts, mode, data[offset:offset + length]))
+        offset += length
+    return (width, height, image_mode.rstrip(b'\0').decode(), bool(packed)), result
+
+
+def frame_image(geo, frame):
+    from PIL import Image   # only needed for export
+
+    width, height, image_mode, packed = geo
+    if packed:   # undo numpy.packbits(numpy.rot90(image)) of getbuffer_optimized
+        return Image.frombytes('1', (height, width), frame).rotate(-90, expand=True)
+    return Image.frombytes(image_mode, (width, height), frame)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Export a frame dump of stratux radar display')
+    ap.add_argument("dump", help="Frame dump (.srfr)")
+    ap.add_argument("-gif", "--gif", required=False, help="Export as animated gif with original timing")
+    ap.add_argument("-png", "--png", required=False, help="Export as png sequence into this directory")
+    args = vars(ap.parse_args())
+    dump_geometry, dump_frames = read_dump(args['dump'])
+    print(f"{len(dump_frames)} frames {dump_geometry[0]}x{dump_geometry[1]} mode {dump_geometry[2]}")
+    for r_ts, r_mode, r_frame in dump_frames:
+        print(f"{time.strftime('%H:%M:%S', time.gmtime(r_ts))}.{int(r_ts * 1000) % 1000:03d} "
+              f"{Modes(r_mode).name:<18} {len(r_frame)} bytes")
+    if args['png']:
+        png_dir = Path(args['png'])
+        png_dir.mkdir(parents=True, exist_ok=True)
+        for n, (r_ts, r_mode, r_frame) in enumerate(dump_frames):
+            frame_image(dump_geometry, r_frame).save(png_dir.joinpath(f'frame_{n:04d}_{Modes(r_mode).name}.png'))
+    if args['gif'] and dump_frames:
+        images = [frame_image(dump_geometry, r_frame) for _, _, r_frame in dump_frames]
+        images = [img.convert('L') if img.mode == '1' else img for img in images]
+        durations = [max(MIN_GIF_DURATION, int((dump_frames[n + 1][0] - dump_frames[n][0]) * 1000))
+                     for n in range(len(dump_frames) - 1)] + [1000]
+        images[0].save(args['gif'], save_all=True, append_images=images[1:], duration=durations, loop=0)
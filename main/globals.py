@@ -32,6 +32,7 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
+import time
 import logging
 from enum import Enum
 
@@ -62,11 +63,14 @@ class Modes(Enum):
     CHECKLIST = 23
     REFRESH_CHECKLIST = 24
     COUNTDOWN_DISTANCE = 25    # full screen with large numbers if ground sensor has contact
+    PERF = 26    # performance overlay
+    REFRESH_PERF = 27
 
 
 class Globals:     # global variables which need to be changed somehow from other modules
     mode = Modes.RADAR     # Global mode for radar display
     update = True   # flag whether to update display
+    clock = time.time   # clock for traffic and situation timing, replaced by the replay clock during replay
 
 # Initialize logger
 SITUATION_DEBUG = logging.DEBUG - 2  # another low level for debugging, DEBUG is 10
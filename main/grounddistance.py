@@ -35,8 +35,9 @@
 # enable_uart=1
 # dtoverlay=miniuart-bt
 
-# start and landing statistics are stored in stratux-radar.stat
-# This file has json coded statistics for every flight, one line per flight, see this example
+# start and landing statistics are stored in stratux-radar.stats, a record store with index (see statstore.py)
+# Records are json coded statistics for every flight, one per flight, see this example
+# Older versions wrote json lines to stratux-radar.stat, this file is imported once
 # {"start_time": "2023-01-15 12:57:21.873912+00:00", "start_altitude": 879.8726, "takeoff_distance": 0.0, "landing_time": "2023-01-15 12:57:22.106499+00:00", "landing_altitude": 879.8606, "landing_distance": 0.0}
 # {"start_time": "2023-01-15 12:57:28.223856+00:00","start_altitude": 880.92865,"takeoff_distance": 0.0,"landing_time": "2023-01-15 12:57:28.444494+00:00","landing_altitude": 880.77216,"landing_distance": 0.0 }
 
@@ -50,6 +51,13 @@ import simulation
 import radarbluez
 import radarbuttons
 import binascii
+import numpy
+from collections import deque
+import metrics
+import latency
+import persist
+from statstore import RecordStore
+from timeseries import TimeSeries
 from typing import Any
 from globals import rlog, Globals, Modes
 import os      # for deleting statistics file
@@ -58,11 +66,21 @@ FEET_TO_MM = 304.8
 MM_TO_FEET = 1 / FEET_TO_MM     # one feet in mm
 
 # constants
-MEASUREMENTS_PER_SECOND = 10     # number of distance ranging meaurements per second
+MEASUREMENTS_PER_SECOND = 10     # default number of filtered distances published per second
 # A22 usonic sensor allows approx. 10 per second
-# TFMini-Plus sensor allows 100 per second
+# TFMini-Plus sensor allows 100 per second, all frames are read and filtered
 UART_WAIT_TIME = 100   # wait time if no data is coming from the sensor
 UART_BREAK_TIME = 1000   # time to break waiting
+LIDAR_PORT = "/dev/ttyAMA0"   # default serial port of lidar sensor
+LIDAR_BYTES = 9   # bytes of one lidar frame
+LIDAR_FILTER_SIZE = 5   # number of frames for median filter
+LIDAR_MIN_STRENGTH = 100   # TFMini-Plus: distance is unreliable below this signal strength
+LIDAR_MAX_STRENGTH = 65535   # signal saturated, distance is unreliable
+LIDAR_OUTLIER = 1000   # in mm, frames differing more from the median are outliers
+LIDAR_OUTLIER_FRAMES = 5   # outliers in a row that are accepted as real change of distance
+LIDAR_STALE_TIME = 0.5   # secs without valid frame until distance is invalid
+ZERO_DISTANCE_WAIT = 0.5   # secs to collect frames before zero distance is taken
+COUNTDOWN_MIN_FRAME_TIME = 0.03   # secs, min time between two priority redraws of the countdown screen
 
 # GPS-Measurement of start-distance
 DISTANCE_START_DETECTED = 30 * 10  # in mm where measurement assumes that plane is in the air
@@ -76,6 +94,11 @@ STATS_FOR_SITUATION_CHANGE = 3  # no of values in a row before a situation is ch
 STATS_TOTAL_TIME = 120  # time in seconds how long statistic window is
 INVALID_GDISTANCE = -9999   # indicates no valid grounddistance
 INVALID_GPS_DISTANCE = -9999 # indicates no valid gps-distance
+STATS_DTYPE = numpy.dtype([('Time', 'f8'), ('baro_valid', '?'), ('own_altitude', 'f8'), ('gps_active', '?'),
+                           ('longitude', 'f8'), ('latitude', 'f8'), ('gps_speed', 'f8'), ('gps_altitude', 'f8'),
+                           ('gps_h_accuracy', 'f8'), ('gps_v_accuracy', 'f8'), ('g_distance_valid', '?'),
+                           ('g_distance', 'f8'), ('gear_down', '?')])   # Time is monotonic, see stat_dict()
+STATS_KEYS = STATS_DTYPE.names[1:]   # keys taken from situation
 
 MIN_GPS_V_ACCURACY = 150   # minimum horizontal accuracy of gps, if not met, no speech warnings are spoken
 
@@ -93,9 +116,13 @@ distance_sensor = None
 zero_distance = 0.0  # distance of sensor when aircraft is on ground
 value_debug_level = 0  # set during init
 simulation_mode = False  # set during init
+measurements_per_second = MEASUREMENTS_PER_SECOND  # publish rate of filtered distance, set during init
+sample_fast_path = False   # True if every filtered lidar sample is evaluated immediately via sensor_sample()
+countdown_redraw = None   # asyncio.Event, set by sensor_sample() if the countdown screen has to show a new sample
+last_countdown_frame = 0.0   # time of last priority redraw
 # statistics for calculating values
-statistics = []  # values for calculating everything
 stats_max_values = STATS_PER_SECOND * STATS_TOTAL_TIME
+statistics = TimeSeries(stats_max_values, dtype=STATS_DTYPE)  # values for calculating everything
 stats_next_store = 0
 global_situation = {}
 fly_status = 0  # status for evaluating statistics 0 = run up  1 = start_detected 2 = 15 m detected
@@ -112,6 +139,7 @@ stats_before_landing = 0
 stats_before_stop = 0
 stats_before_obstacle_clear = 0
 saved_statistics = ""    # filename for statistics, set in init
+stats_store = None   # RecordStore for saved_statistics, set in init
 
 gps_warnings = (1000, 500)    # speech warnings in feet, when calculated with gps
 gps_upper = [False] * len(gps_warnings)  # is true, if height + hysteresis was met
@@ -159,63 +187,112 @@ def set_dest_elevation(dest_increment):
     rlog.debug('Grounddistance: Destination Altitude set to {0:5.0f}'.format(dest_elevation))
 
 
+class LidarParser:   # incremental parser for TFMini-Plus / TF02 Pro frames, incomplete frames are kept for next data
+    # frame: 0x59 0x59 dist_l dist_h strength_l strength_h temp_l temp_h checksum
+    def __init__(self):
+        self.buffer = b''
+        self.checksum_errors = 0
+
+    def feed(self, data):   # returns (distance in mm, strength, celsius) for all complete frames with valid checksum
+        self.buffer += data
+        buf = numpy.frombuffer(self.buffer, dtype=numpy.uint8)
+        starts = len(buf) - LIDAR_BYTES + 1   # number of positions where a complete frame can start
+        if starts <= 0:
+            return []
+        heads = numpy.flatnonzero((buf[:starts] == 0x59) & (buf[1:starts + 1] == 0x59))
+        sums = numpy.concatenate(([0], numpy.cumsum(buf, dtype=numpy.uint32)))
+        valid = ((sums[heads + LIDAR_BYTES - 1] - sums[heads]) & 0xFF) == buf[heads + LIDAR_BYTES - 1]
+        frames = []
+        end = 0
+        for i in heads[valid].tolist():   # take frames in order, without overlapping
+            if i >= end:
+                frames.append(i)
+                end = i + LIDAR_BYTES
+        self.buffer = self.buffer[max(end, starts):]
+        idx = numpy.array(frames, dtype=numpy.int64)
+        invalid = heads[~valid]   # count invalid headers which are not part of a valid frame
+        if not frames:
+            self.checksum_errors += len(invalid)
+            return []
+        covering = numpy.searchsorted(idx, invalid, side='right') - 1
+        self.checksum_errors += int(numpy.count_nonzero((covering < 0) |
+                                                        (invalid >= idx[numpy.maximum(covering, 0)] + LIDAR_BYTES)))
+        distance = 10 * (buf[idx + 2].astype(numpy.int32) + 256 * buf[idx + 3].astype(numpy.int32))
+        strength = buf[idx + 4].astype(numpy.int32) + 256 * buf[idx + 5].astype(numpy.int32)
+        celsius = (buf[idx + 6].astype(numpy.int32) + 256 * buf[idx + 7].astype(numpy.int32)) / 8 - 256
+        return list(zip(distance.tolist(), strength.tolist(), celsius.tolist()))
+
+
 class LidarSensor:   # Implementation for TFMini-Plus Lidar or TF02 Pro Lidar Sensor
-    lidar_bytes = 9
     distance_max = 20000    # in mm = 20 meters
                             # TFMini Plus, sensor is able to detect till 12 meters but reliable only to 4 m in bad conditions
                             # TF02 Pro Lidar, sensor is able to detect till 40 meters but reliable only to 12 m in bad conditions
     distance_min = 100     # in mm, 10 cm min
-    ser = None
-    distance = 0
-    strength = 0
-    celsius = 0
+
+    def __init__(self, port=LIDAR_PORT):
+        self.port = port
+        self.ser = None
+        self.parser = LidarParser()
+        self.window = deque(maxlen=LIDAR_FILTER_SIZE)   # last accepted distances for median
+        self.outliers = 0   # number of outliers in a row
+        self.last_valid = 0.0   # time of last accepted frame
+        self.distance = 0
+        self.strength = 0
+        self.celsius = 0
+        self.on_sample = None   # called with the filtered distance and receive time for every accepted frame
 
     def init(self):
-        self.ser = serial.Serial("/dev/ttyAMA0", 115200)     # Lidar module has 115200 baud
+        self.ser = serial.Serial(self.port, 115200, timeout=0)     # Lidar module has 115200 baud, non blocking
         self.ser.flushInput()
         if not self.ser.isOpen():
             return False
         return True
 
-    def last_distance(self):
-        return self.distance
+    def start(self, loop):   # every frame is read by the event loop as soon as it arrives
+        loop.add_reader(self.ser.fileno(), self.read_frames)
 
-    def calc_distance(self):
-        if  self.ser.inWaiting() < self.lidar_bytes:
-            if not simulation_mode:
-                rlog.debug("Error, no data received from Lidar sensor")
+    def stop(self, loop):
+        loop.remove_reader(self.ser.fileno())
+        rlog.debug(f"Lidar-Sensor: {self.parser.checksum_errors} frame headers with invalid checksum")
+
+    def read_frames(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (OSError, serial.SerialException) as e:
+            rlog.debug(f"Lidar-Sensor: Error reading serial: {e}")
             return
-        result = self.ser.read(self.ser.inWaiting())
-        rlog.log(value_debug_level, f"Lidar sensor - Bytes received: {len(result)} : {binascii.hexlify(result)} ")
-        if len(result) >= self.lidar_bytes:
-            index = len(result) - self.lidar_bytes
-            while True:   # find last 0x59 0x59
-                 if result[index] == 0x59 and result[index + 1] == 0x59:
-                     break
-                 else:
-                     if index > 0:
-                         index = index - 1
-                     else:
-                         rlog.debug("Lidar-Sensor: Frame Header not found")
-                         return
-            # here we found two 0x59, now check checksum
-            checksum = 0x00
-            for i in range(self.lidar_bytes - 1):
-                checksum += result[index + i]
-            if (checksum & 0xFF) == result[index + 8]:  # checksum check
-                # now calculate distance and strength
-                self.distance = 10 * (result[index + 2] + result[index + 3] * 256)
-                if self.distance > self.distance_max or self.distance < self.distance_min:
-                    self.distance = 0
-                self.strength = result[index + 4] + result[index + 3] * 256
-                self.celsius = result[index + 6] + result[index + 7] * 256
-                #  Convert temp code to degrees Celsius.
-                self.celsius =  self.celsius / 8 - 256
-                rlog.log(value_debug_level, f"Lidar-Sensor: Distance {self.distance} Strength {self.strength} Celsius {self.celsius}")
-            else:
-                 rlog.debug(f"Lidar-Sensor: Invalid checksum")
-        else:
-              rlog.debug(f"Lidar-Sensor: Error less bytes read than expected")
+        received = time.perf_counter()   # sample latency is measured from here, includes parsing and filtering
+        rlog.log(value_debug_level, f"Lidar sensor - Bytes received: {len(data)} : {binascii.hexlify(data)} ")
+        for distance, strength, celsius in self.parser.feed(data):
+            metrics.sensor_reads.inc('lidar')
+            self.filter(distance, strength, celsius, received)
+
+    def filter(self, distance, strength, celsius, received):   # strength gating, outlier removal and median
+        self.strength = strength
+        self.celsius = celsius
+        if not LIDAR_MIN_STRENGTH <= strength < LIDAR_MAX_STRENGTH \
+                or not self.distance_min <= distance <= self.distance_max:
+            return   # sensor signals unreliable distance
+        if self.window:
+            median = sorted(self.window)[len(self.window) // 2]
+            if abs(distance - median) > LIDAR_OUTLIER:
+                self.outliers += 1
+                if self.outliers < LIDAR_OUTLIER_FRAMES:
+                    return
+                self.window.clear()   # not an outlier but a real jump, e.g. at the edge of an obstacle
+        self.outliers = 0
+        self.window.append(distance)
+        self.distance = sorted(self.window)[len(self.window) // 2]
+        self.last_valid = time.monotonic()
+        rlog.log(value_debug_level, f"Lidar-Sensor: Distance {distance} Filtered {self.distance} "
+                                    f"Strength {strength} Celsius {celsius}")
+        if self.on_sample is not None:
+            self.on_sample(self.distance, received)
+
+    def last_distance(self):   # filtered distance in mm, 0 if no valid frame was received recently
+        if time.monotonic() - self.last_valid > LIDAR_STALE_TIME:
+            return 0
+        return self.distance
 
 
 def reset_values():
@@ -249,7 +326,8 @@ def reset_values():
                 rlog.debug('Error resetting gound zero distance')
 
 
-def init(activate, stat_file, debug_level, distance_indication, countdown, gear_ind, situation, sim_mode):
+def init(activate, stat_file, debug_level, distance_indication, countdown, gear_ind, situation, sim_mode,
+         port=LIDAR_PORT, rate=MEASUREMENTS_PER_SECOND, legacy_stat_file=None):
     global ground_distance_active
     global indicate_distance
     global countdown_screen
@@ -260,6 +338,8 @@ def init(activate, stat_file, debug_level, distance_indication, countdown, gear_
     global simulation_mode
     global saved_statistics
     global gear_indication
+    global measurements_per_second
+    global stats_store
 
     # ground_distance_active: sensor is activated with -gd and is running
     # simulation_mode: simulation mode is activated with -sim
@@ -270,6 +350,15 @@ def init(activate, stat_file, debug_level, distance_indication, countdown, gear_
     simulation_mode = sim_mode
     value_debug_level = debug_level
     saved_statistics = stat_file
+    measurements_per_second = rate
+    try:
+        stats_store = RecordStore(stat_file, _to_serializable, _from_serializable)
+        if legacy_stat_file is not None and os.path.exists(legacy_stat_file):
+            imported = stats_store.import_jsonl(legacy_stat_file)
+            os.replace(legacy_stat_file, legacy_stat_file + '.imported')
+            rlog.debug(f"Grounddistance: {imported} statistics imported from {legacy_stat_file}")
+    except (OSError, IOError, ValueError) as e:
+        rlog.debug(f"Grounddistance: Error {e} opening statistics {stat_file}")
     global_situation = situation  # to be able to read and store situation info
 
     if gear_ind:
@@ -291,7 +380,7 @@ def init(activate, stat_file, debug_level, distance_indication, countdown, gear_
         ground_distance_active = False
         return False
     try:
-        distance_sensor = LidarSensor()
+        distance_sensor = LidarSensor(port)
         if not distance_sensor.init():
             rlog.debug("Ground Distance Measurement - Error init sensor, serial not found")
             ground_distance_active = False
@@ -326,51 +415,47 @@ def _from_serializable(obj: Any) -> Any: # necessary to load datetime in json
     return obj
 
 
-def delete_stats():
+def delete_stats():   # done by persistence worker
+    if stats_store is None:
+        return
+    persist.call(stats_store.clear)
+    rlog.debug("Grounddistance: Statistics deleted")
+
+
+def write_stats():   # calculated now, appended by persistence worker
+    if stats_store is None:
+        return
     try:
-        os.remove(saved_statistics)
-        rlog.debug("Grounddistance: Statistics deleted")
+        stats = calculate_output_values()
+        rlog.debug("Grounddistance: Writing statistics " + json.dumps(stats, default=str))
+        persist.call(stats_store.append, stats)
     except (OSError, IOError, ValueError) as e:
-        rlog.debug(f"Grounddistance: Error {e} deleting {saved_statistics}")
+        rlog.debug("Grounddistance: Error " + str(e) + " writing " + saved_statistics)
+
+
+def stats_count():   # number of saved statistics, without reading them
+    return len(stats_store) if stats_store is not None else 0
 
 
-def write_stats():
+def read_stat(k):   # saved statistics k, 0 is the oldest, None if not available
+    if stats_store is None:
+        return None
     try:
-        with open(saved_statistics, 'at') as out:
-            serial = _to_serializable(calculate_output_values())
-            outstr = json.dumps(serial)
-            rlog.debug("Grounddistance: Writing statistics " + outstr)
-            out.write(outstr + '\n')  # Add newline after each JSON object
+        return stats_store.get(k)
+    except IndexError:
+        return None
     except (OSError, IOError, ValueError) as e:
-        rlog.debug("Grounddistance: Error " + str(e) + " writing " + saved_statistics)
+        rlog.debug(f"Grounddistance: Error reading statistics {k} from {saved_statistics}: {e}")
+        return None
 
 
-def read_stats(stats_file=None):   # returns a list of all written stats
-    if stats_file is None:
-        stats_file = saved_statistics
-        if stats_file is None:
-            return []    # groundsensor not initialized, return empty
+def read_stats():   # returns a list of all saved stats
+    if stats_store is None:
+        return []    # groundsensor not initialized, return empty
     try:
-        with open(stats_file, 'rt') as f:
-            # Read and parse each line as a separate JSON object
-            stats = []
-            for line in f:
-                line = line.strip()
-                if line:  # Skip empty lines
-                    raw = json.loads(line)
-                    indict = _from_serializable(raw)
-                    rlog.debug("Grounddistance: Read statistics " + indict.__str__())
-                    stats.append(indict)
-            rlog.debug(f"Grounddistance: Read {len(stats)} statistics records")
-            return stats
-    except FileNotFoundError:
-        rlog.debug(f"Grounddistance: Statistics file {stats_file} not found")
-        return []
-    except json.JSONDecodeError as e:
-        rlog.debug(f"Grounddistance: Error decoding JSON from {stats_file}: {str(e)}")
-        return []
-    except (OSError, IOError) as e:
-        rlog.debug(f"Grounddistance: Error reading {stats_file}: {str(e)}")
+        return stats_store.records()
+    except (OSError, IOError, ValueError) as e:
+        rlog.debug(f"Grounddistance: Error reading {saved_statistics}: {str(e)}")
         return []
 
 
@@ -386,15 +471,11 @@ def prepare_sounds():
     go_around_warning_sound = radarbluez.prepare_sounds_string(GEAR_NOT_DOWN_GO_AROUND)
 
 
-def calc_distance_speaker(stat):
+def calc_distance_speaker(stat):   # called with statistics rate
     if stat['gps_active'] and stat['gps_v_accuracy'] < MIN_GPS_V_ACCURACY:
         gps_distance = stat['gps_altitude'] - dest_elevation   # both are in ft
     else:
         gps_distance = INVALID_GPS_DISTANCE
-    if stat['g_distance_valid']:
-        ground_distance = stat['g_distance'] * MM_TO_FEET    # g_distance is in mm, here we need ft
-    else:
-        ground_distance = 0.0
     if (indicate_distance or countdown_screen) and fly_status == 1:
         for (i, height) in enumerate(gps_warnings):
             if gps_distance != INVALID_GPS_DISTANCE:
@@ -405,17 +486,6 @@ def calc_distance_speaker(stat):
                     gps_upper[i] = False
                 if gps_distance >= height * hysteresis:
                     gps_upper[i] = True
-        for (i, height) in enumerate(sensor_warnings):
-            if stat['g_distance_valid']:
-                if ground_distance <= height and sensor_upper[i]:
-                    # distance is reached and was before higher than hysteresis
-                    if indicate_distance and len(sensor_warnings_sounds) > i:
-                        radarbluez.speak_sound(sensor_warnings_sounds[i], str(height))
-                    sensor_upper[i] = False
-                    if countdown_screen:
-                        start_countdown_screen()
-                if ground_distance >= height * hysteresis:
-                    sensor_upper[i] = True
     if gear_indication and fly_status == 1:
         for (i, height) in enumerate(gear_gps_warnings):
             if gps_distance != INVALID_GPS_DISTANCE:
@@ -425,15 +495,63 @@ def calc_distance_speaker(stat):
                     gear_gps_upper[i] = False
                 if gps_distance >= height * hysteresis:
                     gear_gps_upper[i] = True
+    if not sample_fast_path:   # otherwise already done for every sensor sample
+        calc_sensor_speaker(stat)
+
+
+def calc_sensor_speaker(stat):   # warnings based on ground sensor
+    if not stat['g_distance_valid'] or fly_status != 1:
+        return
+    ground_distance = stat['g_distance'] * MM_TO_FEET    # g_distance is in mm, here we need ft
+    if indicate_distance or countdown_screen:
+        for (i, height) in enumerate(sensor_warnings):
+            if ground_distance <= height and sensor_upper[i]:
+                # distance is reached and was before higher than hysteresis
+                if indicate_distance and len(sensor_warnings_sounds) > i:
+                    radarbluez.speak_sound(sensor_warnings_sounds[i], str(height))
+                sensor_upper[i] = False
+                if countdown_screen:
+                    start_countdown_screen()
+            if ground_distance >= height * hysteresis:
+                sensor_upper[i] = True
+    if gear_indication:
         for (i, height) in enumerate(gear_sensor_warnings):
-            if stat['g_distance_valid']:
-                if ground_distance <= height and gear_sensor_upper[i]:
-                    # distance is reached and was before higher than hysteresis
-                    if stat['gear_down'] is False and go_around_warning_sound is not None:
-                        radarbluez.speak_sound(go_around_warning_sound, GEAR_NOT_DOWN_GO_AROUND)
-                    gear_sensor_upper[i] = False
-                if ground_distance >= height * hysteresis:
-                    gear_sensor_upper[i] = True
+            if ground_distance <= height and gear_sensor_upper[i]:
+                # distance is reached and was before higher than hysteresis
+                if stat['gear_down'] is False and go_around_warning_sound is not None:
+                    radarbluez.speak_sound(go_around_warning_sound, GEAR_NOT_DOWN_GO_AROUND)
+                gear_sensor_upper[i] = False
+            if ground_distance >= height * hysteresis:
+                gear_sensor_upper[i] = True
+
+
+def sensor_sample(distance, received):   # fast path, called by the event loop for every filtered lidar sample
+    latency.sample_start(received)
+    global_situation['g_distance_valid'] = True
+    global_situation['g_distance'] = distance - zero_distance
+    calc_sensor_speaker(global_situation)
+    redraw = Globals.mode == Modes.COUNTDOWN_DISTANCE
+    if redraw and countdown_redraw is not None:
+        countdown_redraw.set()   # priority redraw by display task
+    latency.sample_done(redraw)
+
+
+async def wait_countdown_sample(timeout):   # returns when a new sample has to be drawn, latest after timeout
+    global last_countdown_frame
+
+    now = time.perf_counter()
+    if now - last_countdown_frame < COUNTDOWN_MIN_FRAME_TIME:   # limit frame rate, sensor may deliver 100/s
+        await asyncio.sleep(last_countdown_frame + COUNTDOWN_MIN_FRAME_TIME - now)
+        timeout = max(0.0, timeout - (time.perf_counter() - now))
+    if countdown_redraw is None:
+        await asyncio.sleep(timeout)
+    else:
+        try:
+            await asyncio.wait_for(countdown_redraw.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        countdown_redraw.clear()
+    last_countdown_frame = time.perf_counter()
 
 
 def is_airborne():
@@ -481,6 +599,7 @@ def start_countdown_screen():    # starts to show distance countdown
     if Globals.mode != Modes.COUNTDOWN_DISTANCE:
         switch_back_from_distance = Globals.mode
         Globals.mode = Modes.COUNTDOWN_DISTANCE
+        Globals.refresh = True
         rlog.debug(f"Automatic switching from {switch_back_from_distance.name} to COUNTDOWN_DISTANCE")
 
 
@@ -572,8 +691,21 @@ def calculate_output_values():  # return output lines
     return output
 
 
-def evaluate_statistics(latest_stat):   # called via store_statistics by ground reader
-    global statistics
+def stat_dict(row):   # converts one row of statistics to the dict used for situations and stored statistics
+    stat = {key: row[key].item() for key in STATS_KEYS}
+    clock_offset = time.time() - time.monotonic()   # now, system time may have been set from gps meanwhile
+    stat['Time'] = datetime.fromtimestamp(row['Time'] + clock_offset, timezone.utc)
+    return stat
+
+
+def last_stat(mask):   # newest row of statistics where mask is true as dict, {} if none
+    found = numpy.flatnonzero(mask)
+    if len(found) == 0:
+        return {}
+    return stat_dict(statistics.values()[found[-1]])
+
+
+def evaluate_statistics(latest_stat):   # called via store_statistics by ground reader, latest_stat is situation
     global fly_status
     global runup_situation
     global start_situation
@@ -585,34 +717,34 @@ def evaluate_statistics(latest_stat):   # called via store_statistics by ground
     if fly_status == 0:  # run up
         if is_airborne():
             fly_status = 1  # start detected
-            start_situation = latest_stat  # store this value
+            start_situation = stat_dict(statistics[-1])  # store this value
             obstacle_down_clear = {}  # in case a second start is done, clear all values
             obstacle_up_clear = {}
             landing_situation = {}
             stop_situation = {}
             rlog.debug("Grounddistance: Start detected " +
                        json.dumps(start_situation, indent=4, sort_keys=True, default=str))
-            for stat in reversed(statistics):  # ... find begin of start where gps_speed <= STOP_SPEED
-                if stat['gps_active'] and stat['gps_speed'] <= STOP_SPEED:
-                    runup_situation = stat
-                    break
+            stats = statistics.values()   # ... find begin of start where gps_speed <= STOP_SPEED
+            runup = last_stat(stats['gps_active'] & (stats['gps_speed'] <= STOP_SPEED))
+            if runup:
+                runup_situation = runup
     elif fly_status == 1:  # start was detected
-        if obstacle_up_clear:  # do not search for if already set
+        if not obstacle_up_clear:  # do not search for if already set
             if latest_stat['baro_valid'] and start_situation['baro_valid'] and \
                     obstacle_is_clear(latest_stat['own_altitude'], start_situation['own_altitude'] + OBSTACLE_HEIGHT):
-                obstacle_up_clear = latest_stat
+                obstacle_up_clear = stat_dict(statistics[-1])
                 rlog.debug("Grounddistance: Obstacle clearance up detected " +
                            json.dumps(obstacle_up_clear, indent=4, sort_keys=True, default=str))
         if has_landed():
             fly_status = 2
-            landing_situation = latest_stat
+            landing_situation = stat_dict(statistics[-1])
             rlog.debug("Grounddistance: Landing detected " +
                        json.dumps(landing_situation, indent=4, sort_keys=True, default=str))
             if not obstacle_down_clear:
-                for stat in reversed(statistics):
+                for stat in reversed(statistics.values()):
                     if stat['baro_valid'] and landing_situation['baro_valid'] and \
                       obstacle_is_clear(stat['own_altitude'], landing_situation['own_altitude'] + OBSTACLE_HEIGHT):
-                        obstacle_down_clear = stat
+                        obstacle_down_clear = stat_dict(stat)
                         rlog.debug("Grounddistance: Obstacle clearance down found " +
                                    json.dumps(obstacle_down_clear, indent=4, sort_keys=True, default=str))
                         break
@@ -622,7 +754,7 @@ def evaluate_statistics(latest_stat):   # called via store_statistics by ground
             rlog.debug(f"Back switching from COUNTDOWN_DISTANCE to {switch_back_from_distance.value}")
         if has_stopped():
             fly_status = 0
-            stop_situation = latest_stat
+            stop_situation = stat_dict(statistics[-1])
             rlog.debug("Grounddistance: Stop detected " +
                        json.dumps(stop_situation, indent=4, sort_keys=True, default=str))
             write_stats()
@@ -664,42 +796,40 @@ def store_statistics(sit):   # called from read_ground_sensor
 
     if time.perf_counter() > stats_next_store:
         stats_next_store = time.perf_counter() + (1 / STATS_PER_SECOND)
-        now = datetime.now(timezone.utc)
-        stat_value = {'Time': now, 'baro_valid': sit['baro_valid'], 'own_altitude': sit['own_altitude'],
-                      'gps_active': sit['gps_active'], 'longitude': sit['longitude'], 'latitude': sit['latitude'],
-                      'gps_speed': sit['gps_speed'], 'gps_altitude': sit['gps_altitude'],
-                      'gps_h_accuracy': sit['gps_h_accuracy'], 'gps_v_accuracy': sit['gps_v_accuracy'],
-                      'g_distance_valid': sit['g_distance_valid'], 'g_distance': sit['g_distance'],
-                      'gear_down': sit['gear_down']}
-        statistics.append(stat_value)
-        if len(statistics) > stats_max_values:     # sliding window, remove old values
-            statistics.pop(0)
-        evaluate_statistics(stat_value)
+        # sliding window, oldest value is overwritten. Converted to dict only for situations and stored statistics
+        statistics.append((time.monotonic(),) + tuple(sit[key] for key in STATS_KEYS))
+        evaluate_statistics(sit)
 
 
 async def read_ground_sensor():
     global zero_distance
+    global sample_fast_path
+    global countdown_redraw
 
     if ground_distance_active:
         rlog.debug("Ground distance reader active ...")
-        if not simulation_mode:
-            distance_sensor.calc_distance()
-            new_zero_distance = distance_sensor.last_distance()  # distance in mm this is zero
-        else:
-            new_zero_distance = 1     # just take one mm as zero distance for simulation
-        if new_zero_distance > 0:
-            zero_distance = new_zero_distance  # distance in mm this is zero
-            rlog.debug('Ground Zero Distance: {0:5.2f} cm'.format(zero_distance / 10))
-        else:
-            rlog.debug('Ground Zero Distance: Error reading ground distance, not set')
         try:
-            next_read = time.perf_counter() + (1 / MEASUREMENTS_PER_SECOND)
+            if not simulation_mode:
+                distance_sensor.start(asyncio.get_running_loop())
+                await asyncio.sleep(ZERO_DISTANCE_WAIT)   # collect first frames
+                new_zero_distance = distance_sensor.last_distance()  # distance in mm this is zero
+            else:
+                new_zero_distance = 1     # just take one mm as zero distance for simulation
+            if new_zero_distance > 0:
+                zero_distance = new_zero_distance  # distance in mm this is zero
+                rlog.debug('Ground Zero Distance: {0:5.2f} cm'.format(zero_distance / 10))
+            else:
+                rlog.debug('Ground Zero Distance: Error reading ground distance, not set')
+            countdown_redraw = asyncio.Event()
+            if not simulation_mode:   # from now on every filtered sample is evaluated immediately
+                distance_sensor.on_sample = sensor_sample
+                sample_fast_path = True
+            next_read = time.perf_counter() + (1 / measurements_per_second)
             while True:
                 now = time.perf_counter()
                 await asyncio.sleep(next_read - now)  # wait for next time of measurement
-                next_read = next_read + (1 / MEASUREMENTS_PER_SECOND)
-                if not simulation_mode:  # read sensor
-                    distance_sensor.calc_distance()
+                next_read = next_read + (1 / measurements_per_second)
+                if not simulation_mode:  # frames are read by event loop, take filtered distance
                     distance = distance_sensor.last_distance()  # distance in mm
                     if distance > 0:    # distance==0 is invalid distance
                         global_situation['g_distance_valid'] = True
@@ -718,10 +848,15 @@ async def read_ground_sensor():
                         global_situation['gear_down'] = False   # must be set to make sure key is present
                 else: # simulation mode
                     sim_data = simulation.read_simulation_data()
+                    metrics.sensor_reads.inc('lidar')
                     eval_simulation_data(sim_data, global_situation)
 
                 store_statistics(global_situation)
         except (asyncio.CancelledError, RuntimeError):
+            if not simulation_mode:
+                distance_sensor.on_sample = None
+                sample_fast_path = False
+                distance_sensor.stop(asyncio.get_running_loop())
             rlog.debug("Ground distance reader terminating ...")
 
 
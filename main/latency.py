@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Message to pixel latency: traffic messages are tagged with the time they arrive in listen_forever, the tag is
+# carried through new_traffic and draw_display until the frame is on the glass. This is when display_control.display()
+# returned, for epaper panels which refresh asynchronously it is when the panel reports not busy after the flush.
+# Speech is measured from radarbluez.speak() until the sound was handed over to the mixer.
+# Ground distance samples are measured from the time the lidar bytes were read until the warning sound was handed
+# over to the mixer and until the countdown frame showing it is on the glass.
+# All stages are kept per display type, measurement is off unless init() was called.
+
+import time
+import math
+import asyncio
+from collections import deque
+from globals import rlog
+
+# constants
+LATENCY_SAMPLES = 5000   # samples kept per stage for percentiles
+MAX_PENDING = 1000   # max number of tagged messages waiting for the next draw
+GLASS_POLL_TIME = 0.005   # secs between polls of a busy panel, resolution of the glass time on epaper
+HISTOGRAM_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)   # upper bucket limits in ms
+STAGES = ('ingest_to_draw', 'draw_to_glass', 'ingest_to_glass', 'speak_to_audio', 'sample_to_audio',
+          'sample_to_glass')
+
+# globals
+active = False
+display_name = "unknown"
+ingest_time = 0.0   # arrival time of the message currently handled
+pending = []   # arrival times of traffic messages not yet drawn
+drawing = []   # arrival times of traffic messages in the frame currently drawn
+draw_time = 0.0   # time drawing of the current frame started
+speech_pending = {}   # text -> time speak was called
+sample_time = 0.0   # time of the ground distance sample currently evaluated
+samples_pending = []   # times of ground distance samples not yet shown on the countdown screen
+glass_display = None   # display control of a panel still refreshing the flushed frames
+flushed = []   # functions recording the flushed frames once they are on the glass
+stats = {}   # display name -> stage -> LatencyStats
+
+
+class LatencyStats:
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_SAMPLES)   # in ms
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)   # last bucket counts everything above
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.max = max(self.max, ms)
+        for i, limit in enumerate(HISTOGRAM_BUCKETS):
+            if ms <= limit:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+    def summary(self):
+        histogram = {f"<={limit}ms": self.buckets[i] for i, limit in enumerate(HISTOGRAM_BUCKETS)}
+        histogram[f">{HISTOGRAM_BUCKETS[-1]}ms"] = self.buckets[-1]
+        return {'count': self.count, 'mean': sum(self.samples) / len(self.samples) if self.samples else 0.0,
+                'p50': self.percentile(50), 'p95': self.percentile(95), 'p99': self.percentile(99),
+                'max': self.max, 'histogram': histogram}
+
+
+def init(name):
+    global active
+    global display_name
+
+    display_name = name
+    stats.setdefault(name, {stage: LatencyStats() for stage in STAGES})
+    active = True
+    rlog.debug(f"Latency: Measuring message to display latency for '{name}'")
+
+
+def reset():
+    global ingest_time
+    global draw_time
+    global sample_time
+    global glass_display
+
+    ingest_time = 0.0
+    draw_time = 0.0
+    sample_time = 0.0
+    glass_display = None
+    flushed.clear()
+    pending.clear()
+    samples_pending.clear()
+    drawing.clear()
+    speech_pending.clear()
+    stats.pop(display_name, None)
+    if active:
+        stats[display_name] = {stage: LatencyStats() for stage in STAGES}
+
+
+def record(stage, ms):
+    stats[display_name][stage].add(ms)
+
+
+def ingest():   # called when a message arrives, before the callback is invoked
+    global ingest_time
+
+    if active:
+        ingest_time = time.perf_counter()
+
+
+def traffic_changed():   # called in new_traffic, message will show up with the next drawn frame
+    if active and ingest_time > 0 and len(pending) < MAX_PENDING:
+        pending.append(ingest_time)
+
+
+def draw_start():   # called when drawing of a new radar frame starts
+    global draw_time
+
+    if not active:
+        return
+    draw_time = time.perf_counter()
+    drawing.extend(pending)
+    pending.clear()
+    for t in drawing:
+        record('ingest_to_draw', (draw_time - t) * 1000)
+
+
+def poll_glass():   # scheduled in the event loop while the panel is refreshing
+    global glass_display
+
+    if glass_display is None:
+        return
+    if glass_display.is_busy():
+        asyncio.get_running_loop().call_later(GLASS_POLL_TIME, poll_glass)
+        return
+    now = time.perf_counter()
+    glass_display = None
+    for record_frame in flushed:
+        record_frame(now)
+    flushed.clear()
+
+
+def glass(display_control, record_frame):   # record_frame(now) once the flushed frame is visible
+    global glass_display
+
+    if display_control is None or not display_control.is_busy():
+        record_frame(time.perf_counter())
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:   # not called from the display task, nothing will poll the panel
+        record_frame(time.perf_counter())
+        return
+    flushed.append(record_frame)
+    if glass_display is None:
+        glass_display = display_control
+        loop.call_later(GLASS_POLL_TIME, poll_glass)
+
+
+def on_glass(display_control=None):   # called after display_control.display() returned
+    if not active or draw_time == 0:
+        return
+    start = draw_time
+    frame = list(drawing)
+    drawing.clear()
+
+    def record_frame(now):
+        record('draw_to_glass', (now - start) * 1000)
+        for t in frame:
+            record('ingest_to_glass', (now - t) * 1000)
+
+    glass(display_control, record_frame)
+
+
+def speak_queued(text):   # called when text is put into the speech queue
+    if active and len(speech_pending) < MAX_PENDING:
+        speech_pending[text] = time.perf_counter()
+
+
+def speak_played(text):   # called from the speaker thread when the sound was handed over to the mixer
+    if active:
+        start = speech_pending.pop(text, None)
+        if start is not None:
+            record('speak_to_audio', (time.perf_counter() - start) * 1000)
+
+
+def sample_start(t):   # called when evaluation of a filtered ground distance sample taken at t starts
+    global sample_time
+
+    if active:
+        sample_time = t
+
+
+def sample_spoken():   # called when a prepared warning sound was handed over to the mixer
+    if active and sample_time > 0:
+        record('sample_to_audio', (time.perf_counter() - sample_time) * 1000)
+
+
+def sample_done(redraw):   # called after evaluation of the sample, redraw if countdown screen will show it
+    global sample_time
+
+    if active and redraw and sample_time > 0 and len(samples_pending) < MAX_PENDING:
+        samples_pending.append(sample_time)
+    sample_time = 0.0
+
+
+def sample_on_glass(display_control=None):   # called after the countdown frame was displayed
+    if not active:
+        return
+    frame = list(samples_pending)
+    samples_pending.clear()
+
+    def record_frame(now):
+        for t in frame:
+            record('sample_to_glass', (now - t) * 1000)
+
+    glass(display_control, record_frame)
+
+
+def summary():
+    return {name: {stage: s.summary() for stage, s in stages.items()} for name, stages in stats.items()}
+
+
+def log_summary():
+    for name, stages in stats.items():
+        for stage, s in stages.items():
+            if s.count > 0:
+                rlog.debug(f"Latency {name} {stage}: {s.count} samples, p50 {s.percentile(50):.1f}ms "
+                           f"p95 {s.percentile(95):.1f}ms p99 {s.percentile(99):.1f}ms max {s.max:.1f}ms")
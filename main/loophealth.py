@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Loop health monitor: a heartbeat task measures the scheduling lag of the asyncio loop, a watchdog thread
+# samples the stack of the loop thread whenever the heartbeat is overdue. Every stall above the threshold is
+# logged with the code that blocked the loop and counted in the metrics. Summary is shown on the status screen.
+
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from pathlib import Path
+from collections import deque
+from globals import rlog
+import metrics
+
+# constants
+HEARTBEAT_INTERVAL = 0.1   # secs between two heartbeats
+STALL_THRESHOLD = 0.25   # default, a callback blocking the loop longer is reported as stall
+WATCHDOG_INTERVAL = 0.05   # secs between two checks of the watchdog thread
+LAG_WINDOW = 100   # number of heartbeats for recent lag statistics, 10 secs
+STALL_HISTORY = 20   # number of stalls kept for summary
+STACK_DEPTH = 12   # number of stack frames logged for a stall
+APP_DIR = str(Path(__file__).resolve().parent)   # frames in this directory are the radar's own code
+
+# globals
+threshold = STALL_THRESHOLD
+last_beat = 0.0   # monotonic time of last heartbeat, read by watchdog thread
+lags = deque(maxlen=LAG_WINDOW)
+stalls = deque(maxlen=STALL_HISTORY)   # (time, duration in secs, location)
+stall_count = 0
+sampled_stack = None   # (location, stack lines) captured by the watchdog during the current stall
+loop_thread_id = None
+running = False
+
+
+def offender(frame):   # innermost frame of the radar's own code, otherwise innermost frame
+    f = frame
+    while f is not None:
+        if f.f_code.co_filename.startswith(APP_DIR) and not f.f_code.co_filename.endswith('loophealth.py'):
+            return f"{Path(f.f_code.co_filename).name}:{f.f_lineno} {f.f_code.co_name}"
+        f = f.f_back
+    if frame is None:
+        return "unknown"
+    return f"{Path(frame.f_code.co_filename).name}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def watchdog():   # runs in its own thread, samples the loop thread if the heartbeat is overdue
+    global sampled_stack
+
+    sampled_beat = 0.0
+    while running:
+        time.sleep(WATCHDOG_INTERVAL)
+        beat = last_beat
+        if beat == 0.0 or beat == sampled_beat:
+            continue
+        if time.monotonic() - beat > threshold + HEARTBEAT_INTERVAL:
+            sampled_beat = beat   # sample only once per stall
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is not None:
+                sampled_stack = (offender(frame), traceback.format_stack(frame, limit=STACK_DEPTH))
+
+
+async def heartbeat():
+    global last_beat
+    global stall_count
+    global sampled_stack
+
+    try:
+        last_beat = time.monotonic()
+        while True:
+            expected = time.monotonic() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            last_beat = now
+            lags.append(lag)
+            metrics.loop_lag.observe(lag)
+            if lag > threshold:
+                stall_count += 1
+                metrics.loop_stalls.inc()
+                location, stack = sampled_stack if sampled_stack is not None else ("unknown", [])
+                stalls.append((time.time(), lag, location))
+                rlog.debug(f"LoopHealth: Loop blocked for {lag * 1000:.0f} ms in {location}\n" + "".join(stack))
+            sampled_stack = None
+    except (asyncio.CancelledError, RuntimeError):
+        rlog.debug("LoopHealth: heartbeat terminating ...")
+
+
+def max_lag():
+    return max(lags) if lags else 0.0
+
+
+def lag_percentile(p):
+    if not lags:
+        return 0.0
+    ordered = sorted(lags)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def reset():   # resets statistics, e.g. by user input on the perf screen
+    global stall_count
+
+    lags.clear()
+    stalls.clear()
+    stall_count = 0
+
+
+def mean_lag():
+    return sum(lags) / len(lags) if lags else 0.0
+
+
+def status_text():   # short summary for the status screen
+    text = f"Loop lag: {mean_lag() * 1000:.0f}/{max_lag() * 1000:.0f} ms\n"
+    text += f"Stalls: {stall_count}"
+    if stalls:
+        text += f" last {stalls[-1][1] * 1000:.0f} ms"
+    return text + "\n"
+
+
+def summary():
+    return {'mean_lag': mean_lag(), 'max_lag': max_lag(), 'stalls': stall_count,
+            'recent_stalls': [{'time': t, 'duration': d, 'location': loc} for t, d, loc in stalls]}
+
+
+def start(stall_threshold):   # called within the running loop
+    global threshold
+    global loop_thread_id
+    global running
+
+    threshold = stall_threshold
+    loop_thread_id = threading.get_ident()
+    asyncio.get_running_loop().slow_callback_duration = threshold   # used if asyncio debug mode is on
+    metrics.loop_lag_max.set_function(max_lag)
+    running = True
+    watchdog_thread = threading.Thread(target=watchdog, daemon=True)
+    watchdog_thread.start()
+    rlog.debug(f"LoopHealth: Monitoring loop, stall threshold {threshold * 1000:.0f} ms")
+    return asyncio.create_task(heartbeat())
+
+
+def stop():
+    global running
+
+    running = False
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Memory footprint instrumentation: periodic or on demand tracemalloc snapshots with the top allocators, the
+# growth against the first snapshot and the traced size per subsystem (radar module or library package), plus the
+# retained size of long living module globals registered via watch(). Reports go to the log and to the memory
+# directory, on demand snapshots are available on the metrics endpoint under /memory.
+
+import gc
+import os
+import sys
+import time
+import asyncio
+import threading
+import tracemalloc
+from pathlib import Path
+from collections import deque
+from globals import rlog
+import metrics
+
+# constants
+TRACE_FRAMES = 1   # frames stored per allocation, more frames cost memory and time on the pi zero
+TOP_ALLOCATORS = 15   # number of allocating lines in a report
+SIZE_LIMIT = 100000   # max number of objects visited when calculating a retained size
+APP_DIR = str(Path(__file__).resolve().parent)
+
+# globals
+report_dir = None
+interval = 0   # secs between periodic snapshots, 0 = off
+baseline = None   # first snapshot, growth is reported against it
+watched = {}   # name -> function returning the object to be measured
+report_lock = threading.Lock()   # reports are taken in the executor and in the metrics server thread
+
+
+def init(directory, snapshot_interval):
+    global report_dir
+    global interval
+
+    report_dir = Path(directory)
+    interval = snapshot_interval
+    metrics.memory_rss.set_function(rss_bytes)
+    if interval > 0:
+        tracemalloc.start(TRACE_FRAMES)
+        metrics.memory_traced.set_function(lambda: tracemalloc.get_traced_memory()[0])
+        metrics.add_page('/memory', report)
+        rlog.debug(f"MemWatch: tracemalloc started, snapshot every {interval} secs")
+
+
+def watch(name, getter):   # register a long living object, e.g. watch('all_ac', lambda: all_ac)
+    watched[name] = getter
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IOError, ValueError, IndexError):
+        return 0
+
+
+def retained_size(obj):   # size of obj and everything reachable via containers, shared objects counted once
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack and len(seen) < SIZE_LIMIT:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__') and not isinstance(o, type):
+            stack.append(o.__dict__)
+    return size
+
+
+def subsystem(filename):   # radar module name or top level package of a library
+    if filename.startswith(APP_DIR):
+        return Path(filename).stem
+    parts = Path(filename).parts
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in parts:
+            return parts[parts.index(marker) + 1].split('.')[0]
+    return 'python'
+
+
+def report():   # takes a snapshot and returns the report as text, takes long, do not call in the event loop
+    if not tracemalloc.is_tracing():
+        return "tracemalloc not active, start radar with option -memwatch\n"
+    with report_lock:
+        return locked_report()
+
+
+def locked_report():
+    global baseline
+
+    gc.collect()
+    snap = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    if baseline is None:
+        baseline = snap
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Memory report {time.strftime('%Y-%m-%d %H:%M:%S')}",
+             f"RSS {rss_bytes() / 1048576:.1f} MB, traced {current / 1048576:.1f} MB, peak {peak / 1048576:.1f} MB",
+             "", "Top allocators:"]
+    for stat in snap.statistics('lineno')[:TOP_ALLOCATORS]:
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size / 1024:9.1f} KB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+    lines += ["", "Growth since first snapshot:"]
+    for stat in snap.compare_to(baseline, 'lineno')[:TOP_ALLOCATORS]:
+        if stat.size_diff == 0:
+            break
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size_diff / 1024:+9.1f} KB {stat.count_diff:+8d} blocks  "
+                     f"{frame.filename}:{frame.lineno}")
+    per_subsystem = {}
+    for stat in snap.statistics('filename'):
+        name = subsystem(stat.traceback[0].filename)
+        per_subsystem[name] = per_subsystem.get(name, 0) + stat.size
+    lines += ["", "Traced size per subsystem:"]
+    for name, size in sorted(per_subsystem.items(), key=lambda x: -x[1]):
+        lines.append(f"  {size / 1024:9.1f} KB  {name}")
+    lines += ["", "Retained size of module globals:"]
+    for name, getter in watched.items():
+        try:
+            obj = getter()
+            count = len(obj) if hasattr(obj, '__len__') else 1
+            lines.append(f"  {retained_size(obj) / 1024:9.1f} KB {count:8d} items  {name}")
+        except (AttributeError, TypeError, ValueError, RuntimeError) as e:   # runtime error: changed while measured
+            lines.append(f"  {name}: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def write_report():
+    text = report()
+    filename = report_dir.joinpath(time.strftime("memory-%Y%m%d-%H%M%S.txt"))
+    try:
+        report_dir.mkdir(parents=True, exist_ok=True)
+        with open(filename, 'w') as f:
+            f.write(text)
+    except (OSError, IOError) as e:
+        rlog.debug(f"MemWatch: Error {e} writing {filename}")
+    rlog.debug("MemWatch: " + text)
+
+
+async def monitor():
+    if interval <= 0:
+        return
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.get_running_loop().run_in_executor(None, write_report)   # keep display and traffic going
+    except (asyncio.CancelledError, RuntimeError):
+        rlog.debug("MemWatch: monitor terminating ...")
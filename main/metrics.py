@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# In-process metrics registry. Counters, gauges and histograms are updated from the asyncio loop and from the
+# sensor and speaker threads. They are exported as prometheus text and json, either via the flask button api
+# (/metrics, /metrics.json) or via an own http server thread, so that a scrape never blocks the asyncio loop.
+
+import time
+import json
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from globals import rlog
+
+# constants
+RATE_WINDOW = 10   # seconds, window for the rates in json output
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)   # histogram buckets in seconds
+METRICS_HOST = "127.0.0.1"   # local endpoint only, use the button api via nginx for remote access
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# globals
+lock = threading.Lock()
+registry = {}   # name -> metric, in order of creation
+server = None
+pages = {}   # additional text pages on the metrics server, path -> function returning text
+display_flushes = 0   # number of display() calls, used to count drawn and skipped frames
+last_flush = 0.0   # duration of last display() call
+busy_total = 0.0   # accumulated busy time of the display
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = {}   # label value -> count
+        self.window = {}   # label value -> deque of [second, count] for rates
+
+    def inc(self, label_value=None, amount=1):
+        second = int(time.monotonic())
+        with lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+            slots = self.window.get(label_value)
+            if slots is None:
+                slots = self.window[label_value] = deque(maxlen=RATE_WINDOW + 1)
+            if slots and slots[-1][0] == second:
+                slots[-1][1] += amount
+            else:
+                slots.append([second, amount])
+
+    def rate(self, label_value):   # per second over the last RATE_WINDOW complete seconds
+        second = int(time.monotonic())
+        slots = self.window.get(label_value, ())
+        return sum(c for s, c in slots if second - RATE_WINDOW <= s < second) / RATE_WINDOW
+
+    def samples(self):
+        return [('', label_value, value) for label_value, value in self.values.items()]
+
+    def snapshot(self):
+        return {key_text(k): {'value': v, 'rate': round(self.rate(k), 2)} for k, v in self.values.items()}
+
+
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = {}
+        self.function = None   # if set, value is read at export time
+
+    def set(self, value, label_value=None):
+        self.values[label_value] = value
+
+    def set_function(self, function):
+        self.function = function
+
+    def current(self):
+        if self.function is not None:
+            try:
+                return {None: self.function()}
+            except (AttributeError, TypeError, ValueError):
+                return {}
+        return dict(self.values)
+
+    def samples(self):
+        return [('', label_value, value) for label_value, value in self.current().items()]
+
+    def snapshot(self):
+        return {key_text(k): v for k, v in self.current().items()}
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self.values = {}   # label value -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, label_value=None):
+        with lock:
+            v = self.values.get(label_value)
+            if v is None:
+                v = self.values[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, limit in enumerate(self.buckets):
+                if value <= limit:
+                    v[i] += 1
+                    break
+            else:
+                v[len(self.buckets)] += 1
+            v[-1] += value
+
+    def samples(self):
+        out = []
+        for label_value, v in self.values.items():
+            cumulative = 0
+            for i, limit in enumerate(self.buckets):
+                cumulative += v[i]
+                out.append(('_bucket', label_value, cumulative, f'le="{limit}"'))
+            count = cumulative + v[len(self.buckets)]
+            out.append(('_bucket', label_value, count, 'le="+Inf"'))
+            out.append(('_sum', label_value, v[-1]))
+            out.append(('_count', label_value, count))
+        return out
+
+    def snapshot(self):
+        result = {}
+        for label_value, v in self.values.items():
+            count = sum(v[:-1])
+            result[key_text(label_value)] = {'count': count, 'sum': round(v[-1], 6),
+                                        'mean': round(v[-1] / count, 6) if count else 0.0,
+                                        'buckets': {str(limit): v[i] for i, limit in enumerate(self.buckets)}}
+        return result
+
+
+def key_text(label_value):   # key in json output, metrics without label have a single value 'all'
+    return 'all' if label_value is None else str(label_value)
+
+
+def register(metric):
+    registry[metric.name] = metric
+    return metric
+
+
+# metrics of the radar, updated by the modules
+messages = register(Counter('radar_messages_total', 'Messages received per websocket handler', 'handler'))
+traffic_sources = register(Counter('radar_traffic_messages_total', 'Traffic messages per source', 'source'))
+decode_errors = register(Counter('radar_decode_errors_total', 'Messages with missing keys', 'handler'))
+reconnects = register(Counter('radar_reconnects_total', 'Websocket reconnects per handler', 'handler'))
+targets = register(Gauge('radar_targets', 'Number of tracked traffic targets'))
+frames_drawn = register(Counter('radar_frames_drawn_total', 'Display loop cycles with a display update', 'mode'))
+frames_skipped = register(Counter('radar_frames_skipped_total', 'Display loop cycles without update', 'mode'))
+flush_time = register(Histogram('radar_display_flush_seconds', 'Time for display_control.display()'))
+busy_time = register(Histogram('radar_display_busy_seconds', 'Time the display was busy after an update'))
+speech_queue = register(Gauge('radar_speech_queue_depth', 'Sentences waiting for speech output'))
+tts_time = register(Histogram('radar_tts_seconds', 'Time for text to speech generation'))
+sensor_reads = register(Counter('radar_sensor_reads_total', 'Sensor reads', 'sensor'))
+loop_lag = register(Histogram('radar_loop_lag_seconds', 'Scheduling lag of the asyncio loop'))
+loop_lag_max = register(Gauge('radar_loop_lag_max_seconds', 'Max scheduling lag in the last 10 secs'))
+loop_stalls = register(Counter('radar_loop_stalls_total', 'Callbacks blocking the loop above the threshold'))
+memory_rss = register(Gauge('radar_memory_rss_bytes', 'Resident set size of the radar process'))
+memory_traced = register(Gauge('radar_memory_traced_bytes', 'Memory traced by tracemalloc'))
+
+
+def label_text(metric, label_value, extra=None):
+    parts = []
+    if metric.label is not None and label_value is not None:
+        parts.append(f'{metric.label}="{label_value}"')
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def prometheus_text():
+    lines = []
+    with lock:
+        for metric in registry.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample in metric.samples():
+                suffix, label_value, value = sample[0], sample[1], sample[2]
+                extra = sample[3] if len(sample) > 3 else None
+                lines.append(f"{metric.name}{suffix}{label_text(metric, label_value, extra)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def snapshot():
+    with lock:
+        return {name: {'type': metric.kind, 'values': metric.snapshot()} for name, metric in registry.items()}
+
+
+def count_frame(mode, flushes_before):   # called once per display loop cycle
+    if display_flushes > flushes_before:
+        frames_drawn.inc(mode.name)
+    else:
+        frames_skipped.inc(mode.name)
+
+
+def instrument_display(display_control):
+    # wraps display() and is_busy() of the display controller instance to measure flush and busy time
+    display = display_control.display
+    is_busy = display_control.is_busy
+    busy_state = {'since': None, 'was_busy': False}
+
+    def timed_display(*args, **kwargs):
+        global display_flushes
+        global last_flush
+
+        start = time.perf_counter()
+        display(*args, **kwargs)
+        end = time.perf_counter()
+        last_flush = end - start
+        flush_time.observe(last_flush)
+        display_flushes += 1
+        busy_state['since'] = end
+        busy_state['was_busy'] = False
+
+    def timed_is_busy():
+        global busy_total
+
+        busy = is_busy()
+        if busy:
+            busy_state['was_busy'] = True
+        elif busy_state['since'] is not None:
+            if busy_state['was_busy']:
+                busy_time.observe(time.perf_counter() - busy_state['since'])
+                busy_total += time.perf_counter() - busy_state['since']
+            busy_state['since'] = None
+        return busy
+
+    display_control.display = timed_display
+    display_control.is_busy = timed_is_busy
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):   # noqa: N802
+        if self.path == '/metrics':
+            body = prometheus_text().encode()
+            content_type = PROMETHEUS_CONTENT_TYPE
+        elif self.path == '/metrics.json':
+            body = json.dumps(snapshot()).encode()
+            content_type = 'application/json'
+        elif self.path in pages:
+            body = pages[self.path]().encode()
+            content_type = 'text/plain; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):   # no access log on stderr
+        pass
+
+
+def add_page(path, function):   # e.g. memory reports, function is called in the http server thread
+    pages[path] = function
+
+
+def start_server(port):
+    global server
+
+    if port <= 0:
+        return
+    try:
+        server = ThreadingHTTPServer((METRICS_HOST, port), MetricsHandler)
+    except OSError as e:
+        rlog.debug(f"Metrics: Error {e} starting metrics server on port {port}")
+        return
+    server.daemon_threads = True
+    metrics_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    metrics_thread.start()
+    rlog.debug(f"Metrics: Serving /metrics and /metrics.json on {METRICS_HOST}:{port}")
+
+
+def stop_server():
+    if server is not None:
+        server.shutdown()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+import os
+import time
+import radarbuttons
+import radarmodes
+import metrics
+import loophealth
+from globals import rlog, Modes
+
+# constants
+PERF_MIN_INTERVAL = 1.0   # secs between two updates on fast displays (TFT, OLED)
+PERF_REFRESH_FACTOR = 5   # on slow displays (e-paper) wait this multiple of the display refresh time
+CPU_TEMP_FILE = "/sys/class/thermal/thermal_zone0/temp"
+
+# globals
+update_interval = PERF_MIN_INTERVAL
+last_draw = 0.0   # monotonic time of last drawing
+last_flushes = 0   # metrics.display_flushes at last drawing
+last_busy = 0.0   # metrics.busy_total at last drawing
+perfui_changed = True
+
+
+def init(display_refresh_time):
+    global update_interval
+
+    update_interval = max(PERF_MIN_INTERVAL, display_refresh_time * PERF_REFRESH_FACTOR)
+    rlog.debug(f"PerfUI: Initialized with update interval {update_interval:.1f} secs")
+
+
+def cpu_temperature():
+    try:
+        with open(CPU_TEMP_FILE) as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, IOError, ValueError):
+        return None
+
+
+def rss_megabytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, IOError, ValueError, IndexError):
+        return None
+
+
+def draw_perf(display_control, changed):
+    global last_draw
+    global last_flushes
+    global last_busy
+    global perfui_changed
+
+    now = time.monotonic()
+    if not (changed or perfui_changed) and now - last_draw < update_interval:
+        return
+    elapsed = now - last_draw if last_draw > 0 else 0.0
+    fps = (metrics.display_flushes - last_flushes) / elapsed if elapsed > 0 else 0.0
+    busy = (metrics.busy_total - last_busy) / elapsed * 100 if elapsed > 0 else 0.0
+    last_draw = now
+    last_flushes = metrics.display_flushes
+    last_busy = metrics.busy_total
+    perfui_changed = False
+
+    temp = cpu_temperature()
+    rss = rss_megabytes()
+    display_lines = [
+        ("Frames/s", f"{fps:.1f}"),
+        ("Flush", f"{metrics.last_flush * 1000:.0f}ms"),
+        ("Busy", f"{min(busy, 100):.0f}%"),
+        ("Lag p95", f"{loophealth.lag_percentile(95) * 1000:.0f}ms"),
+        ("Targets", f"{metrics.targets.current().get(None, 0)}")
+    ]
+    system_lines = [
+        ("Traffic", f"{metrics.messages.rate('TrafficHandler'):.1f}/s"),
+        ("Situation", f"{metrics.messages.rate('SituationHandler'):.1f}/s"),
+        ("Status", f"{metrics.messages.rate('StatusListener'):.1f}/s"),
+        ("CPU", f"{temp:.0f}°C" if temp is not None else "---"),
+        ("RSS", f"{rss:.0f}MB" if rss is not None else "---")
+    ]
+    display_control.clear()
+    display_control.perf(display_lines, system_lines)
+    display_control.display()
+    # the drawing of the perf screen itself is not counted for the next frames/s value
+    last_flushes = metrics.display_flushes
+
+
+def user_input():
+    global perfui_changed
+
+    btime, button = radarbuttons.check_buttons()
+    if btime == 0:
+        return Modes.NO_CHANGE  # stay in current mode
+    perfui_changed = True
+    if button == 1 and (btime == 1 or btime == 2):  # middle in any case
+        return radarmodes.next_mode_sequence(Modes.PERF)
+    if button == 0 and btime == 2:  # left and long
+        return Modes.SHUTDOWN  # start next mode shutdown!
+    if button == 2 and btime == 2:  # right and long, refresh
+        return Modes.REFRESH_PERF  # start next mode for display driver: refresh called from perf
+    if button == 2 and btime == 1:  # right and short, reset loop lag statistics
+        loophealth.reset()
+        return Modes.PERF
+    return Modes.PERF  # no mode change
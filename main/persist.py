@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Persistence worker: config, flight and statistics files are written by one thread, off the event loop.
+# write() replaces a file atomically (temp file, fsync, rename). A write of a file which is still waiting
+# replaces the waiting content, so rapid successive writes of the same file are coalesced.
+# call() runs a function in the worker, in order with all other requests (e.g. appending statistics).
+# Before init() or after stop() everything is done synchronously. stop() flushes, called in quit_gracefully.
+
+import os
+import json
+import threading
+import itertools
+from collections import OrderedDict
+from globals import rlog
+
+# constants
+FLUSH_TIMEOUT = 10.0   # max secs to wait for pending writes when flushing
+
+# globals
+pending = OrderedDict()   # key -> (function, args), file writes are keyed by path, calls by a sequence number
+condition = threading.Condition()
+call_numbers = itertools.count()
+worker = None
+running = False
+busy = False   # worker is executing a request
+written = 0   # number of files written
+coalesced = 0   # number of writes replaced by a newer write of the same file
+
+
+def write_atomic(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)   # make rename persistent
+    finally:
+        os.close(directory)
+
+
+def execute(function, args):
+    global written
+
+    try:
+        function(*args)
+        if function is write_atomic:
+            written += 1
+    except Exception as e:   # worker must survive any error of a request, e.g. a value not serializable
+        rlog.debug(f"Persist: Error {e} in {function.__name__} {args[0] if args else ''}")
+
+
+def submit(key, function, args):
+    global coalesced
+
+    with condition:
+        if running and worker.is_alive():
+            if key in pending:
+                coalesced += 1
+            pending[key] = (function, args)   # replacing keeps the position in the queue
+            condition.notify_all()
+            return
+    execute(function, args)
+
+
+def write(path, data):   # data as bytes or str
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    submit(('write', str(path)), write_atomic, (str(path), data))
+
+
+def write_json(path, obj, default=None):   # serialized immediately, later changes of obj are not written
+    text = json.dumps(obj, sort_keys=True, indent=4, default=default)
+    write(path, text)
+    return text
+
+
+def call(function, *args):
+    submit(('call', next(call_numbers)), function, args)
+
+
+def run():
+    global busy
+
+    rlog.debug("Persist: Worker thread active.")
+    while True:
+        with condition:
+            while running and not pending:
+                condition.wait()
+            if not pending:
+                break
+            _, (function, args) = pending.popitem(last=False)
+            busy = True
+        execute(function, args)
+        with condition:
+            busy = False
+            condition.notify_all()
+    rlog.debug(f"Persist: Worker thread terminated, {written} files written, {coalesced} writes coalesced.")
+
+
+def init():
+    global worker
+    global running
+
+    if worker is not None:
+        return
+    running = True
+    worker = threading.Thread(target=run, name='persist', daemon=True)
+    worker.start()
+
+
+def flush(timeout=FLUSH_TIMEOUT):   # waits until all pending requests are done, True if successful
+    with condition:
+        done = condition.wait_for(lambda: not pending and not busy, timeout)
+    if not done:
+        rlog.debug(f"Persist: Flush timed out, {len(pending)} requests pending")
+    return done
+
+
+def stop():
+    global worker
+    global running
+
+    if worker is None:
+        return
+    flush()
+    with condition:
+        running = False
+        condition.notify_all()
+    worker.join(FLUSH_TIMEOUT)
+    worker = None
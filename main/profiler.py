@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Sampling profiler: a thread samples the stack of the asyncio loop thread in a fixed interval and counts
+# collapsed stacks (flamegraph format "frame;frame;frame count"). Asyncio internals are removed, so that each
+# stack starts with the coroutine that was running (listen_forever, display_and_cutoff, user_interface, ...).
+# Started for a window by option --profile or at runtime by SIGUSR1, result is written to the log directory.
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from collections import Counter
+from globals import rlog
+
+# constants
+SAMPLE_INTERVAL = 0.01   # default, secs between two samples
+PROFILE_WINDOW = 60.0   # default, secs profiled after SIGUSR1
+MAX_STACK_DEPTH = 64
+ASYNCIO_DIR = str(Path(asyncio.__file__).resolve().parent)   # frames of asyncio itself are not recorded
+IDLE_FUNCTIONS = ('select', 'poll', 'epoll')   # loop is waiting for events
+
+# globals
+profile_dir = None
+window = PROFILE_WINDOW
+interval = SAMPLE_INTERVAL
+loop_thread_id = None
+sampler_thread = None
+running = False
+
+
+def init(directory, default_window=PROFILE_WINDOW, sample_interval=SAMPLE_INTERVAL):
+    global profile_dir
+    global window
+    global interval
+    global loop_thread_id
+
+    profile_dir = Path(directory)
+    window = default_window if default_window > 0 else PROFILE_WINDOW
+    interval = sample_interval
+    loop_thread_id = threading.get_ident()   # init is called from the thread running the asyncio loop
+    rlog.debug(f"Profiler: Initialized, window {window} secs, interval {interval * 1000:.0f} ms, "
+               f"send SIGUSR1 to start")
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def is_asyncio(frame):
+    return frame.f_code.co_filename.startswith(ASYNCIO_DIR)
+
+
+def collapse(frame):   # returns collapsed stack from outer to inner frame, asyncio internals removed
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    # the innermost Handle._run of asyncio is the callback currently executed by the loop, frames
+    # below are the running coroutine, frames above are asyncio.run and main
+    boundary = None
+    for i, f in enumerate(frames):
+        if f.f_code.co_name == '_run' and is_asyncio(f):
+            boundary = i
+    if boundary is not None:
+        frames = [f for f in frames[boundary + 1:] if not is_asyncio(f)]
+    elif any(is_asyncio(f) for f in frames):   # loop is not executing a callback
+        return "(idle)" if frames[-1].f_code.co_name in IDLE_FUNCTIONS else "(asyncio)"
+    if not frames:
+        return "(asyncio)"
+    return ";".join(frame_name(f) for f in frames)
+
+
+def sample(end_time):
+    global running
+
+    counts = Counter()
+    started = time.time()
+    while running and time.monotonic() < end_time:
+        frame = sys._current_frames().get(loop_thread_id)
+        if frame is not None:
+            counts[collapse(frame)] += 1
+        del frame
+        time.sleep(interval)
+    running = False
+    write_profile(counts, started)
+
+
+def write_profile(counts, started):
+    total = sum(counts.values())
+    if total == 0:
+        rlog.debug("Profiler: No samples recorded")
+        return
+    filename = profile_dir.joinpath(time.strftime("profile-%Y%m%d-%H%M%S.collapsed", time.localtime(started)))
+    try:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        with open(filename, 'w') as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+    except (OSError, IOError) as e:
+        rlog.debug(f"Profiler: Error {e} writing {filename}")
+        return
+    roots = Counter()
+    for stack, count in counts.items():
+        roots[stack.split(';')[0]] += count
+    rlog.debug(f"Profiler: {total} samples written to {filename}")
+    for root, count in roots.most_common():
+        rlog.debug(f"Profiler: {root:<40} {count * 100 / total:5.1f}%")
+
+
+def start(seconds=None):
+    global running
+    global sampler_thread
+
+    if running or profile_dir is None:
+        return False
+    seconds = seconds or window
+    running = True
+    sampler_thread = threading.Thread(target=sample, args=(time.monotonic() + seconds,), daemon=True)
+    sampler_thread.start()
+    rlog.debug(f"Profiler: Sampling for {seconds} secs")
+    return True
+
+
+def trigger(*args):   # signal handler for SIGUSR1
+    start()
+
+
+def stop():   # writes a partial profile if still running
+    global running
+
+    if running:
+        running = False
+        sampler_thread.join(timeout=2)
@@ -45,6 +45,7 @@ import alsaaudio
 import subprocess
 from werkzeug.utils import secure_filename
 import xmltodict
+from pathlib import Path
 
 from flask import Flask, render_template, request, flash, redirect, url_for, send_from_directory
 from markupsafe import Markup
@@ -135,6 +136,7 @@ class ChecklistForm(FlaskForm):
 class DisplayLogForm(FlaskForm):
     exit = SubmitField('Back to configuration')
     reload = SubmitField('Reload Log File')
+    blackbox = SubmitField('Dump black box')
 
 class RadarForm(FlaskForm):
     stratux_ip = StringField('IP address of Stratux', default='192.168.10.1', validators=[IPAddress()])
@@ -167,6 +169,8 @@ class RadarForm(FlaskForm):
     stratux_seq = IntegerField('', default=11, validators=[NumberRange(min=1, max=MAX_SEQUENCE)])
     checklist = SwitchField('Checklists', default=False)
     checklist_seq = IntegerField('', default=12, validators=[NumberRange(min=1, max=MAX_SEQUENCE)])
+    perf = SwitchField('Performance', default=False)
+    perf_seq = IntegerField('', default=13, validators=[NumberRange(min=1, max=MAX_SEQUENCE)])
     checklist_filename = StringField(f'Local checklist file (in "{arguments.FULL_CONFIG_DIR}")',
                                      default=arguments.DEFAULT_CHECKLIST)
     download_checklist = SubmitField('Download checklist')
@@ -292,7 +296,7 @@ def find_line_in_file(file_path, word):
     return None
 
 modes = { 'R': 'radar', 'T': 'timer', 'A': 'ahrs', 'D': 'status', 'G': 'gmeter','K': 'compass','V': 'vspeed',
-        'S': 'stratux', 'I': 'flogs', 'C': 'cowarner', 'M': 'gps_dist', 'L': 'checklist'}
+        'S': 'stratux', 'I': 'flogs', 'C': 'cowarner', 'M': 'gps_dist', 'L': 'checklist', 'P': 'perf'}
 
 def parsemodes(options, radarform):
     rlog.debug(f'parsing options: {options}')
@@ -586,6 +590,13 @@ def display_log():
             return redirect(url_for('index'))
         if dlf.reload.data is True:
             return redirect(url_for('display_log'))
+        if dlf.blackbox.data is True:
+            # radar.py dumps its black box on SIGUSR2
+            if subprocess.run(['pkill', '-USR2', '-f', 'radar.py']).returncode == 0:
+                flash(Markup('Black box dump requested'), 'success')
+            else:
+                flash(Markup('Radar process not running, no black box dump'), 'error')
+            return redirect(url_for('blackbox'))
     try:
         with open(arguments.FULL_LOG_FILE, "r") as f:
             content = f.read()
@@ -595,6 +606,44 @@ def display_log():
         content = f"Error reading log file: {str(e)}"
     return render_template('display_log.html', display_log_form=dlf, content=content)
 
+@app.route('/profiles', methods=['GET'])
+def profiles():
+    watchdog.refresh()
+    try:
+        files = sorted((f.name for f in Path(arguments.FULL_PROFILE_DIR).glob('*.collapsed')), reverse=True)
+    except OSError:
+        files = []
+    return render_template('profiles.html', files=files, profile_dir=arguments.FULL_PROFILE_DIR)
+
+@app.route('/profiles/<filename>', methods=['GET'])
+def download_profile(filename):
+    watchdog.refresh()
+    return send_from_directory(arguments.FULL_PROFILE_DIR, secure_filename(filename), as_attachment=True)
+
+@app.route('/blackbox', methods=['GET'])
+def blackbox():
+    watchdog.refresh()
+    try:
+        files = sorted((f.name for f in Path(arguments.FULL_BLACKBOX_DIR).glob('*.srec')), reverse=True)
+    except OSError:
+        files = []
+    try:
+        frame_files = sorted((f.name for f in Path(arguments.FULL_FRAMES_DIR).glob('*.srfr')), reverse=True)
+    except OSError:
+        frame_files = []
+    return render_template('blackbox.html', files=files, blackbox_dir=arguments.FULL_BLACKBOX_DIR,
+                           frame_files=frame_files, frames_dir=arguments.FULL_FRAMES_DIR)
+
+@app.route('/blackbox/<filename>', methods=['GET'])
+def download_blackbox(filename):
+    watchdog.refresh()
+    return send_from_directory(arguments.FULL_BLACKBOX_DIR, secure_filename(filename), as_attachment=True)
+
+@app.route('/frames/<filename>', methods=['GET'])
+def download_frames(filename):
+    watchdog.refresh()
+    return send_from_directory(arguments.FULL_FRAMES_DIR, secure_filename(filename), as_attachment=True)
+
 if __name__ == '__main__':
     print("Stratux Radar Web Configuration Server " + RADAR_WEB_VERSION + " running ...")
     logging_init()
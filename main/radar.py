@@ -59,6 +59,16 @@ import grounddistance
 import radarmodes
 import simulation
 import checklist
+import recorder
+import latency
+import metrics
+import loophealth
+import perfui
+import profiler
+import memwatch
+import blackbox
+import framering
+import persist
 import logging
 from logging.handlers import RotatingFileHandler
 
@@ -81,7 +91,6 @@ POSITION_VALID_DELTA = 10.0   # time a received position is assumed valid, e.g.
 # flarm is no more received, but only mode-s. Than switch back and display circle
 UI_REACTION_TIME = 0.1
 MINIMAL_WAIT_TIME = 0.01  # give other coroutines some time to do their jobs
-BLUEZ_CHECK_TIME = 3.0
 SPEED_ARROW_TIME = 60  # time in seconds for the line that displays the speed
 WATCHDOG_TIMER = 3.0  # time after "no connection" is assumed, if no new situation is received
 CHECK_CONNECTION_TIMEOUT = 5.0
@@ -100,7 +109,8 @@ SOURCE_FLARM = 4   # source identifier from stratux
 
 CONFIG_FILE = str(Path(arguments.FULL_CONFIG_DIR).joinpath("stratux-radar.conf"))
 SAVED_FLIGHTS = str(Path(arguments.FULL_CONFIG_DIR).joinpath("stratux-radar.flights"))
-SAVED_STATISTICS = str(Path(arguments.FULL_CONFIG_DIR).joinpath("stratux-radar.stat"))
+SAVED_STATISTICS = str(Path(arguments.FULL_CONFIG_DIR).joinpath("stratux-radar.stats"))
+LEGACY_STATISTICS = str(Path(arguments.FULL_CONFIG_DIR).joinpath("stratux-radar.stat"))   # json lines, imported
 
 # Display control object
 display_control = None
@@ -139,7 +149,6 @@ ahrs = {'was_changed': True, 'pitch': 0, 'roll': 0, 'heading': 0, 'slipskid': 0,
 # ahrs information, values are all rounded to integer
 gmeter = {'was_changed': True, 'current': 0.0, 'max': 0.0, 'min': 0.0}
 # status information as received from stratux
-last_bt_checktime = 0.0
 
 max_pixel = 0
 zerox = 0
@@ -225,6 +234,7 @@ def draw_display():
     if situation['was_changed'] or aircraft_changed or Globals.refresh or new_alive != optical_alive:
         # display is only triggered if there was a change
         optical_alive = new_alive
+        latency.draw_start()
         display_control.clear()
         display_control.situation(situation['connected'], situation['gps_active'], situation['own_altitude'],
                                   situation['course'], situation['RadarRange'], situation['RadarLimits'], bt_devices,
@@ -232,6 +242,7 @@ def draw_display():
                                   basemode, extsound_active, cowarner.alarm_level()[0], cowarner.alarm_level()[1]) 
         draw_all_ac(all_ac)
         display_control.display()
+        latency.on_glass(display_control)
         situation['was_changed'] = False
         aircraft_changed = False
         Globals.refresh = False
@@ -303,12 +314,12 @@ def speech_output_adsb(ac, res_angle):   # checks if aircraft with position has
         if oclock > 12:
             oclock -= 12
         if not ac['was_spoken']:  # only speak again, if never spoken or hysteresis reached
-            if 'last_speak_time' not in ac or time.time() - ac['last_speak_time'] > SPEAK_SAME_TRAFFIC_DELTA:
+            if 'last_speak_time' not in ac or Globals.clock() - ac['last_speak_time'] > SPEAK_SAME_TRAFFIC_DELTA:
                 # has been spoken before, now check timeout, against "flickering position"
                 # so is only spoken if never spoken, hysteresis met and last speak is long enough ago
                 speaktraffic(ac['height'], oclock, round(ac['gps_distance']))
                 ac['was_spoken'] = True
-                ac['last_speak_time'] = time.time()
+                ac['last_speak_time'] = Globals.clock()
     else:
         # implement hysteresis, speak traffic again if aircraft was once outside 3/4 of display radius
         if ac['gps_distance'] >= situation['RadarRange'] * 0.75:
@@ -318,11 +329,11 @@ def speech_output_adsb(ac, res_angle):   # checks if aircraft with position has
 def speech_output_modes(ac):   # checks if modes aircraft has to be spoken
     if ac['gps_distance'] <= situation['RadarRange'] / 2:
         if not ac['was_spoken']:  # check hysteresis
-            if 'last_speak_time' not in ac or time.time() - ac['last_speak_time'] > SPEAK_SAME_TRAFFIC_DELTA:
+            if 'last_speak_time' not in ac or Globals.clock() - ac['last_speak_time'] > SPEAK_SAME_TRAFFIC_DELTA:
                 # only speak after a minimal time again, necessary if traffic esp. Mode S "flickers"
                 speaktraffic(ac['height'], None, round(ac['gps_distance']))
                 ac['was_spoken'] = True
-                ac['last_speak_time'] = time.time()
+                ac['last_speak_time'] = Globals.clock()
     else:
         # implement hysteresis, speak traffic again if aircraft was once outside 3/4 of display radius
         if ac['gps_distance'] > situation['RadarRange'] * 0.75:
@@ -334,6 +345,7 @@ def new_traffic(json_str):
     global aircraft_changed
 
     aircraft_changed = True
+    latency.traffic_changed()
     rlog.log(AIRCRAFT_DEBUG, "New Traffic" + json_str)
     traffic = json.loads(json_str)
     try:
@@ -345,6 +357,7 @@ def new_traffic(json_str):
             source = "FLARM"
         else:
             source = "Unknown source"
+        metrics.traffic_sources.inc(source if source != "Unknown source" else "unknown")
         is_new = False
         if traffic['Icao_addr'] not in all_ac.keys():
             # new traffic, insert
@@ -352,9 +365,9 @@ def new_traffic(json_str):
             is_new = True
         ac = all_ac[traffic['Icao_addr']]
         if traffic['Age'] <= traffic['AgeLastAlt']:
-            ac['last_contact_timestamp'] = time.time() - traffic['Age']
+            ac['last_contact_timestamp'] = Globals.clock() - traffic['Age']
         else:
-            ac['last_contact_timestamp'] = time.time() - traffic['AgeLastAlt']
+            ac['last_contact_timestamp'] = Globals.clock() - traffic['AgeLastAlt']
         ac['height'] = round((traffic['Alt'] - situation['own_altitude']) / 100)
 
         if traffic['Speed_valid']:
@@ -379,7 +392,7 @@ def new_traffic(json_str):
                 # was mode-s target before, now invalidate mode-s info
             gps_rad, gps_angle = calc_gps_distance(traffic['Lat'], traffic['Lng'])
             ac['gps_distance'] = gps_rad
-            ac['last_position_timestamp'] = time.time()
+            ac['last_position_timestamp'] = Globals.clock()
             if 'Track' in traffic:
                 ac['direction'] = traffic['Track'] - situation['course']
                 # sometimes track is missing, then leave it as it is
@@ -406,7 +419,7 @@ def new_traffic(json_str):
             rlog.log(AIRCRAFT_DEBUG, f"RADAR: No position traffic {traffic['Icao_addr']:X} from source {source} "
                                      f"in {distcirc:.1f} nm")
             # check age of last position, if age is < POSITION_VALID_DELTA, leave position valid and do not calculate circradius
-            if 'last_position_timestamp' in ac and time.time() - ac['last_position_timestamp'] < POSITION_VALID_DELTA:
+            if 'last_position_timestamp' in ac and Globals.clock() - ac['last_position_timestamp'] < POSITION_VALID_DELTA:
                 rlog.log(AIRCRAFT_DEBUG, f"Ignoring mode s distance estimation of "
                     f"{traffic['Icao_addr']:X} since, position is still younger than {POSITION_VALID_DELTA}secs")
                 # this may e.g. happen if FLARM message is received and mode-s
@@ -424,12 +437,11 @@ def new_traffic(json_str):
                                          f"was older than {POSITION_VALID_DELTA}secs")
             speech_output_modes(ac)
     except KeyError:  # to be safe in case keys are changed in Stratux
+        metrics.decode_errors.inc('TrafficHandler')
         rlog.log(AIRCRAFT_DEBUG, "KeyError decoding:" + json_str)
 
 
 def update_time(time_str):  # time_str has format "2021-04-18T15:58:58.1Z"
-    global last_bt_checktime
-
     try:
         gps_datetime = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%S.%fZ")
     except ValueError:
@@ -438,7 +450,7 @@ def update_time(time_str):  # time_str has format "2021-04-18T15:58:58.1Z"
         # also full seconds, will not give fractions and raise this, but it's ok
         return
     gps_datetime = gps_datetime.replace(tzinfo=timezone.utc)  # make sure that time is interpreted as utc
-    if abs(time.time() - gps_datetime.timestamp()) > MAX_TIMER_OFFSET:
+    if abs(Globals.clock() - gps_datetime.timestamp()) > MAX_TIMER_OFFSET:
         # raspi system timer differs from received GPSTime
         rlog.debug("Setting Time from GPS-Time to: " + time_str + ". System time was " +
                    time.strftime("%H:%M:%S", time.gmtime()))
@@ -447,7 +459,6 @@ def update_time(time_str):  # time_str has format "2021-04-18T15:58:58.1Z"
             rlog.debug("Radar: Error setting system time")
         else:
             timerui.reset_timer()  # all timers are reset to be on the safe side!
-            last_bt_checktime = 0.0  # reset timer
 
 
 def new_situation(json_str):
@@ -457,7 +468,7 @@ def new_situation(json_str):
     rlog.log(SITUATION_DEBUG, "New Situation" + json_str)
     sit = json.loads(json_str)
     try:
-        situation['last_update'] = time.time()
+        situation['last_update'] = Globals.clock()
         if not situation['connected']:
             situation['connected'] = True
             situation['was_changed'] = True
@@ -584,6 +595,7 @@ def new_situation(json_str):
             Globals.mode = new_mode  # automatically change to display of flight times, or back
 
     except KeyError:  # to be safe when stratux changes its message-format
+        metrics.decode_errors.inc('SituationHandler')
         rlog.log(SITUATION_DEBUG, "KeyError decoding situation:" + json_str)
 
 
@@ -607,22 +619,29 @@ async def listen_forever(path, name, callback, logger):
                         if situation['connected'] is False:  # Probably connection lost
                             logger.debug(name + ': Watchdog detected connection loss.' +
                                          ' Retrying connect in {} sec '.format(LOST_CONNECTION_TIMEOUT))
+                            metrics.reconnects.inc(name)
                             await asyncio.sleep(LOST_CONNECTION_TIMEOUT)
                             break
                     except websockets.exceptions.ConnectionClosed:
                         logger.debug(
                             name + ' ConnectionClosed. Retrying connect in {} sec '.format(LOST_CONNECTION_TIMEOUT))
+                        metrics.reconnects.inc(name)
                         await asyncio.sleep(LOST_CONNECTION_TIMEOUT)
                         break
                     except asyncio.CancelledError:
                         logger.debug(name + " shutting down ... ")
                         return
                     else:
+                        latency.ingest()
+                        metrics.messages.inc(name)
+                        blackbox.record(name, message)
+                        recorder.record(name, message)
                         callback(message)
                     await asyncio.sleep(MINIMAL_WAIT_TIME)  # do a minimal wait to let others do their jobs
 
         except (socket.error, websockets.exceptions.WebSocketException, asyncio.TimeoutError):
             logger.debug(name + ' WebSocketException. Retrying connection in {} sec '.format(RETRY_TIMEOUT))
+            metrics.reconnects.inc(name)
             if name == 'SituationHandler' and situation['connected']:
                 situation['connected'] = False
                 ahrs['was_changed'] = True
@@ -636,10 +655,8 @@ async def listen_forever(path, name, callback, logger):
 
 
 async def user_interface():
-    global bt_devices
     global vertical_max
     global vertical_min
-    global last_bt_checktime
 
     try:
         while True:
@@ -686,29 +703,30 @@ async def user_interface():
                     distance.reset_values(situation)
             elif Globals.mode == Modes.CHECKLIST:  # display checklist
                 next_mode = checklist.user_input()
+            elif Globals.mode == Modes.PERF:  # performance overlay
+                next_mode = perfui.user_input()
             else:
                 next_mode = Modes.NO_CHANGE   # fallback, should never happen
 
             if next_mode != Modes.NO_CHANGE:
                 Globals.refresh = True
+                blackbox.event("mode " + Globals.mode.name + " " + next_mode.name)
                 rlog.debug("User Interface: global mode changing from: " + Globals.mode.name + " to " + next_mode.name)
                 Globals.mode = next_mode
-
-            current_time = time.time()
-            if bluetooth_active and current_time > last_bt_checktime + BLUEZ_CHECK_TIME:
-                last_bt_checktime = current_time
-                new_devices, devnames = radarbluez.connected_devices()
-                if new_devices > 0:
-                    rlog.debug("User Interface: Bluetooth " + str(new_devices) + " devices connected.")
-                if new_devices != bt_devices:
-                    if new_devices > bt_devices:  # new or additional device
-                        radarbluez.speak("Radar connected")
-                    bt_devices = new_devices
-                    Globals.refresh = True
     except asyncio.CancelledError:
         rlog.debug("UI task terminating ...")
 
 
+def bluetooth_changed(new_devices, devnames):   # called by radarbluez as soon as a device connects or disconnects
+    global bt_devices
+
+    rlog.debug("User Interface: Bluetooth " + str(new_devices) + " devices connected: " + ", ".join(devnames))
+    if new_devices > bt_devices:  # new or additional device
+        radarbluez.speak("Radar connected")
+    bt_devices = new_devices
+    Globals.refresh = True
+
+
 def refresh_display(manual = False):
     global last_auto_refresh
     global auto_refresh_time
@@ -734,9 +752,17 @@ async def display_and_cutoff():
 
     try:
         while True:
-            await asyncio.sleep(MIN_DISPLAY_REFRESH_TIME)
+            if Globals.mode == Modes.COUNTDOWN_DISTANCE:   # priority redraw as soon as a new sample arrives
+                await grounddistance.wait_countdown_sample(MIN_DISPLAY_REFRESH_TIME)
+            else:
+                await asyncio.sleep(MIN_DISPLAY_REFRESH_TIME)
+            current_mode = Globals.mode
+            flushes = metrics.display_flushes
             if display_control.is_busy():
-                await asyncio.sleep(display_refresh_time / 3)
+                if current_mode == Modes.COUNTDOWN_DISTANCE:
+                    await asyncio.sleep(MINIMAL_WAIT_TIME)   # next sample is shown as soon as display is ready
+                else:
+                    await asyncio.sleep(display_refresh_time / 3)
                 # try it several times to be as fast as possible
             else:
                 refresh_display()   # for automatic refresh, if necessary
@@ -836,12 +862,21 @@ async def display_and_cutoff():
                     rlog.debug("Checklist: Display driver - Refreshing")
                     refresh_display(manual=True)
                     Globals.mode = Modes.CHECKLIST
+                elif Globals.mode == Modes.PERF:  # performance overlay
+                    perfui.draw_perf(display_control, Globals.refresh)
+                    Globals.refresh = False
+                elif Globals.mode == Modes.REFRESH_PERF:  # refresh display, only relevant for epaper, mode was perf
+                    rlog.debug("Perf: Display driver - Refreshing")
+                    refresh_display(manual=True)
+                    Globals.mode = Modes.PERF
                 elif Globals.mode == Modes.COUNTDOWN_DISTANCE:  # Full screen distance
-                    distance.draw_countdown_distance(display_control, situation)
+                    distance.draw_countdown_distance(display_control, situation, Globals.refresh)
+                    latency.sample_on_glass(display_control)
                     Globals.refresh = False
+            metrics.count_frame(current_mode, flushes)
 
             to_delete = []
-            cutoff = time.time() - RADAR_CUTOFF
+            cutoff = Globals.clock() - RADAR_CUTOFF
             for icao, ac in all_ac.items():
                 if ac['last_contact_timestamp'] < cutoff:
                     rlog.log(AIRCRAFT_DEBUG, "Cutting of " + hex(icao))
@@ -851,7 +886,7 @@ async def display_and_cutoff():
                 del all_ac[i]
 
             # watchdog
-            if situation['last_update'] + WATCHDOG_TIMER < time.time():
+            if situation['last_update'] + WATCHDOG_TIMER < Globals.clock():
                 if situation['connected']:
                     situation['connected'] = False
                     situation['was_changed'] = True
@@ -863,13 +898,27 @@ async def display_and_cutoff():
 
 
 async def coroutines():
-    tr_handler = asyncio.create_task(listen_forever(url_radar_ws, "TrafficHandler", new_traffic, rlog))
-    sit_handler = asyncio.create_task(listen_forever(url_situation_ws, "SituationHandler", new_situation, rlog))
+    if replay_file:   # recorded messages instead of stratux connection
+        replay_clock = recorder.ReplayClock()
+        Globals.clock = replay_clock.time
+        tr_handler = asyncio.create_task(recorder.replay(replay_file, replay_speed,
+                                                         {'radar': new_traffic, 'situation': new_situation,
+                                                          'status': stratuxstatus.status_callback},
+                                                         replay_offset, replay_clock))
+        sit_handler = asyncio.create_task(asyncio.sleep(0))
+    else:
+        tr_handler = asyncio.create_task(listen_forever(url_radar_ws, "TrafficHandler", new_traffic, rlog))
+        sit_handler = asyncio.create_task(listen_forever(url_situation_ws, "SituationHandler", new_situation, rlog))
     dis_cutoff = asyncio.create_task(display_and_cutoff())
     sensor_reader = asyncio.create_task(cowarner.read_sensors())
     ground_sensor_reader = asyncio.create_task(grounddistance.read_ground_sensor())
     u_interface = asyncio.create_task(user_interface())
-    await asyncio.gather(tr_handler, sit_handler, dis_cutoff, u_interface, sensor_reader, ground_sensor_reader)
+    if bluetooth_active:
+        radarbluez.watch_devices(asyncio.get_running_loop(), bluetooth_changed)
+    loop_monitor = loophealth.start(stall_threshold)
+    memory_monitor = asyncio.create_task(memwatch.monitor())
+    await asyncio.gather(tr_handler, sit_handler, dis_cutoff, u_interface, sensor_reader, ground_sensor_reader,
+                         loop_monitor, memory_monitor)
     # With python 3.11 a TaskGroup could be used to ensure theat coroutine exceptions are propagated to main task
 
 
@@ -885,6 +934,8 @@ def main():
     global radar_sound_off_sound
 
     print("Stratux Radar Display " + RADAR_VERSION + " running ...")
+    blackbox.init(arguments.FULL_BLACKBOX_DIR, blackbox_size)
+    persist.init()
     if not radarui.init(url_settings_set, button_api_active):
         print("GPIO Error, is  another radar process running? Terminating.")
         return 1
@@ -899,11 +950,33 @@ def main():
     gmeterui.init(url_gmeter_reset)
     stratuxstatus.init(url_status_ws, url_settings_get, url_settings_set)
     flighttime.init(measure_flighttime, SAVED_FLIGHTS)
-    cowarner.init(co_warner_activated, global_config, SITUATION_DEBUG, co_indication, co_simulation_mode, co_i2c_0)
+    cowarner.init(co_warner_activated, global_config, SITUATION_DEBUG, co_indication, co_simulation_mode, co_i2c_0,
+                  arguments.FULL_CO_HISTORY_FILE)
     grounddistance.init(grounddistance_activated, SAVED_STATISTICS, SITUATION_DEBUG,
-                        groundbeep, countdown, gear_indication, situation, simulation_mode)
-    simulation.init(simulation_mode)
+                        groundbeep, countdown, gear_indication, situation, simulation_mode,
+                        args['groundport'], args['groundrate'], LEGACY_STATISTICS)
+    simulation.init(simulation_mode, args['simulationfile'])
     checklist.init(xml_checklist)
+    perfui.init(display_refresh_time)
+    profiler.init(arguments.FULL_PROFILE_DIR, profile_time, profile_interval / 1000)
+    memwatch.init(arguments.FULL_MEMORY_DIR, memwatch_interval)
+    memwatch.watch('radar.all_ac', lambda: all_ac)
+    memwatch.watch('cowarner.co_values', lambda: cowarner.co_values)
+    memwatch.watch('grounddistance.statistics', lambda: grounddistance.statistics)
+    memwatch.watch('flighttime.g_config', lambda: flighttime.g_config)
+    memwatch.watch('logging handlers', lambda: rlog.handlers + logging.getLogger().handlers)
+    memwatch.watch('recorder.block', lambda: recorder.block)
+    if profile_time > 0:
+        profiler.start(profile_time)
+    if measure_latency:
+        latency.init(args['virtualpanel'] if args['device'] == 'Virtual' else args['device'])   # emulated panel
+    metrics.instrument_display(display_control)
+    framering.init(arguments.FULL_FRAMES_DIR, frame_ring_size)
+    framering.instrument(display_control)
+    metrics.targets.set_function(lambda: len(all_ac))
+    metrics.start_server(metrics_port)
+    if record_messages:
+        recorder.init(Path(arguments.FULL_RECORD_DIR).joinpath(time.strftime("radar-%Y%m%d-%H%M%S.srec")))
     rlog.debug(f"Initialization finished. Global config {global_config}")
     display_control.startup(RADAR_VERSION, url_host_base, 4)
     try:
@@ -921,6 +994,13 @@ def quit_gracefully(*argus):
     except RuntimeError:
         pass
     radarbluez.sound_terminate()
+    radarbluez.bluez_terminate()
+    persist.stop()   # write pending config, flights and statistics
+    recorder.close()
+    metrics.stop_server()
+    loophealth.stop()
+    profiler.stop()
+    latency.log_summary()
     rlog.debug("CleanUp Display ...")
     display_control.cleanup()
     return 0
@@ -934,6 +1014,7 @@ def radar_excepthook(exc_type, exc_value, exc_traceback):
     for line in stack_trace:
         syslog.syslog(syslog.LOG_ERR, line.strip())
     syslog.closelog()
+    blackbox.dump('crash')
     # for interactive mode give some output
     print(f"Uncaught exception: {exc_type.__name__}: {exc_value}")
     for line in stack_trace:
@@ -971,11 +1052,23 @@ if __name__ == "__main__":
     url_host_base = args['connect']
     try:
         display_control_module = importlib.import_module('displays.' + args['device'] + '.controller')
-        display_control = display_control_module.radar_display  # inherited instance of GenericDisplay in imported module
+        if args['device'] == 'Virtual':
+            display_control = display_control_module.virtual_display(args['virtualpanel'], args['virtualdump'],
+                                                                     args['virtualraw'], args['virtuallatency'])
+        else:
+            display_control = display_control_module.radar_display  # inherited instance of GenericDisplay
     except ModuleNotFoundError as e:
+        if e.name and not e.name.startswith('displays.'):   # controller found, but a module it needs is missing
+            print(f"Error: Controller for device '{args['device']}' needs missing module '{e.name}'. Aborting.")
+            syslog.syslog(syslog.LOG_ERR, f"Error: Controller for device '{args['device']}' needs missing module "
+                                          f"'{e.name}'. Aborting.")
+            sys.exit(1)
         print("Error: Controller for device '{0}' not found. Aborting. ".format(args['device']))
         syslog.syslog(syslog.LOG_ERR, "Error: Controller for device '{0}' not found. Aborting. ".format(args['device']))
         sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}. Aborting.")
+        sys.exit(1)
     bluetooth = args['bluetooth']
     basemode = args['north']
     fullcircle = args['fullcircle']
@@ -993,6 +1086,18 @@ if __name__ == "__main__":
     xml_checklist = args['checklist']
     sound_mixer = args['mixer']
     auto_refresh_time = args['refresh']
+    record_messages = args['record']
+    replay_file = args['replay']
+    replay_speed = args['replayspeed']
+    replay_offset = args['replayoffset']
+    measure_latency = args['latency']
+    metrics_port = args['metrics']
+    stall_threshold = args['stallthreshold']
+    profile_time = args['profile']
+    profile_interval = args['profileinterval']
+    memwatch_interval = args['memwatch']
+    blackbox_size = args['blackbox']
+    frame_ring_size = args['frames']
     radarmodes.parse_modes(args['displaymodes'])
     Globals.mode = radarmodes.first_mode_sequence()
     global_config['display_tail'] = args['registration']  # display registration if set
@@ -1032,6 +1137,8 @@ if __name__ == "__main__":
     try:
         signal.signal(signal.SIGINT, quit_gracefully)  # to be able to receive sigint
         signal.signal(signal.SIGTERM, quit_gracefully)  # shutdown initiated e.g. by stratux shutdown
+        signal.signal(signal.SIGUSR1, profiler.trigger)  # start sampling profiler at runtime
+        signal.signal(signal.SIGUSR2, blackbox.trigger)  # dump black box, e.g. requested by web app
         main()
     except KeyboardInterrupt:
         pass
@@ -33,6 +33,7 @@
 
 import re
 import pydbus
+from gi.repository import GLib
 import subprocess
 import alsaaudio
 from os import environ
@@ -43,9 +44,14 @@ import threading    # for pico2wave so that there is no blocking of other sensor
 import time
 from globals import rlog
 import radarui    # to check if radarui.sound_on
+import latency
+import metrics
 # DBus object paths
 BLUEZ_SERVICE = 'org.bluez'
 ADAPTER_PATH = '/org/bluez/hci0'
+DEVICE_INTERFACE = 'org.bluez.Device1'
+DEVICE_PATH = re.compile(r'\/org\/bluez\/hci\d*\/dev_(.*)')
+# to match strings like /org/bluez/hci0/dev_58_C9_35_2F_A1_EF
 
 # global variables
 bus = None
@@ -54,6 +60,12 @@ adapter = None
 bluetooth_active = False
 extsound_active = False
 bt_devices = 0          # no of active bluetooth devices last time checked via connected devices
+devices = {}    # object path -> properties (Name, Connected) of bluez devices, maintained by D-Bus signals
+devices_lock = threading.Lock()   # devices is changed in D-Bus thread
+dbus_loop = None   # GLib main loop of D-Bus thread, which receives the signals
+event_loop = None   # asyncio loop, device changes are passed to it
+device_callback = None   # called in asyncio loop with (number of connected devices, names) if this changes
+reported_devices = 0   # number of connected devices last reported to device_callback
 mixer = None
 global_config = None
 sound_queue = None    # external sound queue
@@ -125,6 +137,7 @@ def sound_init(config, bluetooth, mixer_name):
             rlog.debug(f"SoundInit: Error pygame.init - {error} ")
         # rlog.debug(f"SoundInit: Mixer initialized with device '{audio_device}'")
         sound_queue = Queue()
+        metrics.speech_queue.set_function(sound_queue.qsize)
         sound_thread = threading.Thread(target=audio_speaker, args=(sound_queue,))  # external thread that speaks
         sound_thread.start()
         speak("Stratux Radar connected")
@@ -140,13 +153,13 @@ def sound_terminate():
         sound_thread.join()    # wait for termination
 
 
-def bluez_init():
+def bluez_init(system_bus=None):   # system_bus can be given for testing with a private bus
     global bus
     global manager
     global adapter
     global bluetooth_active
 
-    bus = pydbus.SystemBus()
+    bus = system_bus if system_bus is not None else pydbus.SystemBus()
 
     if bus is None:
         rlog.debug("Systembus not received")
@@ -159,10 +172,110 @@ def bluez_init():
         return False
     bluetooth_active = True
     rlog.debug("Bluetooth: BLUEZ-SERVICE successfully activated.")
+    # subscribe before reading all devices, so that no change is lost
+    bus.subscribe(sender=BLUEZ_SERVICE, iface='org.freedesktop.DBus.ObjectManager', signal='InterfacesAdded',
+                  signal_fired=interfaces_added)
+    bus.subscribe(sender=BLUEZ_SERVICE, iface='org.freedesktop.DBus.ObjectManager', signal='InterfacesRemoved',
+                  signal_fired=interfaces_removed)
+    bus.subscribe(sender=BLUEZ_SERVICE, iface='org.freedesktop.DBus.Properties', signal='PropertiesChanged',
+                  arg0=DEVICE_INTERFACE, signal_fired=properties_changed)
+    bus.subscribe(sender='org.freedesktop.DBus', iface='org.freedesktop.DBus', signal='NameOwnerChanged',
+                  arg0=BLUEZ_SERVICE, signal_fired=bluez_restarted)
+    read_devices()
+    threading.Thread(target=dbus_listener, name='dbus', daemon=True).start()
     connected_devices()     # check if already devices are connected
     return True
 
 
+def dbus_listener():   # D-Bus thread, signal callbacks are called here
+    global dbus_loop
+
+    rlog.debug("Radarbluez: D-Bus thread active.")
+    dbus_loop = GLib.MainLoop()
+    dbus_loop.run()
+    rlog.debug("Radarbluez: D-Bus thread terminated.")
+
+
+def bluez_terminate():
+    if dbus_loop is not None:
+        dbus_loop.quit()
+
+
+def watch_devices(loop, callback):   # callback is called in loop whenever the connected devices change
+    global event_loop
+    global device_callback
+
+    event_loop = loop
+    device_callback = callback
+    loop.call_soon_threadsafe(devices_changed)   # devices connected before start are reported as well
+
+
+def devices_changed():   # in asyncio loop
+    global reported_devices
+
+    new_devices, device_names = connected_devices()
+    if device_callback is not None and new_devices != reported_devices:
+        reported_devices = new_devices
+        device_callback(new_devices, device_names)
+
+
+def connected_set():
+    with devices_lock:
+        return {path for path, props in devices.items() if props.get('Connected', False)}
+
+
+def update_devices(change):   # D-Bus thread, change modifies devices, loop is notified if connections changed
+    before = connected_set()
+    with devices_lock:
+        change()
+    if connected_set() != before and event_loop is not None:
+        try:
+            event_loop.call_soon_threadsafe(devices_changed)
+        except RuntimeError:   # loop already closed
+            pass
+
+
+def read_devices():   # full read of all devices, at start and if bluez was restarted
+    managed_objects = manager.GetManagedObjects()
+    all_devices = {path: dict(interfaces[DEVICE_INTERFACE]) for path, interfaces in managed_objects.items()
+                   if DEVICE_PATH.match(path) and DEVICE_INTERFACE in interfaces}
+
+    def change():
+        devices.clear()
+        devices.update(all_devices)
+    update_devices(change)
+
+
+def interfaces_added(sender, path, iface, signal, params):
+    device_path, interfaces = params
+    if DEVICE_INTERFACE in interfaces and DEVICE_PATH.match(device_path):
+        update_devices(lambda: devices.__setitem__(device_path, dict(interfaces[DEVICE_INTERFACE])))
+
+
+def interfaces_removed(sender, path, iface, signal, params):
+    device_path, interfaces = params
+    if DEVICE_INTERFACE in interfaces:
+        update_devices(lambda: devices.pop(device_path, None))
+
+
+def properties_changed(sender, path, iface, signal, params):
+    interface, changed, invalidated = params
+    if interface == DEVICE_INTERFACE and DEVICE_PATH.match(path):
+        update_devices(lambda: devices.setdefault(path, {}).update(changed))
+
+
+def bluez_restarted(sender, path, iface, signal, params):
+    name, old_owner, new_owner = params
+    rlog.debug(f"Bluetooth: BLUEZ-SERVICE owner changed to '{new_owner}', reading devices")
+    if new_owner:
+        try:
+            read_devices()
+        except GLib.Error as e:
+            rlog.debug(f"Bluetooth: Error reading devices: {e}")
+    else:
+        update_devices(devices.clear)
+
+
 def setvolume(new_volume):
     if mixer is not None:
         mixer.setvolume(new_volume)
@@ -175,6 +288,7 @@ def stop_sounds():      # if mute button is pressed, stop immediately sound outp
 def speak(text, speed_percent = 100):
     if (extsound_active and global_config['sound_volume'] > 0) or (bluetooth_active and bt_devices > 0):
         output_text = f"<speed level='{speed_percent}'> {text} </speed>"    # include string for setting speed
+        latency.speak_queued(output_text)
         sound_queue.put(output_text)
     rlog.debug("Speak: "+text)
 
@@ -204,6 +318,7 @@ def speak_sound(sound, text=""):    # used to instantly speak sounds which are a
     if (extsound_active and global_config['sound_volume'] > 0) or (bluetooth_active and bt_devices > 0):
         pygame.mixer.stop()    # stop conflicting sounds
         sound.play()
+        latency.sample_spoken()
     rlog.debug("SpeakSound: " + text)
 
 
@@ -214,32 +329,28 @@ def audio_speaker(queue):
         if msg == 'STOP':
             break
         if radarui.sound_on:    # if not ignore sound, clears queue
+            tts_start = time.perf_counter()
             pico_result = subprocess.run(["pico2wave", "-w", "/tmp/radar.wav", msg])  # generate wave
+            metrics.tts_time.observe(time.perf_counter() - tts_start)
             if pico_result.returncode == 0:
                 if (bluetooth_active and bt_devices > 0) or (extsound_active and global_config['sound_volume'] > 0):
                     while pygame.mixer.get_busy():
                         time.sleep(0.05)    # is a different thread, other threads continue, just audio speaker waits
                     pygame.mixer.Sound("/tmp/radar.wav").play()   # serialized via this thread
+                    latency.speak_played(msg)
             else:
                 rlog.debug("Radarbluez: Error using pico2wave TTS")
     rlog.debug("Radarbluez: Audio-Speaker thread terminated.")
 
 
-def connected_devices():
+def connected_devices():   # cached, devices are maintained by D-Bus signals
     global bt_devices
 
     if not bluetooth_active:
         return 0, []
-    managed_objects = manager.GetManagedObjects()
-    r = re.compile(r'\/org\/bluez\/hci\d*\/dev_(.*)')
-    # to match strings like /org/bluez/hci0/dev_58_C9_35_2F_A1_EF
-    device_names = []
-    for key, value in managed_objects.items():
-        m = r.match(key)
-        if m is not None:
-            if 'org.bluez.Device1' in value:
-                if value['org.bluez.Device1']['Connected']:
-                    device_names.append(value['org.bluez.Device1']['Name'])
+    with devices_lock:
+        device_names = [props.get('Name', DEVICE_PATH.match(path).group(1)) for path, props in devices.items()
+                        if props.get('Connected', False)]
     bt_devices = len(device_names)
     return bt_devices, device_names
 
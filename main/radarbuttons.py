@@ -34,11 +34,13 @@
 from globals import rlog
 from gpiozero import Button
 import threading   # for flask server in case of button api
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template
 from flask_wtf import FlaskForm, CSRFProtect
 from wtforms.fields import *
 from flask_bootstrap import Bootstrap5, SwitchField
 import os
+import metrics
+import blackbox
 
 btn = None   # will be set in init
 gear_down_btn = None   # will be set ini int
@@ -107,6 +109,16 @@ def api():
     return render_template('api.html', api_form=api_form)
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_text():
+    return Response(metrics.prometheus_text(), mimetype=metrics.PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route('/metrics.json', methods=['GET'])
+def metrics_json():
+    return jsonify(metrics.snapshot())
+
+
 def read_api_input():
     global last_api_input
 
@@ -184,9 +196,13 @@ def check_buttons():  # returns 0=nothing 1=short press 2=long press and returns
         stat = but.check_button()
         if stat > 0:
             rlog.debug("Button press: button {0} presstime {1} (1=short, 2=long)".format(index, stat))
+            blackbox.event(f"button {index} {stat}")
             return stat, index
     # nothing pressed, now also check button_api
-    return read_api_input()
+    stat, index = read_api_input()
+    if stat > 0:
+        blackbox.event(f"api button {index} {stat}")
+    return stat, index
 
 
 def gear_is_down():
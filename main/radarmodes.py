@@ -37,7 +37,7 @@
 # 7=status 8=refresh from status  9=gmeter 10=refresh from gmeter 11=compass 12=refresh from compass
 # 13=VSI 14=refresh from VSI 15=display stratux status 16=refresh from stratux status
 # 17=flighttime 18=refresh flighttime 19=cowarner 20=refresh cowarner 21=situation 22=refresh situation 0=Init
-# 23=checklist 24=refresh checklist
+# 23=checklist 24=refresh checklist 26=performance 27=refresh performance
 
 # mode_sequence is now imported from globals.py
 from globals import Modes
@@ -57,7 +57,8 @@ def mode_codes(c):
         "I": Modes.FLIGHTTIME,
         "C": Modes.COWARNER,
         "M": Modes.SITUATION,
-        "L": Modes.CHECKLIST
+        "L": Modes.CHECKLIST,
+        "P": Modes.PERF
     }
     return modes.get(c, Modes.NO_CHANGE)
 
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Recorder and replay of the raw stratux messages of /radar, /situation and /status
+#
+# Recording file (append only): sequence of independently compressed blocks
+#   block header: magic "SRB1", compressed size, number of records, first and last timestamp
+#   block data (zlib): records with timestamp, stream id, message length and utf-8 message
+# Seek index (file name + ".idx", append only): first timestamp, file offset and number of records per block.
+# If the index is missing or does not match it is rebuilt by scanning the block headers.
+# Stream "ui" contains user interface events (e.g. of the black box), it is ignored by replay.
+# A block cut off by a power loss at the end of the file is ignored when reading.
+#
+# Info about a recording: python3 recorder.py <file>
+
+import os
+import sys
+import time
+import zlib
+import struct
+import asyncio
+import bisect
+from pathlib import Path
+from globals import rlog
+
+BLOCK_MAGIC = b'SRB1'
+BLOCK_HEADER = struct.Struct('<4sIIdd')   # magic, compressed size, records, first timestamp, last timestamp
+RECORD_HEADER = struct.Struct('<dBI')   # timestamp, stream id, message length
+INDEX_ENTRY = struct.Struct('<dQI')   # first timestamp, block offset, records
+BLOCK_RECORDS = 500   # maximum number of records in one block
+BLOCK_TIME = 5.0   # maximum time in secs records are buffered before a block is written
+REPLAY_CLOCK_STEP = 0.1   # max time step in secs of the replay clock while waiting for the next message
+STREAMS = ('radar', 'situation', 'status', 'ui')
+HANDLER_STREAMS = {'TrafficHandler': 'radar', 'SituationHandler': 'situation', 'StatusListener': 'status'}
+
+# globals
+recording = False
+record_path = None
+block = []   # buffered records of current block
+block_start = 0.0   # time when first record of current block was buffered
+
+
+class ReplayClock:
+    # clock for Globals.clock during replay, shows the time of the recording instead of the system time
+    def __init__(self):
+        self.current = 0.0
+
+    def time(self):
+        return self.current
+
+
+def init(path):
+    global recording
+    global record_path
+
+    if path is None:
+        return
+    record_path = Path(path)
+    try:
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        record_path.touch()
+    except (OSError, IOError) as e:
+        rlog.debug(f"Recorder: Error {e} creating recording {record_path}")
+        return
+    recording = True
+    rlog.debug(f"Recorder: Recording stratux messages to {record_path}")
+
+
+def record(handler_name, message):   # called for every message received in listen_forever
+    global block_start
+
+    if not recording:
+        return
+    stream = HANDLER_STREAMS.get(handler_name)
+    if stream is None:
+        return
+    now = time.time()
+    if not block:
+        block_start = now
+    block.append((now, STREAMS.index(stream), message))
+    if len(block) >= BLOCK_RECORDS or now - block_start >= BLOCK_TIME:
+        write_block()
+
+
+def encode_block(records):   # returns block header and compressed block for list of (ts, stream id, message)
+    data = bytearray()
+    for ts, stream_id, message in records:
+        encoded = message.encode('utf-8') if isinstance(message, str) else bytes(message)
+        data += RECORD_HEADER.pack(ts, stream_id, len(encoded))
+        data += encoded
+    compressed = zlib.compress(bytes(data))
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, len(compressed), len(records), records[0][0], records[-1][0]) + compressed
+
+
+def write_block():
+    if not block:
+        return
+    encoded = encode_block(block)
+    try:
+        with open(record_path, 'ab') as f:
+            offset = f.tell()
+            f.write(encoded)
+        with open(str(record_path) + '.idx', 'ab') as f:
+            f.write(INDEX_ENTRY.pack(block[0][0], offset, len(block)))
+    except (OSError, IOError) as e:
+        rlog.debug(f"Recorder: Error {e} writing to {record_path}")
+    block.clear()
+
+
+def write_recording(path, records):   # writes a complete recording with index at once, atomic for each file
+    path = Path(path)
+    data = bytearray()
+    index = bytearray()
+    for i in range(0, len(records), BLOCK_RECORDS):
+        chunk = records[i:i + BLOCK_RECORDS]
+        index += INDEX_ENTRY.pack(chunk[0][0], len(data), len(chunk))
+        data += encode_block(chunk)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for target, content in ((path, data), (Path(str(path) + '.idx'), index)):
+        tmp = target.with_name(target.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+
+
+def close():
+    global recording
+
+    if recording:
+        write_block()
+        recording = False
+        rlog.debug(f"Recorder: Recording {record_path} closed")
+
+
+def scan_blocks(path):   # rebuilds the index from the block headers, returns list of index entries
+    index = []
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            header = f.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                break
+            magic, size, records, first_ts, _ = BLOCK_HEADER.unpack(header)
+            if magic != BLOCK_MAGIC:
+                rlog.debug(f"Recorder: Corrupt block at offset {offset} in {path}")
+                break
+            f.seek(size, 1)
+            index.append((first_ts, offset, records))
+    return index
+
+
+def read_index(path):
+    size = Path(path).stat().st_size
+    try:
+        data = Path(str(path) + '.idx').read_bytes()
+        n = len(data) // INDEX_ENTRY.size
+        index = [INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size) for i in range(n)]
+        if all(entry[1] < size for entry in index):
+            return index
+    except (OSError, IOError):
+        pass
+    return scan_blocks(path)
+
+
+def read_records(path, start_time=0.0):   # generator of (timestamp, stream, message) starting at start_time
+    index = read_index(path)
+    if not index:
+        return
+    pos = max(0, bisect.bisect_right([entry[0] for entry in index], start_time) - 1)
+    with open(path, 'rb') as f:
+        f.seek(index[pos][1])
+        while True:
+            header = f.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                return
+            magic, size, records, _, _ = BLOCK_HEADER.unpack(header)
+            compressed = f.read(size)
+            if magic != BLOCK_MAGIC or len(compressed) < size:
+                return   # truncated or corrupt block at the end of the file
+            try:
+                data = zlib.decompress(compressed)
+            except zlib.error:
+                return
+            offset = 0
+            for _ in range(records):
+                ts, stream_id, length = RECORD_HEADER.unpack_from(data, offset)
+                offset += RECORD_HEADER.size
+                message = data[offset:offset + length].decode('utf-8')
+                offset += length
+                if ts >= start_time:
+                    yield ts, STREAMS[stream_id], message
+
+
+async def replay(path, speed, callbacks, start_offset=0.0, clock=None):
+    # feeds recorded messages to callbacks (dict stream -> function), speed 1 is real time, 0 as fast as possible
+    # if a clock is given, its current time follows the time of the recording
+    try:
+        index = read_index(path)
+    except (OSError, IOError) as e:
+        rlog.debug(f"Replay: Error {e} reading {path}")
+        return
+    if not index:
+        rlog.debug(f"Replay: No data in {path}")
+        return
+    start_time = index[0][0] + start_offset
+    rlog.debug(f"Replay: Starting {path} with speed {speed} at offset {start_offset} secs")
+    count = 0
+    first_ts = None
+    replay_start = time.monotonic()
+    try:
+        for ts, stream, message in read_records(path, start_time):
+            if first_ts is None:
+                first_ts = ts
+            if speed > 0:
+                due = replay_start + (ts - first_ts) / speed
+                while True:
+                    wait = due - time.monotonic()
+                    if wait <= 0:
+                        break
+                    if clock is not None:
+                        clock.current = first_ts + (time.monotonic() - replay_start) * speed
+                    await asyncio.sleep(min(wait, REPLAY_CLOCK_STEP))
+            else:
+                await asyncio.sleep(0)   # as fast as possible, but let display and ui run
+            if clock is not None:
+                clock.current = ts
+            callback = callbacks.get(stream)
+            if callback is not None:
+                callback(message)
+                count += 1
+        duration = time.monotonic() - replay_start
+        rlog.debug(f"Replay: Finished {count} messages in {duration:.1f} secs "
+                   f"({count / duration if duration > 0 else 0:.0f} msgs/s)")
+    except (asyncio.CancelledError, RuntimeError):
+        rlog.debug("Replay: terminating ...")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 recorder.py <recording>")
+        sys.exit(1)
+    blocks = read_index(sys.argv[1])
+    counts = {s: 0 for s in STREAMS}
+    first = last = None
+    for r_ts, r_stream, _ in read_records(sys.argv[1]):
+        counts[r_stream] += 1
+        first = r_ts if first is None else first
+        last = r_ts
+    print(f"{sys.argv[1]}: {len(blocks)} blocks, messages {counts}")
+    if first is not None:
+        print(f"From {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(first))} UTC, duration {last - first:.1f} secs")
@@ -38,6 +38,7 @@ import time
 import requests
 from globals import rlog, Modes
 import radarmodes
+import persist
 
 SHUTDOWN_WAIT_TIME = 6.0
 shutdown_time = 0.0
@@ -90,6 +91,7 @@ def draw_shutdown(display_control):
         display_control.display()
     if clear_before_shutoff:   # this is signal for display driver to initiate shutdown/reboot
         display_control.cleanup()
+        persist.flush()   # pending files are written before power is off
         if shutdown_mode == 0:   # shutdown display and stratux
             rlog.debug("Posting shutdown.")
             try:
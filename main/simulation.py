@@ -36,12 +36,16 @@
 # dtoverlay=miniuart-bt
 
 from globals import rlog
+import os
 import json
+import time
+import bisect
 
 simulation_mode = False
 
 # constants
 SIM_DATA_FILE = "simulation_data.json"
+FILE_MISSING = (0, -1)   # file_state if file could not be read
 
 """
  file with JSON content, e.g.:
@@ -52,26 +56,118 @@ SIM_DATA_FILE = "simulation_data.json"
     "gps_altitude": 1000,
     "gear_down": false
  }
+ or a timeline with keyframes, t in seconds of scenario time. Numbers are interpolated linearly,
+ other values (e.g. gear_down) change at the keyframe. After the last keyframe its values are kept
+ or the timeline starts again with "loop": true. "speed" > 1 runs the scenario faster than real time.
+ The timeline starts when the file is loaded or changed, see config/simulation_approach.example.json
+ {
+    "timeline": {
+        "speed": 1,
+        "loop": false,
+        "keyframes": [
+            {"t": 0, "g_distance": 0, "gps_speed": 80, "own_altitude": 1500, "gps_altitude": 1500, "gear_down": false},
+            {"t": 60, "g_distance": 3000, "gps_speed": 65, "own_altitude": 510, "gps_altitude": 510, "gear_down": true}
+        ]
+    }
+ }
+ The file is only read again if its modification time or size changes.
 """
 
-def init(sim_mode):
+# globals
+sim_file = SIM_DATA_FILE
+file_state = None   # (mtime, size) of the loaded file, None if not loaded
+sim_data = {}   # contents of plain simulation file
+keyframes = []   # keyframes of timeline, sorted by t, empty if no timeline
+keyframe_times = []
+timeline_speed = 1.0
+timeline_loop = False
+timeline_start = 0.0
+
+
+def init(sim_mode, data_file=SIM_DATA_FILE):
     global simulation_mode
+    global sim_file
 
     simulation_mode = sim_mode
+    sim_file = data_file
     if simulation_mode:
-        rlog.debug('Simulation mode activated - Reading sim data from: ' + SIM_DATA_FILE + '.')
-        sim_data = read_simulation_data()
-        if sim_data is not None:
-            rlog.debug('Initial simulation data: ' + json.dumps(sim_data))
+        rlog.debug('Simulation mode activated - Reading sim data from: ' + sim_file + '.')
+        data = read_simulation_data()
+        if data:
+            rlog.debug('Initial simulation data: ' + json.dumps(data))
         else:
-            rlog.debug('Error reading simulation data in file ' + SIM_DATA_FILE + '.')
+            rlog.debug('Error reading simulation data in file ' + sim_file + '.')
+
+
+def load_simulation_data():
+    global sim_data
+    global keyframes
+    global keyframe_times
+    global timeline_speed
+    global timeline_loop
+    global timeline_start
+
+    sim_data = {}
+    keyframes = []
+    keyframe_times = []
+    try:
+        with open(sim_file) as f:
+            data = json.load(f)
+        if 'timeline' in data:
+            timeline = data['timeline']
+            keyframes = sorted(timeline['keyframes'], key=lambda k: k['t'])
+            keyframe_times = [k['t'] for k in keyframes]
+            timeline_speed = float(timeline.get('speed', 1.0))
+            timeline_loop = bool(timeline.get('loop', False))
+            timeline_start = time.monotonic()
+            rlog.debug(f"Simulation: Timeline with {len(keyframes)} keyframes loaded, speed {timeline_speed}")
+        else:
+            sim_data = data
+    except (OSError, IOError, ValueError, KeyError, TypeError) as e:
+        rlog.debug("Simulation: Error " + str(e) + " reading " + sim_file)
+        sim_data = {}
+        keyframes = []
+        keyframe_times = []
+
+
+def timeline_values(t):   # values of timeline at scenario time t
+    if timeline_loop and keyframe_times[-1] > 0:
+        t = t % keyframe_times[-1]
+    i = bisect.bisect_right(keyframe_times, t)
+    if i == 0:
+        return {k: v for k, v in keyframes[0].items() if k != 't'}
+    if i == len(keyframes):
+        return {k: v for k, v in keyframes[-1].items() if k != 't'}
+    before = keyframes[i - 1]
+    after = keyframes[i]
+    fraction = (t - before['t']) / (after['t'] - before['t'])
+    values = {}
+    for key, value in before.items():
+        if key == 't':
+            continue
+        target = after.get(key, value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and isinstance(target, (int, float)) and not isinstance(target, bool):
+            values[key] = value + (target - value) * fraction
+        else:
+            values[key] = value
+    return values
+
 
+def read_simulation_data():  # returns dictionary with current simulation values, empty if file operation failed
+    global file_state
 
-def read_simulation_data():  # returns dictionary with all contents of the SIM_DATA_FILE, None if file operation failed
     try:
-        with open(SIM_DATA_FILE) as f:
-            sim_data = json.load(f)
-    except (OSError, IOError, ValueError) as e:
-        rlog.debug("Simulation: Error " + str(e) + " reading " + SIM_DATA_FILE)
+        st = os.stat(sim_file)
+        state = (st.st_mtime_ns, st.st_size)
+    except OSError as e:
+        if file_state != FILE_MISSING:   # log only once
+            rlog.debug("Simulation: Error " + str(e) + " reading " + sim_file)
+        file_state = FILE_MISSING
         return {}     # empty dict is returned to make error handling easier
+    if state != file_state:   # only read again if file was changed
+        file_state = state
+        load_simulation_data()
+    if keyframes:
+        return timeline_values((time.monotonic() - timeline_start) * timeline_speed)
     return sim_data
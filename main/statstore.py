@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Append-only record store for takeoff and landing statistics with a sidecar offset index.
+# Data file: records of length (4 bytes) and compact json. Index (file name + ".idx"): offset and length per record,
+# so the number of records and record k are available without parsing the data file.
+# Data is written before the index entry. Index entries pointing behind the data are dropped on open,
+# a missing index is rebuilt by scanning the data file.
+# Records may be appended by the persistence worker while the display reads them, access is locked.
+#
+# Export as json lines:  python3 statstore.py <store> -export <file>
+# Import json lines:     python3 statstore.py <store> -import <file>
+
+import os
+import sys
+import json
+import struct
+import threading
+import argparse
+from pathlib import Path
+from globals import rlog
+
+# constants
+RECORD_HEADER = struct.Struct('<I')   # length of record
+INDEX_ENTRY = struct.Struct('<QI')   # offset of record data, length
+MAX_RECORDS = 1000   # store is compacted to the newest MAX_RECORDS ...
+COMPACT_SLACK = 100   # ... if it exceeds MAX_RECORDS + COMPACT_SLACK
+
+
+class RecordStore:
+    def __init__(self, path, encode=None, decode=None, max_records=MAX_RECORDS):
+        self.path = Path(path)
+        self.index_path = Path(str(path) + '.idx')
+        self.encode = encode or (lambda record: record)   # record to json serializable object
+        self.decode = decode or (lambda obj: obj)
+        self.max_records = max_records
+        self.cached = (None, None)   # last read record (k, record), draw functions read the same record often
+        self.count = 0
+        self.lock = threading.RLock()
+        self.check()
+
+    def check(self):   # validates index against data, rebuilds it if necessary
+        try:
+            data_size = self.path.stat().st_size
+        except OSError:
+            self.count = 0
+            self.index_path.unlink(missing_ok=True)   # stale index without data
+            return
+        try:
+            index_size = self.index_path.stat().st_size
+        except OSError:
+            index_size = None
+        count = (index_size or 0) // INDEX_ENTRY.size
+        if index_size is not None and count > 0:
+            with open(self.index_path, 'rb') as f:
+                f.seek((count - 1) * INDEX_ENTRY.size)
+                offset, length = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+            if offset + length == data_size and index_size == count * INDEX_ENTRY.size:
+                self.count = count
+                return
+        elif index_size is not None and data_size == 0:
+            self.count = 0
+            return
+        self.rebuild_index()
+
+    def rebuild_index(self):   # scans data file, a record cut off at the end is removed
+        entries = bytearray()
+        offset = 0
+        with open(self.path, 'r+b') as f:
+            data = f.read()
+            while offset + RECORD_HEADER.size <= len(data):
+                (length,) = RECORD_HEADER.unpack_from(data, offset)
+                if offset + RECORD_HEADER.size + length > len(data):
+                    break
+                entries += INDEX_ENTRY.pack(offset + RECORD_HEADER.size, length)
+                offset += RECORD_HEADER.size + length
+            f.truncate(offset)
+        with open(self.index_path, 'wb') as f:
+            f.write(entries)
+        self.count = len(entries) // INDEX_ENTRY.size
+        rlog.debug(f"RecordStore: Index of {self.path} rebuilt, {self.count} records")
+
+    def append(self, record):
+        with self.lock:
+            self._append(record)
+
+    def _append(self, record):
+        payload = json.dumps(self.encode(record), separators=(',', ':')).encode('utf-8')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(RECORD_HEADER.pack(len(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, 'ab') as f:
+            f.write(INDEX_ENTRY.pack(offset + RECORD_HEADER.size, len(payload)))
+        self.count += 1
+        if self.count > self.max_records + COMPACT_SLACK:
+            self.compact(self.max_records)
+
+    def __len__(self):
+        return self.count
+
+    def get(self, k):   # record k, 0 is the oldest
+        with self.lock:
+            return self._get(k)
+
+    def _get(self, k):
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError(f"record {k} not in store with {self.count} records")
+        if self.cached[0] == k:
+            return self.cached[1]
+        with open(self.index_path, 'rb') as f:
+            f.seek(k * INDEX_ENTRY.size)
+            offset, length = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            record = self.decode(json.loads(f.read(length)))
+        self.cached = (k, record)
+        return record
+
+    def records(self):   # all records, oldest first
+        with self.lock:
+            return [self._get(k) for k in range(self.count)]
+
+    def write_all(self, records):   # replaces the store atomically
+        with self.lock:
+            self._write_all(records)
+
+    def _write_all(self, records):
+        data = bytearray()
+        entries = bytearray()
+        for record in records:
+            payload = json.dumps(self.encode(record), separators=(',', ':')).encode('utf-8')
+            entries += INDEX_ENTRY.pack(len(data) + RECORD_HEADER.size, len(payload))
+            data += RECORD_HEADER.pack(len(payload)) + payload
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for target, content in ((self.path, data), (self.index_path, entries)):
+            tmp = target.with_name(target.name + '.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+        self.count = len(entries) // INDEX_ENTRY.size
+        self.cached = (None, None)
+
+    def compact(self, keep):   # keeps only the newest records
+        with self.lock:
+            dropped = max(0, self.count - keep)
+            self._write_all([self._get(k) for k in range(dropped, self.count)])
+        rlog.debug(f"RecordStore: {self.path} compacted, {dropped} old records removed")
+
+    def clear(self):
+        self.write_all([])
+
+    def import_jsonl(self, jsonl_file):   # appends all records of a json lines file, returns number imported
+        with open(jsonl_file, 'rt') as f:
+            imported = [self.decode(json.loads(line)) for line in f if line.strip()]
+        self.write_all(self.records() + imported)
+        if self.count > self.max_records:
+            self.compact(self.max_records)
+        return len(imported)
+
+    def export_jsonl(self, jsonl_file):
+        with open(jsonl_file, 'wt') as f:
+            for k in range(self.count):
+                f.write(json.dumps(self.encode(self.get(k))) + '\n')
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Takeoff and landing statistics store of stratux radar display')
+    ap.add_argument("store", help="Record store, e.g. config/stratux-radar.stats")
+    ap.add_argument("-export", "--export", required=False, help="Export all records as json lines into file")
+    ap.add_argument("-import", "--import", dest='import_file', required=False, help="Import json lines file")
+    args = vars(ap.parse_args())
+    store = RecordStore(args['store'])
+    if args['import_file']:
+        print(f"{store.import_jsonl(args['import_file'])} records imported")
+    if args['export']:
+        store.export_jsonl(args['export'])
+        print(f"{len(store)} records exported")
+    if not args['import_file'] and not args['export']:
+        print(f"{len(store)} records")
+    sys.exit(0)
@@ -36,6 +36,8 @@ import requests
 import radarbuttons
 import time
 import radarbluez
+import loophealth
+import persist
 import math
 import asyncio
 import subprocess
@@ -96,16 +98,15 @@ def read_config(config_file):
     return config
 
 
-def write_config(config):
+def write_config(config):   # written by persistence worker
     global g_config_file
 
     try:
-        with open(g_config_file, 'wt') as out:
-            json.dump(config, out, sort_keys=True, indent=4, default=default)
+        text = persist.write_json(g_config_file, config, default=default)
     except (OSError, IOError, ValueError) as e:
         rlog.debug("StatusUI: Error " + str(e) + " writing " + g_config_file)
-    rlog.debug("StatusUI: Configuration saved to " + g_config_file + ": " + json.dumps(config, sort_keys=True, indent=4,
-                                                                                       default=default))
+        return
+    rlog.debug("StatusUI: Configuration saved to " + g_config_file + ": " + text)
 
 
 def init(config_file, url, target_ip, refresh, config):   # prepare everything
@@ -125,7 +126,11 @@ def init(config_file, url, target_ip, refresh, config):   # prepare everything
     refresh_time = refresh
     global_config = config
     new_pass = DEFAULT_PASS
-    new_stratux_ip = ipv4_to_string(string_to_ipv4(stratux_ip))  # to normalize and have leading zeros
+    host = stratux_ip.split(':')[0]   # address may contain a port, e.g. localhost:8000 for the stratux emulator
+    try:
+        new_stratux_ip = ipv4_to_string(string_to_ipv4(host))  # to normalize and have leading zeros
+    except (ValueError, IndexError):   # not a dotted quad, e.g. a host name, ip input starts with zeros
+        new_stratux_ip = ipv4_to_string(0)
     new_wifi = DEFAULT_WIFI
 
 
@@ -157,6 +162,7 @@ def draw_status(display_control, bluetooth_active, extsound_active):
         # status_answer = get_status()  not used for now
         status_text = "Strx: " + format(stratux_ip) + "\n"
         status_text += "DispRefresh: " + str(round(refresh_time, 2)) + " s\n"
+        status_text += loophealth.status_text()
         bt_devices, bt_names = radarbluez.connected_devices()
         if bt_devices is not None:
             status_text += "BT-Devices: " + str(bt_devices) + "\n"
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Fixed capacity history of values for long time-series graphs, e.g. the co values of the last hour.
+# Values are stored twice (at pos and pos + capacity), so the ordered history is a contiguous view without copy.
+# For every graph width the history keeps min/max columns that are updated with every new value,
+# so drawing needs one line per pixel column instead of one per value and alarm peaks stay visible.
+
+import math
+from collections import deque
+import numpy
+
+
+class TimeSeries:
+    def __init__(self, capacity, dtype=numpy.int32, buffer=None):   # buffer e.g. memory mapped, 2 * capacity
+        self.capacity = max(1, capacity)
+        self.buffer = numpy.zeros(2 * self.capacity, dtype=dtype) if buffer is None else buffer
+        self.head = 0   # position of next value
+        self.count = 0   # number of values stored, max capacity
+        self.total = 0   # number of values ever appended, absolute index of next value
+        self.caches = {}   # graph width: (values per column, deque of [index, min, max, first, last])
+
+    def append(self, value):
+        if self.count == self.capacity:
+            self.evict()
+        self.buffer[self.head] = value
+        self.buffer[self.head + self.capacity] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        for bucket, columns in self.caches.values():
+            self.add_to_column(columns, bucket, self.total, value)
+        self.total += 1
+
+    def evict(self):   # oldest value is overwritten, correct first column of every graph cache
+        oldest = self.total - self.count
+        view = self.values()
+        for bucket, columns in self.caches.values():
+            if not columns or columns[0][0] != oldest:
+                continue
+            remaining = view[1:min((oldest // bucket + 1) * bucket, self.total) - oldest]
+            if len(remaining) == 0:
+                columns.popleft()
+            else:
+                columns[0] = [oldest + 1, min(remaining), max(remaining), remaining[0], remaining[-1]]
+
+    @staticmethod
+    def add_to_column(columns, bucket, index, value):
+        if columns and columns[-1][0] // bucket == index // bucket:
+            column = columns[-1]
+            column[1] = min(column[1], value)
+            column[2] = max(column[2], value)
+            column[4] = value
+        else:
+            columns.append([index, value, value, value, value])
+
+    def columns(self, width):   # min/max columns as (offset to oldest value, min, max, first, last)
+        if width not in self.caches:
+            bucket = max(1, math.ceil(self.capacity / max(1, width)))
+            columns = deque()
+            for n, value in enumerate(self.values()):
+                self.add_to_column(columns, bucket, self.total - self.count + n, value)
+            self.caches[width] = (bucket, columns)
+        oldest = self.total - self.count
+        return [(c[0] - oldest, c[1], c[2], c[3], c[4]) for c in self.caches[width][1]]
+
+    def values(self):   # ordered view from oldest to newest value, no copy
+        start = self.head - self.count + self.capacity
+        return self.buffer[start:start + self.count]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.caches = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.values()[index]
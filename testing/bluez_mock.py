@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Mock BlueZ on a private dbus-daemon, for testing the signal driven device tracking of radarbluez without
+# bluetooth hardware or system bus. The mock runs as separate process and serves org.bluez with ObjectManager,
+# adapter hci0 and Device1 objects, it emits InterfacesAdded/InterfacesRemoved and PropertiesChanged.
+# The test connects and disconnects devices via the mock control interface and checks that the connected devices
+# reported by radarbluez follow, and how fast. Exit code 1 if a change was not reported.
+#
+# Needs pydbus, python3-gi and dbus-daemon, plus the radar runtime packages radarbluez imports.
+#
+# Usage:
+#   python3 bluez_mock.py                 # run the test against a private bus
+#   python3 bluez_mock.py -t 0.2          # max 200 ms from change to callback
+#   python3 bluez_mock.py -serve <addr>   # only run the mock on the given bus address
+
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+import pydbus
+from gi.repository import GLib
+
+BLUEZ_SERVICE = 'org.bluez'
+DEVICE_INTERFACE = 'org.bluez.Device1'
+MOCK_INTERFACE = 'radar.test.BluezMock'
+START_TIMEOUT = 5.0   # secs to wait for the mock to own org.bluez
+CALLS = 1000   # number of calls to compare cached lookup with GetManagedObjects
+
+
+def device_path(address):
+    return '/org/bluez/hci0/dev_' + address.replace(':', '_')
+
+
+class MockBluez:
+    dbus = f"""
+    <node>
+        <interface name='org.freedesktop.DBus.ObjectManager'>
+            <method name='GetManagedObjects'>
+                <arg type='a{{oa{{sa{{sv}}}}}}' name='objects' direction='out'/>
+            </method>
+        </interface>
+        <interface name='{MOCK_INTERFACE}'>
+            <method name='AddDevice'>
+                <arg type='s' name='address' direction='in'/>
+                <arg type='s' name='name' direction='in'/>
+                <arg type='b' name='connected' direction='in'/>
+            </method>
+            <method name='SetConnected'>
+                <arg type='s' name='address' direction='in'/>
+                <arg type='b' name='connected' direction='in'/>
+            </method>
+            <method name='RemoveDevice'>
+                <arg type='s' name='address' direction='in'/>
+            </method>
+        </interface>
+    </node>
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.devices = {}   # path -> {'Address', 'Name', 'Connected'}
+
+    def properties(self, path):
+        d = self.devices[path]
+        return {'Address': GLib.Variant('s', d['Address']), 'Name': GLib.Variant('s', d['Name']),
+                'Connected': GLib.Variant('b', d['Connected'])}
+
+    def emit(self, path, interface, signal, signature, params):
+        self.bus.con.emit_signal(None, path, interface, signal, GLib.Variant(signature, params))
+
+    def GetManagedObjects(self):   # noqa: N802
+        objects = {'/org/bluez/hci0': {'org.bluez.Adapter1': {'Powered': GLib.Variant('b', True)}}}
+        for path in self.devices:
+            objects[path] = {DEVICE_INTERFACE: self.properties(path)}
+        return objects
+
+    def AddDevice(self, address, name, connected):   # noqa: N802
+        path = device_path(address)
+        self.devices[path] = {'Address': address, 'Name': name, 'Connected': connected}
+        self.emit('/', 'org.freedesktop.DBus.ObjectManager', 'InterfacesAdded', '(oa{sa{sv}})',
+                  (path, {DEVICE_INTERFACE: self.properties(path)}))
+
+    def SetConnected(self, address, connected):   # noqa: N802
+        path = device_path(address)
+        self.devices[path]['Connected'] = connected
+        self.emit(path, 'org.freedesktop.DBus.Properties', 'PropertiesChanged', '(sa{sv}as)',
+                  (DEVICE_INTERFACE, {'Connected': GLib.Variant('b', connected)}, []))
+
+    def RemoveDevice(self, address):   # noqa: N802
+        path = device_path(address)
+        del self.devices[path]
+        self.emit('/', 'org.freedesktop.DBus.ObjectManager', 'InterfacesRemoved', '(oas)',
+                  (path, [DEVICE_INTERFACE]))
+
+
+class MockAdapter:
+    dbus = """
+    <node>
+        <interface name='org.bluez.Adapter1'>
+            <property name='Powered' type='b' access='read'/>
+        </interface>
+    </node>
+    """
+    Powered = True
+
+
+def serve(address):
+    bus = pydbus.connect(address)
+    mock = MockBluez(bus)
+    with bus.publish(BLUEZ_SERVICE, ('/', mock), ('/org/bluez/hci0', MockAdapter())):
+        GLib.MainLoop().run()
+
+
+def start_bus():
+    daemon = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address'], stdout=subprocess.PIPE,
+                              text=True)
+    return daemon, daemon.stdout.readline().strip()
+
+
+def wait_for_mock(bus):
+    end = time.monotonic() + START_TIMEOUT
+    while True:
+        try:
+            return bus.get(BLUEZ_SERVICE, '/')
+        except (KeyError, GLib.Error):
+            if time.monotonic() > end:
+                raise
+            time.sleep(0.1)
+
+
+async def expect(changes, control, timeout, count):   # waits for callback with count connected devices
+    start = time.perf_counter()
+    control()
+    try:
+        while True:
+            new_devices, names = await asyncio.wait_for(changes.get(), timeout)
+            if new_devices == count:
+                return (time.perf_counter() - start) * 1000, names
+    except asyncio.TimeoutError:
+        return None, []
+
+
+async def run_test(mock, timeout):
+    import radarbluez
+
+    changes = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    radarbluez.watch_devices(loop, lambda new_devices, names: changes.put_nowait((new_devices, names)))
+    steps = (('initial devices', lambda: None, 1),
+             ('connect headset', lambda: mock.SetConnected('00:11:22:33:44:01', True), 2),
+             ('disconnect headset', lambda: mock.SetConnected('00:11:22:33:44:01', False), 1),
+             ('new connected device', lambda: mock.AddDevice('00:11:22:33:44:03', 'Intercom', True), 2),
+             ('remove device', lambda: mock.RemoveDevice('00:11:22:33:44:03'), 1))
+    failures = 0
+    for name, control, count in steps:
+        ms, names = await expect(changes, control, timeout, count)
+        if ms is None:
+            failures += 1
+            print(f"FAIL {name}: no callback with {count} connected devices within {timeout * 1000:.0f}ms")
+        else:
+            print(f"{name:<22} {count} connected {names} after {ms:.1f}ms")
+    return failures
+
+
+def compare_calls(manager):
+    import radarbluez
+
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        radarbluez.connected_devices()
+    cached = (time.perf_counter() - start) / CALLS * 1e6
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        manager.GetManagedObjects()
+    full = (time.perf_counter() - start) / CALLS * 1e6
+    print(f"connected_devices() {cached:.1f}us per call, GetManagedObjects() {full:.1f}us per call")
+
+
+def test(timeout):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.joinpath('main')))
+    import radarbluez
+
+    daemon, address = start_bus()
+    mock_process = subprocess.Popen([sys.executable, __file__, '-serve', address])
+    try:
+        bus = pydbus.connect(address)
+        wait_for_mock(bus)
+        mock = bus.get(BLUEZ_SERVICE, '/')[MOCK_INTERFACE]
+        mock.AddDevice('00:11:22:33:44:01', 'Headset', False)   # paired, not connected
+        mock.AddDevice('00:11:22:33:44:02', 'Earpiece', True)
+        if not radarbluez.bluez_init(bus):
+            print("FAIL bluez_init on private bus")
+            return 1
+        print(f"after bluez_init: {radarbluez.connected_devices()}")
+        failures = asyncio.run(run_test(mock, timeout))
+        compare_calls(bus.get(BLUEZ_SERVICE, '/'))
+        radarbluez.bluez_terminate()
+    finally:
+        mock_process.terminate()
+        daemon.terminate()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Mock BlueZ on a private D-Bus for radarbluez device tracking')
+    ap.add_argument("-serve", "--serve", required=False, help="Only serve the mock on this bus address",
+                    default=None)
+    ap.add_argument("-t", "--timeout", type=float, required=False,
+                    help="Max secs from device change to callback", default=1.0)
+    args = vars(ap.parse_args())
+    if args['serve']:
+        serve(args['serve'])
+        sys.exit(0)
+    sys.exit(test(args['timeout']))
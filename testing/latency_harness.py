@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Latency harness: feeds synthetic traffic through the same path as the websocket handlers
+# (latency.ingest -> radar.new_traffic -> radar.draw_display -> display_control.display) into the virtual display,
+# and speech through radarbluez.speak into a fake mixer. Reports latency histograms per panel and fails
+# (exit code 1) if p95 of message to glass or speak to audio exceeds the budget, or if a panel could not be run.
+# Spoken traffic announcements are off by default, with many close targets they queue up faster than they can be
+# played and speak to audio then only grows with the duration of the run. Speech is checked with the -s interval.
+# With -g a flare is simulated instead: lidar samples are fed through LidarSensor.filter into the ground sensor
+# fast path while the countdown screen is shown, sample to glass and sample to audio are checked.
+#
+# Needs the normal radar runtime packages installed (as on the radar itself), but no display or sound hardware.
+#
+# Usage:
+#   python3 latency_harness.py                                 # all panels, 30 targets, 1 msg/s each, 30 secs
+#   python3 latency_harness.py -p Epaper_3in7 -t 60 -r 2 -d 60  # heavy load on one panel
+#   python3 latency_harness.py -b 800 -sb 1500 -o latency.json  # budgets in ms, save results
+#   python3 latency_harness.py -st -sb 30000                   # include spoken traffic announcements
+#   python3 latency_harness.py -g -b 150                       # lidar sample to countdown screen and audio
+
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import argparse
+import threading
+import subprocess
+from queue import Queue
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.joinpath('main')))
+from displays.Virtual import controller as virtual   # noqa: E402
+from globals import Globals, Modes, global_config   # noqa: E402
+import radar   # noqa: E402
+import radarbluez   # noqa: E402
+import grounddistance   # noqa: E402
+import latency   # noqa: E402
+from stratux_emulator import Ownship, Target, traffic_message, situation_message   # noqa: E402
+
+SITUATION_RATE = 5   # situation messages per second, as sent by stratux
+TTS_TIME = 0.25   # simulated time for pico2wave to generate a wave file
+PLAY_TIME = 1.5   # simulated time a spoken sentence is playing
+LIDAR_RATE = 100   # lidar frames per second, as sent by TFMini-Plus
+FLARE_TOP = 60   # ft, height where a simulated flare starts, sensor warnings are armed again
+SINK_RATE = 8   # ft per second during the flare
+
+
+class FakeSound:
+    def __init__(self, mixer):
+        self.mixer = mixer
+
+    def play(self):
+        self.mixer.playing_until = time.monotonic() + self.mixer.play_time
+        self.mixer.played += 1
+
+
+class FakeMixer:
+    # replaces the alsa mixer, pygame.mixer and pico2wave in radarbluez, timing is simulated
+    def __init__(self, tts_time, play_time):
+        self.tts_time = tts_time
+        self.play_time = play_time
+        self.volume = 100
+        self.playing_until = 0.0
+        self.played = 0
+
+    def setvolume(self, volume):   # alsaaudio.Mixer
+        self.volume = volume
+
+    def init(self):   # pygame.mixer
+        pass
+
+    def Sound(self, path):   # noqa: N802, pygame.mixer.Sound
+        return FakeSound(self)
+
+    def get_busy(self):
+        return time.monotonic() < self.playing_until
+
+    def stop(self):
+        self.playing_until = 0.0
+
+    def run(self, cmd, *args, **kwargs):   # subprocess.run for pico2wave
+        time.sleep(self.tts_time)
+        return subprocess.CompletedProcess(cmd, 0)
+
+    def install(self):
+        radarbluez.pygame = types.SimpleNamespace(mixer=self, error=RuntimeError)
+        radarbluez.subprocess = types.SimpleNamespace(run=self.run)
+        radarbluez.mixer = self
+        radarbluez.extsound_active = True
+        radarbluez.global_config = global_config
+        radarbluez.sound_queue = Queue()
+        radarbluez.sound_thread = threading.Thread(target=radarbluez.audio_speaker, args=(radarbluez.sound_queue,))
+        radarbluez.sound_thread.start()
+
+
+async def synthetic_load(targets, rate, duration, speak_interval):
+    own = Ownship()
+    rnd = random.Random(4711)
+    sources = ('1090', 'flarm', 'modes')
+    fleet = [Target(0x400000 + i, sources[i % len(sources)], rnd) for i in range(targets)]
+    interval = 1 / (targets * rate)
+    start = time.monotonic()
+    next_traffic = next_situation = next_speak = start
+    i = 0
+    while time.monotonic() - start < duration:
+        now = time.monotonic()
+        t = now - start
+        if now >= next_situation:
+            own.update(t)
+            latency.ingest()
+            radar.new_situation(json.dumps(situation_message(own, t)))
+            next_situation += 1 / SITUATION_RATE
+        if now >= next_traffic:
+            latency.ingest()   # as done in listen_forever
+            radar.new_traffic(json.dumps(traffic_message(fleet[i % targets], own, t)))
+            i += 1
+            next_traffic += interval
+        if speak_interval > 0 and now >= next_speak:
+            radarbluez.speak(f"Traffic test {i}")
+            next_speak += speak_interval
+        await asyncio.sleep(radar.MINIMAL_WAIT_TIME)   # like listen_forever, gives display task time to run
+    return i
+
+
+async def flare_load(duration):
+    sensor = grounddistance.LidarSensor()
+    sensor.on_sample = grounddistance.sensor_sample
+    grounddistance.sample_fast_path = True
+    grounddistance.countdown_redraw = asyncio.Event()
+    start = next_frame = time.monotonic()
+    frames = 0
+    while time.monotonic() - start < duration:
+        now = time.monotonic()
+        if now >= next_frame:
+            feet = FLARE_TOP - ((now - start) * SINK_RATE) % FLARE_TOP
+            if feet > FLARE_TOP - 1:   # next flare
+                grounddistance.sensor_upper[:] = [True] * len(grounddistance.sensor_warnings)
+            sensor.filter(int(feet * grounddistance.FEET_TO_MM), 1000, 25.0, time.perf_counter())
+            frames += 1
+            next_frame += 1 / LIDAR_RATE
+        await asyncio.sleep(max(0.0, next_frame - time.monotonic()))
+    sensor.on_sample = None
+    grounddistance.sample_fast_path = False
+    return frames
+
+
+async def run_load(targets, rate, duration, speak_interval, flare):
+    display_task = asyncio.create_task(radar.display_and_cutoff())
+    if flare:
+        messages = await flare_load(duration)
+    else:
+        messages = await synthetic_load(targets, rate, duration, speak_interval)
+    display_task.cancel()
+    await asyncio.gather(display_task, return_exceptions=True)
+    return messages
+
+
+def run_panel(panel, args):
+    disp = virtual.virtual_display(panel, latency=args['panellatency'])
+    radar.display_control = disp
+    radar.max_pixel, radar.zerox, radar.zeroy, radar.display_refresh_time = disp.init(False, False)
+    radar.all_ac.clear()
+    radar.situation['RadarRange'] = 10
+    radar.situation['RadarLimits'] = 5000
+    Globals.mode = Modes.COUNTDOWN_DISTANCE if args['ground'] else Modes.RADAR
+    Globals.refresh = True
+    latency.init(panel)
+    latency.reset()
+    messages = asyncio.run(run_load(args['targets'], args['rate'], args['duration'], args['speak'],
+                                    args['ground']))
+    time.sleep(TTS_TIME + PLAY_TIME)   # let speaker thread finish the last sentence
+    result = latency.summary()[panel]
+    result['messages'] = messages
+    result['frames'] = disp.frame_stats()['frames']
+    return result
+
+
+def check_budget(panel, result, budget, speech_budget, flare):
+    failures = []
+    glass, audio = ('sample_to_glass', 'sample_to_audio') if flare else ('ingest_to_glass', 'speak_to_audio')
+    p95 = result[glass]['p95']
+    if result[glass]['count'] == 0:
+        failures.append(f"{panel}: nothing reached the display")
+    elif p95 > budget:
+        failures.append(f"{panel}: {glass} p95 {p95:.1f}ms exceeds budget {budget:.0f}ms")
+    p95 = result[audio]['p95']
+    if result[audio]['count'] > 0 and p95 > speech_budget:
+        failures.append(f"{panel}: {audio} p95 {p95:.1f}ms exceeds budget {speech_budget:.0f}ms")
+    return failures
+
+
+def print_results(results, flare):
+    print(f"{'panel':<14} {'stage':<16} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9}")
+    for panel, result in results.items():
+        for stage in latency.STAGES:
+            s = result[stage]
+            print(f"{panel:<14} {stage:<16} {s['count']:7d} {s['mean']:9.1f} {s['p50']:9.1f} {s['p95']:9.1f} "
+                  f"{s['p99']:9.1f} {s['max']:9.1f}")
+        hist = result['sample_to_glass' if flare else 'ingest_to_glass']['histogram']
+        print(f"{'':<14} histogram        " + " ".join(f"{k}:{v}" for k, v in hist.items() if v > 0))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Message to pixel latency harness for stratux radar display')
+    ap.add_argument("-p", "--panels", required=False, help="Comma separated list of panels",
+                    default=",".join(virtual.PANELS))
+    ap.add_argument("-t", "--targets", type=int, required=False, help="Number of traffic targets", default=30)
+    ap.add_argument("-r", "--rate", type=float, required=False, help="Messages per second and target", default=1.0)
+    ap.add_argument("-d", "--duration", type=float, required=False, help="Duration per panel in seconds",
+                    default=30.0)
+    ap.add_argument("-s", "--speak", type=float, required=False,
+                    help="Interval in seconds for additional speech output, 0 for traffic speech only", default=3.0)
+    ap.add_argument("-pl", "--panellatency", type=float, required=False,
+                    help="Panel refresh time in seconds, default is the time of the real panel", default=None)
+    ap.add_argument("-b", "--budget", type=float, required=False, help="Budget for p95 message to glass in ms",
+                    default=2000.0)
+    ap.add_argument("-sb", "--speechbudget", type=float, required=False,
+                    help="Budget for p95 speak to audio in ms", default=2500.0)
+    ap.add_argument("-st", "--speaktraffic", required=False, action="store_true", default=False,
+                    help="Speak traffic announcements in addition to the speech interval")
+    ap.add_argument("-g", "--ground", required=False, action="store_true", default=False,
+                    help="Simulate flares with lidar samples on the countdown screen instead of traffic")
+    ap.add_argument("-o", "--output", required=False, help="Write results as json to this file", default=None)
+    args = vars(ap.parse_args())
+
+    global_config.update({'display_tail': True, 'distance_warnings': True, 'sound_volume': 100})
+    if not args['speaktraffic']:
+        radar.speaktraffic = lambda *a, **kw: None
+    fake_mixer = FakeMixer(TTS_TIME, PLAY_TIME)
+    fake_mixer.install()
+    if args['ground']:
+        grounddistance.global_situation = radar.situation
+        radar.situation.update({'g_distance_valid': False, 'g_distance': grounddistance.INVALID_GDISTANCE,
+                                'gear_down': True})
+        grounddistance.fly_status = 1
+        grounddistance.indicate_distance = True
+        grounddistance.countdown_screen = True
+        grounddistance.sensor_warnings_sounds = [FakeSound(fake_mixer)] * len(grounddistance.sensor_warnings)
+    all_results = {}
+    failed = []
+    try:
+        for p in args['panels'].split(","):
+            try:
+                all_results[p] = run_panel(p, args)
+            except ValueError as e:
+                failed.append(f"{p}: panel could not be run: {e}")
+                continue
+            failed += check_budget(p, all_results[p], args['budget'], args['speechbudget'], args['ground'])
+    finally:
+        radarbluez.sound_terminate()
+    print_results(all_results, args['ground'])
+    if args['output']:
+        with open(args['output'], 'w') as f:
+            json.dump({'targets': args['targets'], 'rate': args['rate'], 'duration': args['duration'],
+                       'budget': args['budget'], 'speechbudget': args['speechbudget'], 'results': all_results},
+                      f, indent=2)
+    for failure in failed:
+        print("FAIL " + failure)
+    sys.exit(1 if failed else 0)
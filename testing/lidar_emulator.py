@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Fake TFMini-Plus lidar on a pseudo terminal, for testing the ground distance reader without sensor.
+# Sends frames at the full sensor rate with noise, weak signal frames, outliers and corrupted bytes.
+# The distance follows a takeoff and landing profile: ground roll, climb to max height, descent, landing.
+#
+# Usage:
+#   python3 lidar_emulator.py                      # prints the pty to use, 100 frames/s
+#   python3 lidar_emulator.py -r 1000 -e 0.05      # 1000 frames/s, 5% corrupted frames
+# Start the radar against it with:
+#   python3 radar.py -d Virtual -gd -gdport <pty> -v 1
+
+import os
+import pty
+import sys
+import tty
+import math
+import time
+import random
+import argparse
+
+GROUND = 300   # distance in mm when on ground
+STRENGTH = 800   # normal signal strength
+WEAK_STRENGTH = 40   # strength below gating threshold of the reader
+TEMP_CODE = (25 + 256) * 8   # 25 degrees celsius
+STATS_INTERVAL = 10.0   # seconds between statistics output
+
+
+def frame(distance_mm, strength, temp_code=TEMP_CODE):
+    cm = max(0, min(65535, int(distance_mm / 10)))
+    data = bytes([0x59, 0x59, cm & 0xFF, cm >> 8, strength & 0xFF, strength >> 8, temp_code & 0xFF, temp_code >> 8])
+    return data + bytes([sum(data) & 0xFF])
+
+
+def profile(t, period, height):   # distance in mm for time t in a cycle of period secs
+    phase = (t % period) / period
+    if phase < 0.2 or phase > 0.8:   # on ground
+        return GROUND
+    return GROUND + height * math.sin((phase - 0.2) / 0.6 * math.pi)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Fake TFMini-Plus lidar on a pseudo terminal')
+    ap.add_argument("-r", "--rate", type=float, required=False, help="Frames per second", default=100.0)
+    ap.add_argument("-p", "--period", type=float, required=False, help="Seconds for one takeoff and landing",
+                    default=60.0)
+    ap.add_argument("-mh", "--maxheight", type=float, required=False, help="Max height in mm", default=5000.0)
+    ap.add_argument("-n", "--noise", type=float, required=False, help="Noise in mm (sigma)", default=20.0)
+    ap.add_argument("-w", "--weak", type=float, required=False, help="Share of weak signal frames", default=0.02)
+    ap.add_argument("-o", "--outliers", type=float, required=False, help="Share of outlier frames", default=0.01)
+    ap.add_argument("-e", "--errors", type=float, required=False, help="Share of corrupted frames", default=0.01)
+    args = vars(ap.parse_args())
+
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    os.set_blocking(master, False)
+    print(f"Fake lidar on {os.ttyname(slave)}, {args['rate']} frames/s", flush=True)
+    start = time.monotonic()
+    next_frame = start
+    next_stats = start + STATS_INTERVAL
+    sent = 0
+    try:
+        while True:
+            t = time.monotonic() - start
+            distance = profile(t, args['period'], args['maxheight']) + random.gauss(0, args['noise'])
+            strength = STRENGTH
+            r = random.random()
+            if r < args['weak']:
+                strength = WEAK_STRENGTH
+            elif r < args['weak'] + args['outliers']:
+                distance = random.uniform(0, 12000)
+            data = bytearray(frame(distance, strength))
+            if random.random() < args['errors']:
+                data[random.randrange(2, len(data))] ^= 0xFF
+            try:
+                os.write(master, data)
+            except BlockingIOError:
+                pass   # reader is not reading, drop frame like the sensor
+            sent += 1
+            if time.monotonic() > next_stats:
+                print(f"{sent} frames sent, distance {distance:.0f} mm", flush=True)
+                next_stats += STATS_INTERVAL
+            next_frame += 1 / args['rate']
+            time.sleep(max(0.0, next_frame - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(master)
+        os.close(slave)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
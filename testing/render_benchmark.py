@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Render benchmark: draws every screen of every display controller into the virtual display (no hardware)
+# and reports mean, p95 and p99 time per drawing call. Results can be saved as json and compared between commits.
+#
+# Usage:
+#   python3 render_benchmark.py                           # all panels, 200 rounds
+#   python3 render_benchmark.py -p ST7789 -n 500 -a 30    # one panel, 500 rounds, 30 aircraft
+#   python3 render_benchmark.py -o new.json -c old.json   # save results and compare with previous results
+#   python3 render_benchmark.py -hw                       # real drivers on fake hardware, includes driver cpu time
+# Both modes run on the fake hardware layer, so no display libraries are needed. Exit code 1 if a panel could not
+# be benchmarked.
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import datetime
+import importlib
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.joinpath('main')))
+os.environ['RADAR_FAKE_HARDWARE'] = '1'   # must be set before fakehw and the first driver are imported
+os.environ['RADAR_FAKE_TIMESCALE'] = '0'   # pure cpu time of the drivers with -hw
+from displays.Virtual import controller as virtual   # noqa: E402
+
+CO_VALUES = 60 * 60 // 3   # one hour of co values, one reading every 3 secs
+CHECKLIST = [
+    {'TASK': 'Fuel selector', 'CHECK': 'BOTH', 'REMARK': 'check quantity'},
+    {'TASK': 'Mixture', 'CHECK': 'RICH'},
+    {'TASK': 'Flaps', 'CHECK': 'SET', 'TASK1': 'Takeoff', 'CHECK1': '10 deg', 'TASK2': 'Landing', 'CHECK2': 'FULL'},
+    {'TASK': 'Transponder', 'CHECK': 'ALT'},
+    {'TASK': 'Lights', 'CHECK': 'ON', 'REMARK': 'strobes and landing light'},
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def entry_points(disp, aircraft):
+    # returns name and drawing function for every screen, argument i is the round to vary the values
+    now = datetime.datetime.now(datetime.timezone.utc)
+    flights = [[now - datetime.timedelta(days=d, hours=2), now - datetime.timedelta(days=d, hours=1)]
+               for d in range(1, 10)]
+    co_values = [max(0, int(40 + 30 * math.sin(v / 50))) for v in range(CO_VALUES)]
+    rnd = random.Random(4711)
+    traffic = [(rnd.randint(0, disp.max_pixel), rnd.randint(0, disp.max_pixel), rnd.randint(0, 359),
+                rnd.randint(-50, 50), rnd.choice((-1, 0, 1)), rnd.randint(0, 30)) for _ in range(aircraft)]
+
+    def radar(i):
+        disp.situation(True, True, 3500, i % 360, 5, 10000, 1, True, 2, 5, i % 4, False, True, 0, "")
+        for ac in traffic[:aircraft // 2]:
+            disp.modesaircraft(ac[0] // 2 + 10, ac[3], disp.next_arcposition(i % 360), ac[4], None)
+        for ac in traffic[aircraft // 2:]:
+            disp.aircraft(ac[0], ac[1], (ac[2] + i) % 360, ac[3], ac[4], ac[5], None)
+
+    def cowarner(i):
+        disp.cowarner(co_values, max(co_values), 900000, 3, 1, "50 ppm > 5 mins", False)
+
+    def flighttime(i):
+        disp.flighttime([list(f) for f in flights])
+
+    return (
+        ('situation+aircraft', radar),
+        ('ahrs', lambda i: disp.ahrs(10 * math.sin(i / 10), 30 * math.sin(i / 7), i % 360, i % 7 - 3, "")),
+        ('compass', lambda i: disp.compass(i % 360, "")),
+        ('gmeter', lambda i: disp.gmeter(1 + math.sin(i / 5), 2.5, -0.5, "")),
+        ('meter', lambda i: disp.meter(math.sin(i / 5) * 10, -20, 20, 110, 430, disp.sizey, disp.sizey // 2,
+                                       disp.sizey // 2, 5, 1, "Vertical Speed", "100 feet per min")),
+        ('vsi', lambda i: disp.vsi(500 * math.sin(i / 10), 3500, 110, i % 360, 3600, 1200, -800, "")),
+        ('cowarner', cowarner),
+        ('distance', lambda i: disp.distance(now, True, 2, 4.5, True, 350 + i, 45, True, 1500, 20 + i % 10, 30,
+                                             250, True, 5, i % 20 - 10, True, 800 + i, "")),
+        ('checklist', lambda i: disp.checklist("Before takeoff", CHECKLIST, i % len(CHECKLIST), False)),
+        ('flighttime', flighttime),
+        ('timer', lambda i: disp.timer(time.strftime("%H:%M:%S", time.gmtime(i)), "00:12:34", "00:01:00",
+                                       "Laptimer", "Start", "Mode", "Lap", True, datestr="19.10.26")),
+    )
+
+
+def timing(times):
+    return {'mean': statistics.fmean(times), 'p95': percentile(times, 95), 'p99': percentile(times, 99)}
+
+
+def benchmark_panel(panel, rounds, aircraft, dark_mode, fake_hardware):
+    if fake_hardware:
+        disp = importlib.import_module('displays.' + panel + '.controller').radar_display
+    else:
+        disp = virtual.virtual_display(panel, latency=0.0)
+    disp.init(False, dark_mode)
+    results = {}
+    flush_times = []
+    for name, func in entry_points(disp, aircraft):
+        times = []
+        for i in range(rounds):
+            disp.clear()
+            start = time.perf_counter()
+            func(i)
+            end = time.perf_counter()
+            disp.display()
+            flush_times.append(time.perf_counter() - end)
+            times.append(end - start)
+        results[name] = timing(times)
+    results['display'] = timing(flush_times)
+    return results
+
+
+def print_table(results, baseline):
+    print(f"{'panel':<18} {'call':<20} {'mean ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'delta mean':>11}")
+    for panel, calls in results.items():
+        for call, t in calls.items():
+            delta = ''
+            old = baseline.get(panel, {}).get(call)
+            if old and old['mean'] > 0:
+                delta = f"{(t['mean'] / old['mean'] - 1) * 100:+10.1f}%"
+            print(f"{panel:<18} {call:<20} {t['mean'] * 1000:9.2f} {t['p95'] * 1000:9.2f} {t['p99'] * 1000:9.2f} "
+                  f"{delta:>11}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Render benchmark for stratux radar display controllers')
+    ap.add_argument("-p", "--panels", required=False, help="Comma separated list of panels",
+                    default=",".join(virtual.PANELS))
+    ap.add_argument("-n", "--rounds", type=int, required=False, help="Number of rounds per drawing call",
+                    default=200)
+    ap.add_argument("-a", "--aircraft", type=int, required=False, help="Number of aircraft on radar screen",
+                    default=20)
+    ap.add_argument("-da", "--dark", required=False, help="Benchmark dark mode", action='store_true',
+                    default=False)
+    ap.add_argument("-hw", "--fakehardware", required=False,
+                    help="Use real drivers on fake hardware instead of the virtual display", action='store_true',
+                    default=False)
+    ap.add_argument("-o", "--output", required=False, help="Write results as json to this file", default=None)
+    ap.add_argument("-c", "--compare", required=False, help="Compare with results in this json file",
+                    default=None)
+    args = vars(ap.parse_args())
+
+    compare = {}
+    if args['compare']:
+        with open(args['compare']) as f:
+            compare = json.load(f)['results']
+    all_results = {}
+    failed = []
+    for p in args['panels'].split(","):
+        try:
+            all_results[p] = benchmark_panel(p, args['rounds'], args['aircraft'], args['dark'],
+                                              args['fakehardware'])
+        except (ImportError, ValueError) as e:
+            print(f"FAIL panel {p} could not be benchmarked: {e}")
+            failed.append(p)
+    print_table(all_results, compare)
+    if args['output']:
+        with open(args['output'], 'w') as f:
+            json.dump({'rounds': args['rounds'], 'aircraft': args['aircraft'], 'dark': args['dark'],
+                       'fakehardware': args['fakehardware'], 'results': all_results}, f, indent=2)
+    sys.exit(1 if failed else 0)
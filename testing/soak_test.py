@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Soak test: runs the stratux emulator and radar.py with the virtual display for a simulated flight of several
+# hours, samples the resident memory of the radar process and fails (exit code 1) if memory grows more than the
+# budget after warm up. The emulator replaces targets with new addresses all the time and runs the simulated time
+# faster, so that the radar sees the message volume of the full flight in a shorter time.
+# At the end the tracemalloc report of the radar (option -memwatch) is fetched from the metrics endpoint.
+#
+# Usage:
+#   python3 soak_test.py                              # 8 simulated hours at timescale 4, 2 hours wall time
+#   python3 soak_test.py -H 1 -ts 6 -b 4 -o soak.json  # short run, 4 MB budget, samples saved as json
+#   python3 soak_test.py -ra "-nc -nf"                 # additional radar options
+
+import os
+import sys
+import json
+import time
+import shlex
+import signal
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+TESTING_DIR = Path(__file__).resolve().parent
+MAIN_DIR = TESTING_DIR.parent.joinpath('main')
+SAMPLE_INTERVAL = 10.0   # secs between two memory samples
+WARMUP = 0.15   # share of the run that is ignored for growth, imports, caches and pools are filled
+WINDOW = 0.1   # share of the run averaged at start and end of the measured part
+STARTUP_TIME = 2.0   # secs to wait for the emulator
+
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, IOError, ValueError):
+        pass
+    return None
+
+
+def slope(samples):   # least squares, kB per sec
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mt = sum(t for t, _ in samples) / n
+    mr = sum(r for _, r in samples) / n
+    var = sum((t - mt) ** 2 for t, _ in samples)
+    return sum((t - mt) * (r - mr) for t, r in samples) / var if var > 0 else 0.0
+
+
+def mean_rss(samples):
+    return sum(r for _, r in samples) / len(samples)
+
+
+def evaluate(samples, budget_mb):
+    measured = samples[int(len(samples) * WARMUP):]
+    if len(measured) < 4:
+        return None, ["not enough samples"]
+    window = max(1, int(len(measured) * WINDOW))
+    growth = (mean_rss(measured[-window:]) - mean_rss(measured[:window])) / 1024
+    trend = slope(measured) * (measured[-1][0] - measured[0][0]) / 1024
+    result = {'start_mb': measured[0][1] / 1024, 'end_mb': measured[-1][1] / 1024, 'growth_mb': growth,
+              'trend_mb': trend, 'budget_mb': budget_mb}
+    failures = []
+    if growth > budget_mb:
+        failures.append(f"memory grew {growth:.1f} MB after warm up, budget {budget_mb:.1f} MB")
+    if trend > budget_mb:
+        failures.append(f"memory trend {trend:.1f} MB over the run, budget {budget_mb:.1f} MB")
+    return result, failures
+
+
+def fetch_memory_report(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/memory", timeout=30) as r:
+            return r.read().decode()
+    except (OSError, ValueError) as e:
+        return f"Memory report not available: {e}\n"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Soak test for memory growth of the stratux radar display')
+    ap.add_argument("-H", "--hours", type=float, required=False, help="Simulated flight time in hours", default=8.0)
+    ap.add_argument("-ts", "--timescale", type=float, required=False, help="Simulated time runs faster by",
+                    default=4.0)
+    ap.add_argument("-t", "--targets", type=int, required=False, help="Number of simultaneous targets", default=30)
+    ap.add_argument("-ch", "--churn", type=float, required=False,
+                    help="Simulated seconds after which every target is replaced by a new one", default=300.0)
+    ap.add_argument("-b", "--budget", type=float, required=False, help="Allowed memory growth in MB", default=8.0)
+    ap.add_argument("-p", "--port", type=int, required=False, help="Port for the emulator", default=8000)
+    ap.add_argument("-mp", "--metricsport", type=int, required=False, help="Metrics port of the radar",
+                    default=9110)
+    ap.add_argument("-mw", "--memwatch", type=float, required=False,
+                    help="Interval of tracemalloc reports of the radar in secs, 0 is off", default=600.0)
+    ap.add_argument("-ra", "--radarargs", required=False, help="Additional options for radar.py", default="")
+    ap.add_argument("-o", "--output", required=False, help="Write samples and result as json to this file",
+                    default=None)
+    args = vars(ap.parse_args())
+
+    duration = args['hours'] * 3600 / args['timescale']
+    print(f"Soak test: {args['hours']} simulated hours in {duration / 60:.0f} minutes, {args['targets']} targets")
+    emulator = subprocess.Popen([sys.executable, str(TESTING_DIR.joinpath('stratux_emulator.py')),
+                                 '-p', str(args['port']), '-t', str(args['targets']), '-ts', str(args['timescale']),
+                                 '-ch', str(args['churn'])], stdout=subprocess.DEVNULL)
+    time.sleep(STARTUP_TIME)
+    radar_cmd = [sys.executable, 'radar.py', '-d', 'Virtual', '-c', f"localhost:{args['port']}",
+                 '-metrics', str(args['metricsport']), '-memwatch', str(args['memwatch'])]
+    radar = subprocess.Popen(radar_cmd + shlex.split(args['radarargs']), cwd=str(MAIN_DIR),
+                             env={**os.environ, 'RADAR_FAKE_HARDWARE': '1'})   # no display libraries needed
+    samples = []
+    failures = []
+    report = ""
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < duration:
+            time.sleep(SAMPLE_INTERVAL)
+            if radar.poll() is not None:
+                failures.append(f"radar terminated with exit code {radar.returncode}")
+                break
+            if emulator.poll() is not None:
+                failures.append(f"emulator terminated with exit code {emulator.returncode}")
+                break
+            rss = rss_kb(radar.pid)
+            if rss is not None:
+                t = time.monotonic() - start
+                samples.append((t, rss))
+                if len(samples) % max(1, int(duration / SAMPLE_INTERVAL / 10)) == 0:
+                    print(f"Soak test: {t * args['timescale'] / 3600:5.2f} simulated hours, RSS {rss / 1024:.1f} MB")
+        if args['memwatch'] > 0 and radar.poll() is None:
+            report = fetch_memory_report(args['metricsport'])
+    finally:
+        if radar.poll() is None:
+            radar.send_signal(signal.SIGTERM)
+            try:
+                radar.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                radar.kill()
+        emulator.terminate()
+        emulator.wait()
+
+    result, eval_failures = evaluate(samples, args['budget'])
+    failures += eval_failures
+    if result:
+        print(f"Soak test: RSS {result['start_mb']:.1f} MB -> {result['end_mb']:.1f} MB after warm up, "
+              f"growth {result['growth_mb']:+.1f} MB, trend {result['trend_mb']:+.1f} MB")
+    if report:
+        print(report)
+    if args['output']:
+        with open(args['output'], 'w') as f:
+            json.dump({'args': args, 'samples': samples, 'result': result, 'failures': failures}, f, indent=2)
+    for failure in failures:
+        print("FAIL " + failure)
+    sys.exit(1 if failures else 0)
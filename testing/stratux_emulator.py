@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# PYTHON_ARGCOMPLETE_OK
+#
+# BSD 3-Clause License
+# Copyright (c) 2025, Thomas Breitbach
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE
+
+# Stratux stand-in for load and soak tests of the radar display, no stratux or websockets package necessary.
+# Serves the websockets /radar, /situation and /status and the REST endpoints used by radar.py on one port.
+# Traffic is synthetic: targets circle around a moving ownship, with a configurable mix of
+# 1090-ES (position), FLARM (position) and Mode-S only (DistanceEstimated) targets.
+#
+# Usage:
+#   python3 stratux_emulator.py -p 8000 -t 30                     # 30 targets, real world message rates
+#   python3 stratux_emulator.py -p 8000 -t 30 -l 10               # ten times the load
+#   python3 stratux_emulator.py -mix 1090:50,flarm:30,modes:20    # source mix in percent
+#   python3 stratux_emulator.py -de 60 -dt 5 -sl 0.5              # disconnect every 60s for 5s, slow REST answers
+#   python3 stratux_emulator.py -ch 120 -ts 4                     # new targets every 120s, time runs 4x faster
+# Start the radar against it with:
+#   python3 radar.py -d Virtual -c localhost:8000 -v 1
+
+import sys
+import json
+import math
+import time
+import base64
+import random
+import asyncio
+import hashlib
+import argparse
+import datetime
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"   # websocket handshake, RFC 6455
+SOURCE_1090 = 1
+SOURCE_FLARM = 4
+NM = 1852.0   # meters per nautical mile
+OWN_LAT = 48.0   # center of ownship circle
+OWN_LNG = 11.0
+OWN_ALT = 3500   # baro altitude in feet
+OWN_SPEED = 100   # knots
+OWN_CIRCLE_RADIUS = 5.0   # nm
+STATS_INTERVAL = 10.0   # seconds between statistics output
+TICK = 0.01   # scheduling interval of message generators
+CLIENT_DROP_BUFFER = 256 * 1024   # bytes queued for a client above which new frames are dropped
+CLIENT_SLOW_TIME = 10.0   # seconds a client may stay above the drop limit before it is disconnected
+
+
+class Ownship:
+    def __init__(self):
+        self.lat = OWN_LAT
+        self.lng = OWN_LNG
+        self.course = 0.0
+        self.alt = OWN_ALT
+        self.vspeed = 0.0
+        self.pitch = 0.0
+        self.roll = 0.0
+
+    def update(self, t):
+        omega = OWN_SPEED / 3600 / OWN_CIRCLE_RADIUS   # rad per second on the circle
+        angle = omega * t
+        self.lat = OWN_LAT + OWN_CIRCLE_RADIUS * NM * math.cos(angle) / 111320.0
+        self.lng = OWN_LNG + OWN_CIRCLE_RADIUS * NM * math.sin(angle) / (111320.0 * math.cos(math.radians(OWN_LAT)))
+        self.course = (math.degrees(angle) + 90) % 360
+        self.vspeed = 500 * math.sin(t / 60)
+        self.alt = OWN_ALT + 500 * (1 - math.cos(t / 60))   # climb and descent with vspeed
+        self.pitch = 5 * math.sin(t / 20)
+        self.roll = 15 + 5 * math.sin(t / 7)
+
+
+class Target:
+    def __init__(self, icao, source, rnd):
+        self.icao = icao
+        self.source = source   # '1090', 'flarm' or 'modes'
+        self.radius = rnd.uniform(0.5, 8.0)   # nm from ownship
+        self.phase = rnd.uniform(0, 2 * math.pi)
+        self.omega = rnd.uniform(-0.02, 0.02)   # rad per second
+        self.alt_offset = rnd.randint(-30, 30) * 100
+        self.speed = rnd.randint(60, 250)
+        self.tail = f"D-E{chr(65 + icao % 26)}{chr(65 + icao // 26 % 26)}{chr(65 + icao // 676 % 26)}"
+
+
+def traffic_message(target, own, t):
+    angle = target.phase + target.omega * t
+    dist = target.radius * NM
+    msg = {'Icao_addr': target.icao, 'Tail': target.tail, 'Alt': round(own.alt + target.alt_offset), 'Age': 0.1,
+           'AgeLastAlt': 0.1, 'Speed_valid': True, 'Speed': target.speed, 'Vvel': 0,
+           'Track': round(math.degrees(angle + math.copysign(math.pi / 2, target.omega))) % 360,
+           'Last_source': SOURCE_FLARM if target.source == 'flarm' else SOURCE_1090, 'DistanceEstimated': 0,
+           'Position_valid': target.source != 'modes', 'Lat': 0.0, 'Lng': 0.0}
+    if target.source == 'modes':
+        msg['DistanceEstimated'] = round(dist)
+    else:
+        msg['Lat'] = own.lat + dist * math.cos(angle) / 111320.0
+        msg['Lng'] = own.lng + dist * math.sin(angle) / (111320.0 * math.cos(math.radians(own.lat)))
+    return msg
+
+
+def situation_message(own, t):
+    now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return {'GPSLatitude': own.lat, 'GPSLongitude': own.lng, 'GPSFixQuality': 2, 'GPSHorizontalAccuracy': 3.5,
+            'GPSVerticalAccuracy': 5.0, 'GPSTrueCourse': own.course, 'GPSGroundSpeed': OWN_SPEED,
+            'GPSAltitudeMSL': own.alt + 150, 'GPSTime': now, 'GPSLastFixLocalTime': "0001-01-01T00:00:00Z",
+            'GPSLastGPSTimeStratuxTime': "0001-01-01T00:00:01Z", 'BaroSourceType': 1,
+            'BaroPressureAltitude': own.alt, 'BaroVerticalSpeed': own.vspeed, 'AHRSPitch': own.pitch,
+            'AHRSRoll': own.roll, 'AHRSGyroHeading': own.course, 'AHRSSlipSkid': math.sin(t / 3),
+            'AHRSStatus': 0x02, 'AHRSGLoad': 1 / math.cos(math.radians(own.roll)), 'AHRSGLoadMax': 1.5,
+            'AHRSGLoadMin': 0.8}
+
+
+def status_message(emulator):
+    return {'version': 'emulator', 'Devices': 2, 'CPUTemp': 55.0, 'CPUTempMax': 61.0, 'BMPConnected': True,
+            'IMUConnected': True, 'GPS_connected': True, 'GPS_solution': '3D GPS + SBAS', 'GPS_detected_type': 0x0F,
+            'GPS_position_accuracy': 3.5, 'GPS_satellites_locked': 12, 'GPS_satellites_seen': 18,
+            'GPS_satellites_tracked': 14, 'UATRadio_connected': False, 'UAT_messages_last_minute': 0,
+            'UAT_messages_max': 0, 'ES_messages_last_minute': emulator.sent['radar'] % 100000,
+            'ES_messages_max': 10000, 'OGN_connected': True, 'OGN_gain_db': 40.0, 'OGN_noise_db': 5.0,
+            'OGN_messages_last_minute': 100, 'OGN_messages_max': 1000,
+            'AltitudeOffset': emulator.settings['AltitudeOffset']}
+
+
+def parse_mix(mix):
+    result = {}
+    for part in mix.split(","):
+        source, percent = part.split(":")
+        if source not in ('1090', 'flarm', 'modes'):
+            raise ValueError(f"Unknown source {source} in mix")
+        result[source] = float(percent)
+    return result
+
+
+def ws_frame(payload, opcode=0x1):
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 65536:
+        header += bytes([126]) + n.to_bytes(2, 'big')
+    else:
+        header += bytes([127]) + n.to_bytes(8, 'big')
+    return header + payload
+
+
+class StratuxEmulator:
+    def __init__(self, args):
+        self.args = args
+        self.rnd = random.Random(args['seed'])
+        self.own = Ownship()
+        self.start = time.monotonic()
+        self.clients = {'radar': set(), 'situation': set(), 'status': set()}
+        self.sent = {'radar': 0, 'situation': 0, 'status': 0, 'http': 0}
+        self.dropped = {'radar': 0, 'situation': 0, 'status': 0}   # frames not sent to slow clients
+        self.slow_since = {}   # writer -> time its write buffer first exceeded the drop limit
+        self.settings = {'RadarRange': 10, 'RadarLimits': 10000, 'AltitudeOffset': 0}
+        self.disconnected_until = 0.0
+        self.stalled_until = 0.0
+        self.mix = parse_mix(args['mix'])
+        sources = self.rnd.choices(list(self.mix), weights=list(self.mix.values()), k=args['targets'] * args['load'])
+        self.targets = [Target(0x400000 + i, s, self.rnd) for i, s in enumerate(sources)]
+        self.next_icao = 0x400000 + len(self.targets)
+
+    def now(self):   # simulated time, runs faster with timescale
+        return (time.monotonic() - self.start) * self.args['timescale']
+
+    def churn(self, index):   # target leaves, a new one with a new address appears
+        source = self.rnd.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        self.targets[index] = Target(self.next_icao, source, self.rnd)
+        self.next_icao = 0x400000 + (self.next_icao - 0x400000 + 1) % 0xBFFFFF
+
+    def offline(self):
+        return time.monotonic() < self.disconnected_until
+
+    def broadcast(self, stream, msg):
+        if time.monotonic() < self.stalled_until:
+            return
+        frame = ws_frame(json.dumps(msg).encode())
+        for writer in list(self.clients[stream]):
+            queued = writer.transport.get_write_buffer_size()
+            if queued <= CLIENT_DROP_BUFFER:
+                self.slow_since.pop(writer, None)
+                writer.write(frame)
+                self.sent[stream] += 1
+                continue
+            self.dropped[stream] += 1
+            if time.monotonic() - self.slow_since.setdefault(writer, time.monotonic()) > CLIENT_SLOW_TIME:
+                print(f"Emulator: disconnecting slow {stream} client, {queued} bytes not sent")
+                self.clients[stream].discard(writer)
+                self.slow_since.pop(writer, None)
+                writer.transport.abort()   # client does not read anymore, do not buffer forever
+
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode(errors='replace').split("\r\n")
+        method, path = lines[0].split(" ")[:2]
+        headers = {h.split(":", 1)[0].strip().lower(): h.split(":", 1)[1].strip() for h in lines[1:] if ":" in h}
+        if self.offline():   # simulated stratux outage
+            writer.transport.abort()
+            return
+        if headers.get('upgrade', '').lower() == 'websocket':
+            await self.websocket(path.strip('/'), headers, reader, writer)
+        else:
+            length = int(headers.get('content-length', 0))
+            body = await reader.readexactly(length) if length else b''
+            await self.rest(method, path, body, writer)
+
+    async def websocket(self, stream, headers, reader, writer):
+        if stream not in self.clients:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WS_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        self.clients[stream].add(writer)
+        try:
+            while True:   # read client frames, answer ping and close
+                head = await reader.readexactly(2)
+                opcode = head[0] & 0x0F
+                length = head[1] & 0x7F
+                if length == 126:
+                    length = int.from_bytes(await reader.readexactly(2), 'big')
+                elif length == 127:
+                    length = int.from_bytes(await reader.readexactly(8), 'big')
+                mask = await reader.readexactly(4) if head[1] & 0x80 else b'\0\0\0\0'
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(await reader.readexactly(length)))
+                if opcode == 0x8:
+                    writer.write(ws_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(ws_frame(payload, 0xA))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients[stream].discard(writer)
+            self.slow_since.pop(writer, None)
+            writer.close()
+
+    async def rest(self, method, path, body, writer):
+        if self.args['slow'] > 0:
+            await asyncio.sleep(self.args['slow'])
+        self.sent['http'] += 1
+        answer = {}
+        if path == '/getSettings':
+            answer = self.settings
+        elif path == '/getStatus':
+            answer = status_message(self)
+        elif path == '/setSettings' and method == 'POST':
+            try:
+                new = json.loads(body or b'{}')
+            except ValueError:
+                new = {}
+            self.settings.update(new)
+            if 'RadarRange' in new or 'RadarLimits' in new:   # stratux sends changed radar settings on /radar
+                self.broadcast('radar', {'RadarRange': self.settings['RadarRange'],
+                                         'RadarLimits': self.settings['RadarLimits']})
+        elif path in ('/cageAHRS', '/calibrateAHRS', '/resetGMeter', '/shutdown', '/reboot'):
+            print(f"Emulator: {method} {path}")
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+        data = json.dumps(answer).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                     b"Content-Length: " + str(len(data)).encode() + b"\r\n\r\n" + data)
+        await writer.drain()
+        writer.close()
+
+    async def traffic(self):
+        rate = self.args['rate'] * len(self.targets) * self.args['timescale']   # messages per second, all targets
+        due = 0.0
+        index = 0
+        churn_index = 0
+        next_churn = self.args['churn'] / max(1, len(self.targets))
+        while True:
+            await asyncio.sleep(TICK)
+            due += rate * TICK
+            t = self.now()
+            self.own.update(t)
+            while self.args['churn'] and self.targets and t >= next_churn:
+                self.churn(churn_index)
+                churn_index = (churn_index + 1) % len(self.targets)
+                next_churn += self.args['churn'] / len(self.targets)
+            while due >= 1 and self.targets:
+                due -= 1
+                self.broadcast('radar', traffic_message(self.targets[index], self.own, t))
+                index = (index + 1) % len(self.targets)
+
+    async def periodic(self, stream, rate, message):
+        while True:
+            await asyncio.sleep(1 / (rate * self.args['timescale']))
+            self.broadcast(stream, message())
+
+    async def faults(self):
+        last_disconnect = last_stall = time.monotonic()
+        while True:
+            await asyncio.sleep(0.1)
+            now = time.monotonic()
+            if self.args['disconnect_every'] and now - last_disconnect >= self.args['disconnect_every']:
+                last_disconnect = now
+                self.disconnected_until = now + self.args['disconnect_time']
+                print(f"Emulator: disconnecting all clients for {self.args['disconnect_time']} secs")
+                for writers in self.clients.values():
+                    for writer in list(writers):
+                        writer.transport.abort()
+                    writers.clear()
+            if self.args['stall_every'] and now - last_stall >= self.args['stall_every']:
+                last_stall = now
+                self.stalled_until = now + self.args['stall_time']
+                print(f"Emulator: stalling all streams for {self.args['stall_time']} secs")
+
+    async def statistics(self):
+        last = dict(self.sent)
+        last_dropped = dict(self.dropped)
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            rates = {k: (self.sent[k] - last[k]) / STATS_INTERVAL for k in self.sent}
+            last = dict(self.sent)
+            dropped = {k: self.dropped[k] - last_dropped[k] for k in self.dropped if self.dropped[k] > last_dropped[k]}
+            last_dropped = dict(self.dropped)
+            clients = {k: len(v) for k, v in self.clients.items()}
+            print(f"Emulator: msgs/s radar {rates['radar']:.0f} situation {rates['situation']:.1f} "
+                  f"status {rates['status']:.1f} http {rates['http']:.1f}, clients {clients}"
+                  + (f", dropped for slow clients {dropped}" if dropped else ""))
+
+    async def run(self):
+        server = await asyncio.start_server(self.handle, self.args['host'], self.args['port'])
+        print(f"Stratux emulator on {self.args['host']}:{self.args['port']} with {len(self.targets)} targets")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.traffic(),
+                                 self.periodic('situation', self.args['situation_rate'],
+                                               lambda: situation_message(self.own, self.now())),
+                                 self.periodic('status', self.args['status_rate'], lambda: status_message(self)),
+                                 self.faults(), self.statistics())
+
+
+def add_arguments(ap):
+    ap.add_argument("-H", "--host", required=False, help="Interface to listen on", default="localhost")
+    ap.add_argument("-p", "--port", type=int, required=False, help="Port for websockets and REST", default=8000)
+    ap.add_argument("-t", "--targets", type=int, required=False, help="Number of traffic targets", default=20)
+    ap.add_argument("-r", "--rate", type=float, required=False, help="Messages per second per target", default=1.0)
+    ap.add_argument("-l", "--load", type=int, required=False, help="Load factor, multiplies the number of targets",
+                    default=1)
+    ap.add_argument("-mix", "--mix", required=False, help="Source mix in percent of 1090, flarm and modes",
+                    default="1090:60,flarm:20,modes:20")
+    ap.add_argument("-sr", "--situation_rate", type=float, required=False, help="Situation messages per second",
+                    default=5.0)
+    ap.add_argument("-str", "--status_rate", type=float, required=False, help="Status messages per second",
+                    default=1.0)
+    ap.add_argument("-de", "--disconnect_every", type=float, required=False,
+                    help="Disconnect all clients every n seconds (0 = never)", default=0)
+    ap.add_argument("-dt", "--disconnect_time", type=float, required=False,
+                    help="Time in seconds new connections are refused after disconnect", default=3.0)
+    ap.add_argument("-se", "--stall_every", type=float, required=False,
+                    help="Stop sending on all streams every n seconds (0 = never)", default=0)
+    ap.add_argument("-st", "--stall_time", type=float, required=False, help="Duration of a stall in seconds",
+                    default=6.0)
+    ap.add_argument("-sl", "--slow", type=float, required=False, help="Delay in seconds for every REST answer",
+                    default=0.0)
+    ap.add_argument("-s", "--seed", type=int, required=False, help="Random seed for traffic", default=1)
+    ap.add_argument("-ch", "--churn", type=float, required=False,
+                    help="Every target is replaced by a new one with a new address every n seconds (0 = never)",
+                    default=0)
+    ap.add_argument("-ts", "--timescale", type=float, required=False,
+                    help="Simulated time runs this factor faster, all message rates are scaled", default=1.0)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description='Stratux emulator for radar display tests')
+    add_arguments(ap)
+    emulator = StratuxEmulator(vars(ap.parse_args()))
+    try:
+        asyncio.run(emulator.run())
+    except KeyboardInterrupt:
+        sys.exit(0)